@@ -1,10 +1,14 @@
 # picker/forms/random_movie_form.py
 
-import datetime
+from datetime import datetime
 
 from django import forms
+from django.conf import settings
+from django.core.cache import cache
 from django.db.models import Max, Min
 
+from picker.helpers.weighting import WEIGHTINGS
+from sync.helpers.library_version import get_library_version
 from sync.models import Movie
 from sync.models.genre import Genre
 
@@ -25,6 +29,11 @@ class RandomMovieForm(forms.Form):
     max_duration = forms.ChoiceField(required=False)
     min_year = forms.ChoiceField(required=False)
     max_year = forms.ChoiceField(required=False)
+    weight = forms.ChoiceField(
+        required=False,
+        choices=[("", "Evenly")]
+        + [(name, label) for name, (label, _) in WEIGHTINGS.items()],
+    )
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -36,21 +45,15 @@ class RandomMovieForm(forms.Form):
                 }
             )
 
-        # Fetch distinct genres that have at least one associated movie, ordered alphabetically
-        genres_with_movies = (
-            Genre.objects.filter(movies__isnull=False)
-            .distinct()
-            .order_by("name")
-            .values_list("name", flat=True)
-        )
+        choices = self.get_cached_choices()
         # Extend the choices with unique genres that have movies
-        self.fields["genre"].choices += [(genre, genre) for genre in genres_with_movies]
+        self.fields["genre"].choices += choices["genres"]
 
         # Set other field choices
-        self.fields["min_rotten_tomatoes_rating"].choices = self.get_rating_choices()
-        self.fields["max_duration"].choices = self.get_duration_choices()
-        self.fields["min_year"].choices = self.get_year_choices()
-        self.fields["max_year"].choices = self.get_year_choices()
+        self.fields["min_rotten_tomatoes_rating"].choices = choices["ratings"]
+        self.fields["max_duration"].choices = choices["durations"]
+        self.fields["min_year"].choices = choices["years"]
+        self.fields["max_year"].choices = choices["years"]
 
         if self.data and "reset" not in self.data:
             for field in self.fields:
@@ -68,6 +71,43 @@ class RandomMovieForm(forms.Form):
                     else:
                         self.fields[field].initial = self.data.get(field)
 
+    @classmethod
+    def get_cached_choices(cls):
+        """
+        Choices derived from the library, cached until the next sync bumps the
+        library version, so building the form usually runs no queries.
+        """
+        cache_key = f"random_movie_form:choices:{get_library_version()}"
+        choices = cache.get(cache_key)
+        if choices is None:
+            choices = cls.build_choices()
+            cache.set(cache_key, choices, settings.LIBRARY_CACHE_TIMEOUT)
+        return choices
+
+    @classmethod
+    def build_choices(cls):
+        # Fetch distinct genres that have at least one associated movie, ordered alphabetically
+        genres_with_movies = (
+            Genre.objects.filter(movies__isnull=False)
+            .distinct()
+            .order_by("name")
+            .values_list("name", flat=True)
+        )
+        stats = Movie.objects.aggregate(
+            min_duration=Min("duration"),
+            max_duration=Max("duration"),
+            min_rating=Min("rotten_tomatoes_rating"),
+            max_rating=Max("rotten_tomatoes_rating"),
+            min_year=Min("year"),
+            max_year=Max("year"),
+        )
+        return {
+            "genres": [(genre, genre) for genre in genres_with_movies],
+            "ratings": cls.get_rating_choices(stats),
+            "durations": cls.get_duration_choices(stats),
+            "years": cls.get_year_choices(stats),
+        }
+
     def clean_min_rotten_tomatoes_rating(self):
         value = self.cleaned_data.get("min_rotten_tomatoes_rating")
         return int(value) if value else None
@@ -76,11 +116,9 @@ class RandomMovieForm(forms.Form):
         value = self.cleaned_data.get("max_duration")
         return int(value) if value else None
 
-    def get_duration_choices(self):
+    @staticmethod
+    def get_duration_choices(durations):
         """Generate duration choices in a human-readable format based on existing movies."""
-        durations = Movie.objects.aggregate(
-            min_duration=Min("duration"), max_duration=Max("duration")
-        )
 
         min_duration = (
             int(durations["min_duration"] // 60000) if durations["min_duration"] else 0
@@ -106,12 +144,9 @@ class RandomMovieForm(forms.Form):
 
         return choices
 
-    def get_rating_choices(self):
+    @staticmethod
+    def get_rating_choices(ratings):
         """Generate rating choices based on existing movies."""
-        ratings = Movie.objects.aggregate(
-            min_rating=Min("rotten_tomatoes_rating"),
-            max_rating=Max("rotten_tomatoes_rating"),
-        )
 
         # Handle None values for min and max ratings
         min_rating = (
@@ -137,12 +172,9 @@ class RandomMovieForm(forms.Form):
         value = self.cleaned_data.get("max_year")
         return int(value) if value else None
 
-    def get_year_choices(self):
+    @staticmethod
+    def get_year_choices(years):
         """Generate year choices based on existing movies."""
-        years = Movie.objects.aggregate(
-            min_year=Min("year"),
-            max_year=Max("year"),
-        )
         min_year = years["min_year"] or 1888  # Default to 1888 if no movies
         max_year = (
             years["max_year"] or datetime.now().year
@@ -7,5 +7,7 @@ class SearchForm(forms.Form):
     query = forms.CharField(
         label="Search",
         max_length=255,
-        widget=forms.TextInput(attrs={"placeholder": "Search Movies & TV"}),
+        widget=forms.TextInput(
+            attrs={"placeholder": "Search Movies & TV", "autocomplete": "off"}
+        ),
     )
@@ -1,3 +1,15 @@
 # picker/helpers/__init__.py
 
+from .fast_json import *
+from .keyset import *
 from .movie_helpers import *
+from .movie_index import *
+from .pick_pools import *
+from .search import *
+from .show_index import *
+from .shuffle_deck import *
+from .suggest_index import *
+from .time_budget import *
+from .trigram_index import *
+from .unified_search import *
+from .weighting import *
@@ -0,0 +1,172 @@
+# picker/helpers/keyset.py
+
+import base64
+import binascii
+import json
+from typing import List, Optional, Sequence
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q, QuerySet
+
+from sync.helpers.library_version import get_library_version
+from utils.logger_utils import setup_logging
+
+logger = setup_logging(__name__)
+
+
+def encode_cursor(key) -> str:
+    """An opaque, URL-safe token for a position in a list."""
+    data = json.dumps(key, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def decode_cursor(token: Optional[str]):
+    """The position encoded by ``token``, or None if it is missing or invalid."""
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        logger.debug(f"Ignoring invalid cursor {token!r}")
+        return None
+
+
+class KeysetPage:
+    """
+    One page of a list with cursors to its neighbours.
+
+    ``next_cursor`` is passed back as ``after`` and ``previous_cursor`` as
+    ``before``; either is None at the ends of the list. ``count`` is the
+    length of the whole list, which may lag a sync behind for browse lists.
+    """
+
+    def __init__(
+        self,
+        object_list: list,
+        count: int,
+        next_cursor: Optional[str] = None,
+        previous_cursor: Optional[str] = None,
+    ):
+        self.object_list = object_list
+        self.count = count
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def cached_count(queryset: QuerySet) -> int:
+    """
+    The row count of an unfiltered browse list, cached until the next sync
+    bumps the library version, so browsing runs no COUNT(*) queries.
+    """
+    table = queryset.model._meta.db_table
+    cache_key = f"keyset:count:{table}:{get_library_version()}"
+    count = cache.get(cache_key)
+    if count is None:
+        count = queryset.count()
+        cache.set(cache_key, count, settings.LIBRARY_CACHE_TIMEOUT)
+    return count
+
+
+def keyset_page(
+    queryset: QuerySet,
+    per_page: int,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    fields: Optional[Sequence[str]] = None,
+) -> KeysetPage:
+    """
+    A page of ``queryset`` in (title, id) order, starting after or ending
+    before a cursor. Each page is one indexed range query with no OFFSET,
+    so deep pages cost the same as the first.
+
+    With ``fields`` the page holds ``values()`` dicts of just those columns,
+    which must include ``pk`` and ``title`` for the cursors.
+    """
+    backwards = bool(before)
+    key = decode_cursor(before if backwards else after)
+    if not (
+        isinstance(key, list)
+        and len(key) == 2
+        and isinstance(key[0], str)
+        and isinstance(key[1], int)
+    ):
+        key, backwards = None, False
+
+    rows = queryset.order_by("title", "id")
+    if key is not None:
+        title, pk = key
+        if backwards:
+            rows = queryset.filter(
+                Q(title__lt=title) | Q(title=title, id__lt=pk)
+            ).order_by("-title", "-id")
+        else:
+            rows = rows.filter(Q(title__gt=title) | Q(title=title, id__gt=pk))
+
+    if fields:
+        rows = rows.values(*fields)
+
+    # One extra row tells whether there is another page in that direction
+    object_list = list(rows[: per_page + 1])
+    more = len(object_list) > per_page
+    object_list = object_list[:per_page]
+    if backwards:
+        object_list.reverse()
+
+    def cursor(row):
+        if isinstance(row, dict):
+            return encode_cursor([row["title"], row["pk"]])
+        return encode_cursor([row.title, row.pk])
+
+    has_next = more if not backwards else True
+    has_previous = more if backwards else key is not None
+    return KeysetPage(
+        object_list,
+        cached_count(queryset),
+        next_cursor=cursor(object_list[-1]) if object_list and has_next else None,
+        previous_cursor=(
+            cursor(object_list[0]) if object_list and has_previous else None
+        ),
+    )
+
+
+def ranked_page(
+    ids: Sequence[int],
+    per_page: int,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+) -> KeysetPage:
+    """
+    A page of a ranked list of ids, such as search results. The list is
+    already in memory and bounded, so its cursors are plain positions.
+    """
+    end = decode_cursor(before)
+    start = decode_cursor(after)
+    if isinstance(end, int) and 0 < end <= len(ids):
+        start = max(end - per_page, 0)
+    elif isinstance(start, int) and 0 <= start < len(ids):
+        end = start + per_page
+    else:
+        start, end = 0, per_page
+    end = min(end, len(ids))
+
+    object_list: List[int] = list(ids[start:end])
+    return KeysetPage(
+        object_list,
+        len(ids),
+        next_cursor=encode_cursor(end) if end < len(ids) else None,
+        previous_cursor=encode_cursor(start) if start > 0 else None,
+    )
@@ -1,5 +1,6 @@
 # picker/helpers/movie_helpers.py
 
+import random
 from typing import List, Optional
 
 from django.db.models import Q, QuerySet
@@ -18,9 +19,18 @@ def get_filtered_movies(genre: Optional[str] = None) -> Q:
 
 
 def get_random_movies(queryset: QuerySet[Movie], count: int) -> List[Movie]:
-    logger.debug(
-        f"Selecting {count} random movies from a queryset of {queryset.count()} movies."
-    )
-    movies = list(queryset.order_by("?")[:count])
+    """
+    Pick up to ``count`` random movies from ``queryset``.
+
+    Only the matching ids are read, ``count`` of them are sampled in Python and
+    just those rows are fetched by primary key, instead of sorting the whole
+    filtered table with ORDER BY RANDOM().
+    """
+    movie_ids = list(set(queryset.values_list("pk", flat=True)))
+    sampled_ids = random.sample(movie_ids, min(count, len(movie_ids)))
+    logger.debug(f"Selecting {len(sampled_ids)} of {len(movie_ids)} movies.")
+
+    movies_by_id = Movie.objects.in_bulk(sampled_ids)
+    movies = [movies_by_id[pk] for pk in sampled_ids if pk in movies_by_id]
     logger.debug(f"Random movies selected: {[m.title for m in movies]}")
     return movies
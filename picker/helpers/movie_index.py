@@ -0,0 +1,292 @@
+# picker/helpers/movie_index.py
+
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from picker.helpers.weighting import WEIGHTINGS, AliasTable, weighted_permutation
+from sync.helpers.library_version import get_library_version
+from sync.models import Movie
+from utils.logger_utils import setup_logging
+
+logger = setup_logging(__name__)
+
+# Rounds of alias table draws before a weighted sample stops rejecting
+ALIAS_DRAW_ROUNDS = 4
+
+
+def float_column(values) -> np.ndarray:
+    """A float array with NaN for missing values."""
+    return np.array(
+        [np.nan if value is None else value for value in values], dtype=np.float64
+    )
+
+
+class SortedColumn:
+    """A numeric column sorted once so range filters are two binary searches."""
+
+    def __init__(self, values: np.ndarray):
+        # NaN (a missing value) sorts last and never matches a range
+        self.values = values
+        self.order = np.argsort(values, kind="stable")
+        self.sorted_values = values[self.order]
+
+    def positions(self, low: float = -np.inf, high: float = np.inf) -> np.ndarray:
+        start = np.searchsorted(self.sorted_values, low, side="left")
+        stop = np.searchsorted(self.sorted_values, high, side="right")
+        return self.order[start:stop]
+
+
+class MovieIndex:
+    """
+    In-memory filter index over all movies for the random picker.
+
+    Movies are stored in a dense array ordered by id. Each genre is a packed
+    bitset over that array, and rating, duration and year are kept as sorted
+    columns. A filter is a bitset AND plus one range lookup per bound, and
+    sampling picks positions straight from the result, so the database is
+    only queried for the rows finally shown.
+    """
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        genre_movie_ids: Dict[str, Sequence[int]],
+        ratings,
+        durations,
+        years,
+        view_counts=None,
+        audience_ratings=None,
+        added_at=None,
+    ):
+        self.ids = ids
+        self.size = len(ids)
+        self.all_bits = np.packbits(np.ones(self.size, dtype=bool))
+        self.genre_bits = {
+            name: self.bits_for(np.searchsorted(ids, movie_ids))
+            for name, movie_ids in genre_movie_ids.items()
+        }
+        self.ratings = SortedColumn(ratings)
+        self.durations = SortedColumn(durations)
+        self.years = SortedColumn(years)
+        # Inputs for the weightings; added_at is in epoch seconds
+        missing = np.full(self.size, np.nan)
+        self.view_counts = np.zeros(self.size) if view_counts is None else view_counts
+        self.audience_ratings = (
+            missing if audience_ratings is None else audience_ratings
+        )
+        self.added_at = missing if added_at is None else added_at
+        self.unwatched_bits = np.packbits(self.view_counts == 0)
+        self.alias_tables: Dict[str, AliasTable] = {}
+        self.weight_arrays: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def build(cls) -> "MovieIndex":
+        started = time.monotonic()
+        rows = list(
+            Movie.objects.order_by("id").values_list(
+                "id",
+                "rotten_tomatoes_rating",
+                "duration",
+                "year",
+                "view_count",
+                "audience_rating",
+                "added_at",
+            )
+        )
+        columns = list(zip(*rows)) or [()] * 7
+        ids = np.array(columns[0], dtype=np.int64)
+
+        genre_movie_ids: Dict[str, List[int]] = {}
+        for movie_id, name in Movie.genres.through.objects.values_list(
+            "movie_id", "genre__name"
+        ):
+            genre_movie_ids.setdefault(name, []).append(movie_id)
+
+        index = cls(
+            ids,
+            genre_movie_ids,
+            float_column(columns[1]),
+            float_column(columns[2]),
+            float_column(columns[3]),
+            view_counts=float_column(columns[4]),
+            audience_ratings=float_column(columns[5]),
+            added_at=float_column(
+                [added.timestamp() if added else None for added in columns[6]]
+            ),
+        )
+        logger.info(
+            f"Built movie index with {index.size} movies and "
+            f"{len(genre_movie_ids)} genres in "
+            f"{(time.monotonic() - started) * 1000:.1f} ms"
+        )
+        return index
+
+    def bits_for(self, positions: np.ndarray) -> np.ndarray:
+        mask = np.zeros(self.size, dtype=bool)
+        mask[positions] = True
+        return np.packbits(mask)
+
+    def positions(
+        self,
+        genres: Sequence[str] = (),
+        min_rating: Optional[float] = None,
+        max_duration: Optional[float] = None,
+        min_year: Optional[int] = None,
+        max_year: Optional[int] = None,
+        unwatched: bool = False,
+    ) -> np.ndarray:
+        """
+        Return the positions of movies that have every genre in ``genres``,
+        fall within the given bounds and, with ``unwatched``, were never
+        watched. ``max_duration`` is in milliseconds.
+        """
+        bits = self.all_bits
+        for genre in genres:
+            genre_bits = self.genre_bits.get(genre)
+            if genre_bits is None:
+                return np.zeros(0, dtype=np.intp)
+            bits = bits & genre_bits
+
+        if min_rating is not None:
+            bits = bits & self.bits_for(self.ratings.positions(low=min_rating))
+        if max_duration is not None:
+            bits = bits & self.bits_for(self.durations.positions(high=max_duration))
+        if min_year is not None or max_year is not None:
+            low = -np.inf if min_year is None else min_year
+            high = np.inf if max_year is None else max_year
+            bits = bits & self.bits_for(self.years.positions(low, high))
+        if unwatched:
+            bits = bits & self.unwatched_bits
+
+        return np.flatnonzero(np.unpackbits(bits, count=self.size))
+
+    def filter(self, **filters) -> np.ndarray:
+        """Return the ids of movies matching ``filters``, see positions()."""
+        return self.ids[self.positions(**filters)]
+
+    def weights(self, weight: str) -> np.ndarray:
+        if weight not in self.weight_arrays:
+            self.weight_arrays[weight] = WEIGHTINGS[weight][1](self)
+        return self.weight_arrays[weight]
+
+    def alias_table(self, weight: str) -> AliasTable:
+        # Built on first use; a new library version gets a new index
+        if weight not in self.alias_tables:
+            self.alias_tables[weight] = AliasTable(self.weights(weight))
+        return self.alias_tables[weight]
+
+    def sample(
+        self,
+        count: int,
+        seed: Optional[int] = None,
+        weight: Optional[str] = None,
+        **filters,
+    ) -> List[int]:
+        """
+        Pick up to ``count`` distinct random movie ids matching ``filters``,
+        uniformly or by one of the WEIGHTINGS. With a ``seed`` the pick only
+        depends on the seed, the filters and the indexed movies, so it is
+        repeatable until the library changes.
+        """
+        candidates = self.positions(**filters)
+        count = min(count, len(candidates))
+        if not count:
+            return []
+        rng = np.random.default_rng(seed)
+        if weight:
+            picked = self.weighted_sample(rng, candidates, count, weight)
+        else:
+            picked = rng.choice(candidates, count, replace=False)
+        return [int(pk) for pk in self.ids[picked]]
+
+    def weighted_sample(self, rng, candidates, count, weight) -> np.ndarray:
+        """
+        Draw from the weight's alias table over the whole library, rejecting
+        movies outside ``candidates`` and repeats. When the filters reject
+        too much, fall back to a direct weighted choice among the rest.
+        """
+        allowed = np.zeros(self.size, dtype=bool)
+        allowed[candidates] = True
+        table = self.alias_table(weight)
+        picked: List[int] = []
+        for _ in range(ALIAS_DRAW_ROUNDS):
+            for position in table.draw(rng, count * 4):
+                if allowed[position]:
+                    allowed[position] = False
+                    picked.append(position)
+                    if len(picked) == count:
+                        return np.array(picked)
+
+        remaining = np.flatnonzero(allowed)
+        weights = self.weights(weight)[remaining]
+        rest = rng.choice(
+            remaining, count - len(picked), replace=False, p=weights / weights.sum()
+        )
+        return np.concatenate([np.array(picked, dtype=np.intp), rest])
+
+    def permutation(
+        self, rng: np.random.Generator, weight: Optional[str] = None, **filters
+    ) -> np.ndarray:
+        """Every movie id matching ``filters``, in random (weighted) order."""
+        candidates = self.positions(**filters)
+        if weight:
+            candidates = weighted_permutation(rng, candidates, self.weights(weight))
+        else:
+            candidates = rng.permutation(candidates)
+        return self.ids[candidates]
+
+
+class VersionedIndex:
+    """
+    Holds one process-wide index and rebuilds it when the library version
+    moved on. Checking the version is a single cache read.
+    """
+
+    def __init__(self, build):
+        self.build = build
+        self.index = None
+        self.version = None
+        self.lock = threading.Lock()
+
+    def get(self):
+        version = get_library_version()
+        with self.lock:
+            if self.index is None or self.version != version:
+                self.index = self.build()
+                self.version = version
+            return self.index
+
+    def reset(self):
+        """Drop the index so the next use rebuilds it."""
+        with self.lock:
+            self.index = None
+            self.version = None
+
+
+_movie_index = VersionedIndex(MovieIndex.build)
+
+
+def get_movie_index() -> MovieIndex:
+    """Return this process's movie index for the current library version."""
+    return _movie_index.get()
+
+
+def reset_movie_index():
+    """Drop the cached index so the next pick rebuilds it."""
+    _movie_index.reset()
+
+
+def pick_random_movies(
+    count: int, seed: Optional[int] = None, **filters
+) -> List[Movie]:
+    """Sample movies from the index and fetch only those rows, in sampled order."""
+    return movies_in_order(get_movie_index().sample(count, seed, **filters))
+
+
+def movies_in_order(movie_ids: Sequence[int]) -> List[Movie]:
+    """Fetch movies by id, keeping the order of ``movie_ids``."""
+    movies_by_id = Movie.objects.in_bulk(movie_ids)
+    return [movies_by_id[pk] for pk in movie_ids if pk in movies_by_id]
@@ -0,0 +1,162 @@
+# picker/helpers/pick_pools.py
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+from picker.helpers.movie_index import get_movie_index
+from picker.helpers.shuffle_deck import ShuffleDeck, filters_key
+from sync.models import Movie
+from utils.logger_utils import setup_logging
+
+logger = setup_logging(__name__)
+
+COMBINATIONS_KEY = "pick_pools:combinations"
+# Combinations remembered for ranking, beyond the ones that get a pool
+MAX_TRACKED_COMBINATIONS = 200
+
+
+def hits_key(key: str) -> str:
+    return f"pick_pools:hits:{key}"
+
+
+def record_filters(filters: dict):
+    """Count a random pick for ``filters`` in the cache shared by all workers."""
+    key = filters_key(filters)
+    try:
+        cache.incr(hits_key(key))
+    except ValueError:
+        cache.set(hits_key(key), 1, None)
+        combinations = cache.get(COMBINATIONS_KEY) or {}
+        if key not in combinations and len(combinations) < MAX_TRACKED_COMBINATIONS:
+            combinations[key] = filters
+            cache.set(COMBINATIONS_KEY, combinations, None)
+
+
+def top_combinations(limit: int) -> List[dict]:
+    """The ``limit`` most picked filter combinations, most popular first."""
+    combinations = cache.get(COMBINATIONS_KEY) or {}
+    hits = cache.get_many([hits_key(key) for key in combinations])
+    ranked = sorted(
+        combinations, key=lambda key: hits.get(hits_key(key), 0), reverse=True
+    )
+    return [combinations[key] for key in ranked[:limit]]
+
+
+class PickPools:
+    """
+    Hydrated movies kept in process memory for the most popular filter
+    combinations.
+
+    Each pool is a random sample of up to PICK_POOL_SIZE movies matching one
+    of the PICK_POOL_COMBINATIONS most picked combinations, fetched with all
+    their card data. Picks whose movies are in a pool are served without
+    touching the database. The pools belong to one library version; a new
+    version, or pools older than PICK_POOL_REFILL_SECONDS, trigger a refill
+    on a background thread while requests keep using the old pools or the
+    database.
+
+    A random sample only holds about PICK_POOL_SIZE out of every matching
+    movie, so the ids a shuffle deck deals are rarely in it. Dealing also
+    prefetches the movies that deck deals next into ``upcoming``, a cache
+    of at most PICK_POOL_UPCOMING_LIMIT movies that drops the oldest first.
+    """
+
+    def __init__(self):
+        self.cards: Dict[int, Movie] = {}
+        self.upcoming: "OrderedDict[int, Movie]" = OrderedDict()
+        self.index = None
+        self.refilled_at = 0.0
+        self.refilling = False
+        self.lock = threading.Lock()
+
+    def movies(self, movie_ids: Sequence[int]) -> List[Movie]:
+        """Movies for ``movie_ids`` in order, from the pools where possible."""
+        self.ensure_fresh()
+        cards = {pk: self.card(pk) for pk in movie_ids}
+        missing = [pk for pk, card in cards.items() if card is None]
+        fetched = Movie.objects.in_bulk(missing) if missing else {}
+        movies = []
+        for pk in movie_ids:
+            if cards[pk] is not None:
+                # Views adjust what they show, so never hand out the shared copy
+                movies.append(copy.copy(cards[pk]))
+            elif pk in fetched:
+                movies.append(fetched[pk])
+        return movies
+
+    def card(self, pk: int) -> Optional[Movie]:
+        card = self.cards.get(pk)
+        return self.upcoming.get(pk) if card is None else card
+
+    def prefetch(self, dealt_ids: Sequence[int], deck: ShuffleDeck):
+        """
+        Hydrate ``dealt_ids`` and the next PICK_POOL_SIZE ids of ``deck`` in
+        one query, unless the dealt movies are already in memory. Showing a
+        dealt movie then never queries the database, and dealing only does
+        once every PICK_POOL_SIZE movies.
+        """
+        self.ensure_fresh()
+        if all(self.card(pk) is not None for pk in dealt_ids):
+            return
+        wanted = [
+            pk
+            for pk in [*dealt_ids, *deck.peek(settings.PICK_POOL_SIZE)]
+            if self.card(pk) is None
+        ]
+        fetched = Movie.objects.in_bulk(wanted)
+        with self.lock:
+            upcoming = self.upcoming
+            upcoming.update(fetched)
+            while len(upcoming) > settings.PICK_POOL_UPCOMING_LIMIT:
+                upcoming.popitem(last=False)
+
+    def ensure_fresh(self):
+        # The movie index is rebuilt for every library version
+        if get_movie_index() is not self.index:
+            # Never serve cards from an older library
+            self.cards = {}
+            self.upcoming = OrderedDict()
+        elif time.monotonic() - self.refilled_at < settings.PICK_POOL_REFILL_SECONDS:
+            return
+
+        with self.lock:
+            if self.refilling:
+                return
+            self.refilling = True
+        if settings.PICK_POOL_BACKGROUND_REFILL:
+            threading.Thread(target=self.refill_in_background, daemon=True).start()
+        else:
+            self.refill()
+
+    def refill_in_background(self):
+        try:
+            self.refill()
+        finally:
+            connections.close_all()
+
+    def refill(self):
+        index = get_movie_index()
+        try:
+            movie_ids = set()
+            for filters in top_combinations(settings.PICK_POOL_COMBINATIONS):
+                movie_ids.update(index.sample(settings.PICK_POOL_SIZE, **filters))
+            self.cards = Movie.objects.in_bulk(list(movie_ids))
+            logger.debug(f"Refilled pick pools with {len(self.cards)} movies")
+        except Exception as e:
+            logger.error(f"Error refilling pick pools: {str(e)}")
+        finally:
+            # A failed refill is retried after the usual interval
+            self.index = index
+            self.refilled_at = time.monotonic()
+            with self.lock:
+                self.refilling = False
+
+
+pick_pools = PickPools()
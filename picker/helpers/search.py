@@ -0,0 +1,47 @@
+# picker/helpers/search.py
+
+import re
+from typing import List
+
+from django.db import connections
+
+from picker.helpers.trigram_index import get_trigram_index
+from utils.logger_utils import setup_logging
+
+logger = setup_logging(__name__)
+
+# Ranked matches returned per model; deeper pages are not worth ranking
+SEARCH_RESULT_LIMIT = 1000
+
+TERM_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def search_terms(query: str) -> List[str]:
+    """Split a user query into plain word terms; punctuation is dropped."""
+    return TERM_PATTERN.findall(query.lower())
+
+
+def fuzzy_search_ids(model, query: str, limit: int = SEARCH_RESULT_LIMIT) -> List[int]:
+    """
+    Ids of ``model`` rows whose title is similar to ``query``, most similar
+    first, so misspelled titles still find something.
+
+    Meant for when the unified search finds nothing. PostgreSQL uses pg_trgm
+    and the title GIN index created by the 0011_title_trigram_index
+    migration; other databases use the in-process trigram index.
+    """
+    if not search_terms(query):
+        return []
+    connection = connections[model.objects.db]
+    if connection.vendor != "postgresql":
+        return get_trigram_index(model).search(query, limit)
+
+    table = model._meta.db_table
+    # %% is pg_trgm's similarity operator, escaped for the driver
+    sql = (
+        f"SELECT id FROM {table} WHERE title %% %s "
+        f"ORDER BY similarity(title, %s) DESC, id LIMIT %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [query, query, limit])
+        return [row[0] for row in cursor.fetchall()]
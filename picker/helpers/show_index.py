@@ -0,0 +1,236 @@
+# picker/helpers/show_index.py
+
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from picker.helpers.movie_index import SortedColumn, VersionedIndex, float_column
+from sync.models import Episode, Show
+from utils.logger_utils import setup_logging
+
+logger = setup_logging(__name__)
+
+
+def sample_ids(ids: np.ndarray, mask: np.ndarray, count: int, seed=None) -> List[int]:
+    """Pick up to ``count`` distinct ids where ``mask`` is set."""
+    candidates = ids[mask]
+    count = min(count, len(candidates))
+    if not count:
+        return []
+    rng = np.random.default_rng(seed)
+    return [int(pk) for pk in rng.choice(candidates, count, replace=False)]
+
+
+class ShowIndex:
+    """
+    In-memory filter index over all shows, laid out like MovieIndex: a dense
+    array of ids with a boolean mask per genre and sorted year and duration
+    columns. Filters return a mask over the array, which EpisodeIndex uses to
+    select episodes by show.
+    """
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        genre_show_ids: Dict[str, Sequence[int]],
+        years,
+        durations,
+        watched_episode_show_ids: Sequence[int] = (),
+    ):
+        self.ids = ids
+        self.size = len(ids)
+        self.genre_masks = {
+            name: self.mask_for(np.searchsorted(ids, show_ids))
+            for name, show_ids in genre_show_ids.items()
+        }
+        self.years = SortedColumn(years)
+        self.durations = SortedColumn(durations)
+        # Show.view_count is not synced, so count watched episodes per show
+        watched = np.bincount(
+            np.searchsorted(ids, np.asarray(watched_episode_show_ids, dtype=np.int64)),
+            minlength=self.size,
+        )
+        self.unwatched = watched[: self.size] == 0
+
+    @classmethod
+    def build(cls) -> "ShowIndex":
+        started = time.monotonic()
+        rows = list(Show.objects.order_by("id").values_list("id", "year", "duration"))
+        columns = list(zip(*rows)) or [()] * 3
+
+        genre_show_ids: Dict[str, List[int]] = {}
+        for show_id, name in Show.genres.through.objects.values_list(
+            "show_id", "genre__name"
+        ):
+            genre_show_ids.setdefault(name, []).append(show_id)
+
+        index = cls(
+            np.array(columns[0], dtype=np.int64),
+            genre_show_ids,
+            float_column(columns[1]),
+            float_column(columns[2]),
+            list(
+                Episode.objects.filter(view_count__gt=0).values_list(
+                    "show_id", flat=True
+                )
+            ),
+        )
+        logger.info(
+            f"Built show index with {index.size} shows in "
+            f"{(time.monotonic() - started) * 1000:.1f} ms"
+        )
+        return index
+
+    def mask_for(self, positions: np.ndarray) -> np.ndarray:
+        mask = np.zeros(self.size, dtype=bool)
+        mask[positions] = True
+        return mask
+
+    def mask(
+        self,
+        genres: Sequence[str] = (),
+        unwatched: bool = False,
+        min_year: Optional[int] = None,
+        max_year: Optional[int] = None,
+        max_duration: Optional[float] = None,
+    ) -> np.ndarray:
+        """
+        Shows that have every genre in ``genres``, have no watched episodes
+        if ``unwatched`` is set and fall within the bounds (milliseconds for
+        ``max_duration``).
+        """
+        mask = np.ones(self.size, dtype=bool)
+        for genre in genres:
+            genre_mask = self.genre_masks.get(genre)
+            if genre_mask is None:
+                return np.zeros(self.size, dtype=bool)
+            mask &= genre_mask
+        if unwatched:
+            mask &= self.unwatched
+        if min_year is not None or max_year is not None:
+            low = -np.inf if min_year is None else min_year
+            high = np.inf if max_year is None else max_year
+            mask &= self.mask_for(self.years.positions(low, high))
+        if max_duration is not None:
+            mask &= self.mask_for(self.durations.positions(high=max_duration))
+        return mask
+
+    def sample(self, count: int, seed: Optional[int] = None, **filters) -> List[int]:
+        return sample_ids(self.ids, self.mask(**filters), count, seed)
+
+
+class EpisodeIndex:
+    """
+    In-memory filter index over all episodes. Each episode stores the
+    position of its show in the ShowIndex, so show filters such as genre
+    become one gather from the show mask instead of a join, and the episode
+    filters are vectorized comparisons over flat arrays.
+    """
+
+    def __init__(
+        self,
+        shows: ShowIndex,
+        ids: np.ndarray,
+        show_ids: np.ndarray,
+        seasons,
+        durations,
+        view_counts,
+    ):
+        self.shows = shows
+        self.ids = ids
+        self.size = len(ids)
+        self.show_positions = np.searchsorted(shows.ids, show_ids)
+        self.seasons = seasons
+        self.durations = durations
+        # Positions by duration, for time budget pools
+        self.duration_order = np.argsort(durations, kind="stable")
+        self.unwatched = view_counts == 0
+
+    @classmethod
+    def build(cls) -> "EpisodeIndex":
+        started = time.monotonic()
+        rows = list(
+            Episode.objects.order_by("id").values_list(
+                "id", "show_id", "season_number", "duration", "view_count"
+            )
+        )
+        columns = list(zip(*rows)) or [()] * 5
+        index = cls(
+            get_show_index(),
+            np.array(columns[0], dtype=np.int64),
+            np.array(columns[1], dtype=np.int64),
+            float_column(columns[2]),
+            float_column(columns[3]),
+            float_column(columns[4]),
+        )
+        logger.info(
+            f"Built episode index with {index.size} episodes in "
+            f"{(time.monotonic() - started) * 1000:.1f} ms"
+        )
+        return index
+
+    def mask(
+        self,
+        genres: Sequence[str] = (),
+        unwatched: bool = False,
+        unwatched_show: bool = False,
+        show_id: Optional[int] = None,
+        season: Optional[int] = None,
+        max_duration: Optional[float] = None,
+    ) -> np.ndarray:
+        """
+        Episodes of shows with every genre in ``genres`` (and no watched
+        episodes if ``unwatched_show`` is set), optionally limited to one show
+        and season, to unwatched episodes and to ``max_duration`` milliseconds.
+        """
+        show_mask = self.shows.mask(genres=genres, unwatched=unwatched_show)
+        if show_id is not None:
+            show_mask &= self.shows.ids == show_id
+        mask = show_mask[self.show_positions]
+        if unwatched:
+            mask &= self.unwatched
+        if season is not None:
+            mask &= self.seasons == season
+        if max_duration is not None:
+            mask &= self.durations <= max_duration
+        return mask
+
+    def sample(self, count: int, seed: Optional[int] = None, **filters) -> List[int]:
+        return sample_ids(self.ids, self.mask(**filters), count, seed)
+
+
+_show_index = VersionedIndex(ShowIndex.build)
+_episode_index = VersionedIndex(EpisodeIndex.build)
+
+
+def get_show_index() -> ShowIndex:
+    """Return this process's show index for the current library version."""
+    return _show_index.get()
+
+
+def get_episode_index() -> EpisodeIndex:
+    # Building it fetches the show index for the same library version
+    return _episode_index.get()
+
+
+def reset_show_indexes():
+    """Drop the cached indexes so the next pick rebuilds them."""
+    _episode_index.reset()
+    _show_index.reset()
+
+
+def pick_random_shows(count: int, seed: Optional[int] = None, **filters) -> List[Show]:
+    """Sample shows from the index and fetch only those rows, in sampled order."""
+    show_ids = get_show_index().sample(count, seed, **filters)
+    shows_by_id = Show.objects.in_bulk(show_ids)
+    return [shows_by_id[pk] for pk in show_ids if pk in shows_by_id]
+
+
+def pick_random_episodes(
+    count: int, seed: Optional[int] = None, **filters
+) -> List[Episode]:
+    """Sample episodes from the index and fetch only those rows with their show."""
+    episode_ids = get_episode_index().sample(count, seed, **filters)
+    episodes_by_id = Episode.objects.select_related("show").in_bulk(episode_ids)
+    return [episodes_by_id[pk] for pk in episode_ids if pk in episodes_by_id]
@@ -0,0 +1,122 @@
+# picker/helpers/shuffle_deck.py
+
+import hashlib
+import json
+from typing import List, Optional
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from picker.helpers.movie_index import get_movie_index, movies_in_order
+from sync.helpers.library_version import get_library_version
+from sync.models import Movie
+from utils.logger_utils import setup_logging
+
+logger = setup_logging(__name__)
+
+
+def filters_key(filters: dict) -> str:
+    """A short stable key for a filter combination, ignoring genre order."""
+    normalized = dict(filters)
+    normalized["genres"] = sorted(set(normalized.get("genres") or ()))
+    data = json.dumps(normalized, sort_keys=True, default=str)
+    return hashlib.sha1(data.encode()).hexdigest()[:16]
+
+
+class ShuffleDeck:
+    """
+    A shuffled deck of the movies matching one filter combination for one
+    session, so repeated picks go through every match before repeating.
+
+    The deck is a random permutation of the matching ids stored in the cache
+    as packed integers, next to a position counter. Drawing bumps the counter
+    and slices the deck. The deck key includes the library version, so a sync
+    starts a fresh deck; when a deck runs out it is reshuffled with the last
+    cards of the old deck moved to the back.
+    """
+
+    def __init__(self, session_key: str, filters: dict, version: Optional[int] = None):
+        self.filters = filters
+        if version is None:
+            version = get_library_version()
+        base = f"shuffle_deck:{session_key}:{filters_key(filters)}:{version}"
+        self.deck_key = f"{base}:ids"
+        self.position_key = f"{base}:position"
+
+    def draw(self, count: int) -> List[int]:
+        """Return the next ``count`` ids, or every match if there are fewer."""
+        ids = self.load()
+        if ids is None:
+            ids = self.shuffle()
+            self.store(ids, 0)
+        count = min(count, len(ids))
+        if not count:
+            return []
+
+        try:
+            end = cache.incr(self.position_key, count)
+        except ValueError:
+            # The position expired or was culled before the deck
+            end = count
+            cache.set(self.position_key, end, settings.LIBRARY_CACHE_TIMEOUT)
+        start = end - count
+        drawn = ids[start:end].tolist()
+
+        if end > len(ids):
+            # Keep the end of the old deck, just shown, away from the new top
+            ids = self.shuffle(avoid=ids[-count:])
+            needed = count - len(drawn)
+            drawn += ids[:needed].tolist()
+            self.store(ids, needed)
+            logger.debug(f"Reshuffled deck {self.deck_key}")
+        return drawn
+
+    def peek(self, count: int) -> List[int]:
+        """The next ``count`` ids the deck will deal, without drawing them."""
+        ids = self.load()
+        if ids is None:
+            return []
+        position = cache.get(self.position_key) or 0
+        return ids[position : position + count].tolist()
+
+    def shuffle(self, avoid=()) -> np.ndarray:
+        ids = get_movie_index().permutation(np.random.default_rng(), **self.filters)
+        if len(avoid):
+            recent = np.isin(ids, avoid)
+            ids = np.concatenate([ids[~recent], ids[recent]])
+        return ids
+
+    def load(self) -> Optional[np.ndarray]:
+        deck = cache.get(self.deck_key)
+        if deck is None:
+            return None
+        dtype, data = deck
+        return np.frombuffer(data, dtype=dtype)
+
+    def store(self, ids: np.ndarray, position: int):
+        dtype = np.uint32 if not len(ids) or ids.max() < 2**32 else np.int64
+        cache.set_many(
+            {
+                self.deck_key: (np.dtype(dtype).str, ids.astype(dtype).tobytes()),
+                self.position_key: position,
+            },
+            settings.LIBRARY_CACHE_TIMEOUT,
+        )
+
+
+def session_deck(session, filters: dict) -> ShuffleDeck:
+    """The session's shuffle deck for ``filters``."""
+    if session.session_key is None:
+        session.save()
+    return ShuffleDeck(session.session_key, filters)
+
+
+def deal_random_movie_ids(session, count: int, **filters) -> List[int]:
+    """Draw movie ids from the session's shuffle deck for ``filters``."""
+    return session_deck(session, filters).draw(count)
+
+
+def deal_random_movies(session, count: int, **filters) -> List[Movie]:
+    """Draw movies from the session's shuffle deck for ``filters``."""
+    return movies_in_order(deal_random_movie_ids(session, count, **filters))
@@ -0,0 +1,125 @@
+# picker/helpers/suggest_index.py
+
+import re
+import time
+import unicodedata
+from bisect import bisect_left
+from typing import List, NamedTuple, Optional
+from urllib.parse import urlencode
+
+from django.urls import reverse
+
+from picker.helpers.movie_index import VersionedIndex
+from sync.models import Genre, Movie, Person, Show
+from utils.logger_utils import setup_logging
+
+logger = setup_logging(__name__)
+
+# Underscores and everything that is not a letter or digit in any script
+NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize(text: str) -> str:
+    """Casefolded words separated by single spaces, accents and punctuation removed."""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return NON_WORD.sub(" ", stripped.casefold()).strip()
+
+
+class Suggestion(NamedTuple):
+    type: str
+    label: str
+    url: Optional[str]
+
+
+class SuggestIndex:
+    """
+    Sorted arrays of normalized names for typeahead suggestions.
+
+    Every movie, show, person and genre is indexed under its full name and
+    again under each later word, so "matrix" finds "The Matrix". A lookup is
+    a binary search for the prefix followed by a short forward scan; full
+    name matches come before word matches.
+    """
+
+    def __init__(self, suggestions: List[Suggestion], names: List[str]):
+        self.suggestions = suggestions
+        full, words = [], []
+        for position, name in enumerate(names):
+            full.append((name, position))
+            starts = [match.end() for match in re.finditer(" ", name)]
+            words.extend((name[start:], position) for start in starts)
+        full.sort()
+        words.sort()
+        self.full_keys = [key for key, _ in full]
+        self.full_positions = [position for _, position in full]
+        self.word_keys = [key for key, _ in words]
+        self.word_positions = [position for _, position in words]
+
+    @classmethod
+    def build(cls) -> "SuggestIndex":
+        started = time.monotonic()
+        suggestions, names = [], []
+
+        def add(kind, name, label, url):
+            key = normalize(name)
+            if key:
+                suggestions.append(Suggestion(kind, label, url))
+                names.append(key)
+
+        movie_url = reverse("movie_detail", args=[0]).replace("/0/", "/{}/")
+        for pk, title, year in Movie.objects.values_list("id", "title", "year"):
+            label = f"{title} ({year})" if year else title
+            add("movie", title, label, movie_url.format(pk))
+        show_url = reverse("show_detail", args=[0]).replace("/0/", "/{}/")
+        for pk, title, year in Show.objects.values_list("id", "title", "year"):
+            label = f"{title} ({year})" if year else title
+            add("show", title, label, show_url.format(pk))
+
+        # People have no page of their own; picking one fills the search box
+        for first_name, last_name in Person.objects.values_list(
+            "first_name", "last_name"
+        ):
+            name = f"{first_name} {last_name}".strip()
+            add("person", name, name, None)
+        random_url = reverse("random_movie")
+        for name in Genre.objects.values_list("name", flat=True):
+            add("genre", name, name, f"{random_url}?{urlencode({'genre': name})}")
+
+        index = cls(suggestions, names)
+        logger.info(
+            f"Built suggest index with {len(suggestions)} names in "
+            f"{(time.monotonic() - started) * 1000:.1f} ms"
+        )
+        return index
+
+    def suggest(self, query: str, limit: int = 8) -> List[Suggestion]:
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        found, seen = [], set()
+        for keys, positions in (
+            (self.full_keys, self.full_positions),
+            (self.word_keys, self.word_positions),
+        ):
+            start = bisect_left(keys, prefix)
+            for i in range(start, len(keys)):
+                if len(found) >= limit or not keys[i].startswith(prefix):
+                    break
+                if positions[i] not in seen:
+                    seen.add(positions[i])
+                    found.append(self.suggestions[positions[i]])
+        return found
+
+
+_suggest_index = VersionedIndex(SuggestIndex.build)
+
+
+def get_suggest_index() -> SuggestIndex:
+    """Return this process's suggest index for the current library version."""
+    return _suggest_index.get()
+
+
+def reset_suggest_index():
+    """Drop the cached index so the next lookup rebuilds it."""
+    _suggest_index.reset()
@@ -0,0 +1,186 @@
+# picker/helpers/time_budget.py
+
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from picker.helpers.movie_index import get_movie_index
+from picker.helpers.show_index import get_episode_index
+from sync.models import Episode, Movie
+from utils.logger_utils import setup_logging
+
+logger = setup_logging(__name__)
+
+MOVIE, EPISODE = 0, 1
+# Randomized fills tried per request; the fullest one wins
+FILL_ATTEMPTS = 8
+# Random probes for an unused item before scanning for one
+PROBES = 8
+# Upper bound on items in an open-ended fill
+MAX_ITEMS = 20
+
+
+class DurationPool:
+    """
+    Candidate movies and episodes sorted by duration, with prefix sums.
+
+    Everything that still fits the remaining time is a prefix of the sorted
+    array, found with one binary search, and the prefix sums give the room
+    the shortest items still to be picked need. A fill repeatedly picks a
+    random item from the prefix that leaves that room, so each step costs a
+    binary search and a few random probes whatever the size of the pool.
+    """
+
+    def __init__(
+        self,
+        kinds: np.ndarray,
+        ids: np.ndarray,
+        durations: np.ndarray,
+        presorted: bool = False,
+    ):
+        # Items without a duration cannot be budgeted
+        usable = durations > 0
+        kinds, ids, durations = kinds[usable], ids[usable], durations[usable]
+        if not presorted:
+            order = np.argsort(durations, kind="stable")
+            kinds, ids, durations = kinds[order], ids[order], durations[order]
+        self.kinds = kinds
+        self.ids = ids
+        self.durations = durations
+        self.shortest = np.concatenate([[0.0], np.cumsum(self.durations)])
+
+    def __len__(self):
+        return len(self.ids)
+
+    def fill(self, rng, budget: float, count: Optional[int] = None) -> List[int]:
+        """Pick pool positions whose durations add up to at most ``budget``."""
+        target = min(count or MAX_ITEMS, len(self))
+        picked: List[int] = []
+        used = set()
+        remaining = budget
+        while len(picked) < target:
+            # Leave room for the shortest items a fixed count still needs
+            still_needed = target - len(picked) - 1 if count else 0
+            limit = int(
+                np.searchsorted(
+                    self.durations,
+                    remaining - self.shortest[still_needed],
+                    side="right",
+                )
+            )
+            position = self.unused_below(rng, limit, used)
+            if position is None:
+                break
+            picked.append(position)
+            used.add(position)
+            remaining -= self.durations[position]
+        return picked
+
+    def unused_below(self, rng, limit, used):
+        if limit <= 0:
+            return None
+        for _ in range(PROBES):
+            position = int(rng.integers(limit))
+            if position not in used:
+                return position
+        unused = [position for position in range(limit) if position not in used]
+        return int(rng.choice(unused)) if unused else None
+
+    def best_fill(self, rng, budget: float, count: Optional[int] = None) -> List[int]:
+        """The fullest of FILL_ATTEMPTS random fills, preferring ``count`` items."""
+        best, best_key = [], (False, 0.0)
+        for _ in range(FILL_ATTEMPTS):
+            picked = self.fill(rng, budget, count)
+            key = (
+                count is None or len(picked) == count,
+                float(self.durations[picked].sum()) if picked else 0.0,
+            )
+            if key > best_key:
+                best, best_key = picked, key
+        return best
+
+
+def merge_order(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    """
+    Positions in ``first`` followed by ``second`` that visit both sorted
+    arrays in merged order, with ties taken from ``first``. Each item's place
+    is a binary search into the other array, so nothing is sorted again.
+    """
+    order = np.empty(len(first) + len(second), dtype=np.int64)
+    order[np.searchsorted(second, first, side="left") + np.arange(len(first))] = (
+        np.arange(len(first))
+    )
+    order[np.searchsorted(first, second, side="right") + np.arange(len(second))] = (
+        np.arange(len(first), len(first) + len(second))
+    )
+    return order
+
+
+def build_pool(
+    media: Sequence[str] = ("movies", "episodes"),
+    genres: Sequence[str] = (),
+    unwatched: bool = False,
+) -> DurationPool:
+    """
+    The matching movies and episodes as a DurationPool. Both indexes keep
+    their items sorted by duration for each library version, so the filters
+    only pick items out of that order and the two lists are merged.
+    """
+    kinds, ids, durations = [], [], []
+    if "movies" in media:
+        movies = get_movie_index()
+        mask = np.zeros(movies.size, dtype=bool)
+        mask[movies.positions(genres=genres, unwatched=unwatched)] = True
+        order = movies.durations.order
+        positions = order[mask[order]]
+        kinds.append(np.full(len(positions), MOVIE))
+        ids.append(movies.ids[positions])
+        durations.append(movies.durations.values[positions])
+    if "episodes" in media:
+        episodes = get_episode_index()
+        order = episodes.duration_order
+        positions = order[episodes.mask(genres=genres, unwatched=unwatched)[order]]
+        kinds.append(np.full(len(positions), EPISODE))
+        ids.append(episodes.ids[positions])
+        durations.append(episodes.durations[positions])
+    if not ids:
+        return DurationPool(np.zeros(0, int), np.zeros(0, int), np.zeros(0))
+    if len(ids) == 1:
+        return DurationPool(kinds[0], ids[0], durations[0], presorted=True)
+    # NaN (a missing duration) sorts last in both lists and in the merge
+    order = merge_order(*durations)
+    return DurationPool(
+        np.concatenate(kinds)[order],
+        np.concatenate(ids)[order],
+        np.concatenate(durations)[order],
+        presorted=True,
+    )
+
+
+def pick_for_time_budget(
+    budget_ms: float,
+    count: Optional[int] = None,
+    media: Sequence[str] = ("movies", "episodes"),
+    genres: Sequence[str] = (),
+    unwatched: bool = False,
+    seed: Optional[int] = None,
+) -> list:
+    """
+    A random combination of movies and/or episodes whose total duration fits
+    ``budget_ms``: exactly ``count`` items when given and possible, otherwise
+    as much of the budget as the random fills manage to use.
+    """
+    pool = build_pool(media, genres, unwatched)
+    picked = pool.best_fill(np.random.default_rng(seed), budget_ms, count)
+    kinds, ids = pool.kinds[picked], pool.ids[picked]
+
+    movies = Movie.objects.in_bulk(ids[kinds == MOVIE].tolist())
+    episodes = Episode.objects.select_related("show").in_bulk(
+        ids[kinds == EPISODE].tolist()
+    )
+    items = []
+    for kind, pk in zip(kinds.tolist(), ids.tolist()):
+        item = (movies if kind == MOVIE else episodes).get(pk)
+        if item is not None:
+            items.append(item)
+    return items
@@ -0,0 +1,96 @@
+# picker/helpers/trigram_index.py
+
+import time
+from typing import Dict, List, Set
+
+import numpy as np
+
+from picker.helpers.movie_index import VersionedIndex
+from picker.helpers.suggest_index import normalize
+from sync.models import Movie, Show
+from utils.logger_utils import setup_logging
+
+logger = setup_logging(__name__)
+
+# Same default as pg_trgm's similarity_threshold
+SIMILARITY_THRESHOLD = 0.3
+
+
+def trigrams(text: str) -> Set[str]:
+    """Trigrams of each word padded like pg_trgm: two spaces before, one after."""
+    grams = set()
+    for word in normalize(text).split():
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex:
+    """
+    An inverted index from title trigrams to positions in an id array.
+
+    A query only reads the posting lists of its own trigrams, counts how many
+    each title shares and scores them like pg_trgm's similarity(): shared
+    trigrams over the size of the union of both sets.
+    """
+
+    def __init__(self, ids: np.ndarray, titles: List[str]):
+        self.ids = ids
+        self.sizes = np.zeros(len(ids), dtype=np.int32)
+        postings: Dict[str, List[int]] = {}
+        for position, title in enumerate(titles):
+            grams = trigrams(title)
+            self.sizes[position] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(position)
+        self.postings = {
+            gram: np.array(positions, dtype=np.int32)
+            for gram, positions in postings.items()
+        }
+
+    @classmethod
+    def build_for(cls, model) -> "TrigramIndex":
+        started = time.monotonic()
+        rows = list(model.objects.order_by("id").values_list("id", "title"))
+        index = cls(
+            np.array([pk for pk, _ in rows], dtype=np.int64),
+            [title for _, title in rows],
+        )
+        logger.info(
+            f"Built {model._meta.verbose_name} trigram index with "
+            f"{len(index.postings)} trigrams in "
+            f"{(time.monotonic() - started) * 1000:.1f} ms"
+        )
+        return index
+
+    def search(
+        self, query: str, limit: int, threshold: float = SIMILARITY_THRESHOLD
+    ) -> List[int]:
+        """Ids of titles similar to ``query``, most similar first."""
+        grams = trigrams(query)
+        lists = [self.postings[gram] for gram in grams if gram in self.postings]
+        if not lists:
+            return []
+        positions, shared = np.unique(np.concatenate(lists), return_counts=True)
+        similarity = shared / (len(grams) + self.sizes[positions] - shared)
+        matches = similarity >= threshold
+        positions, similarity = positions[matches], similarity[matches]
+        best = np.argsort(-similarity, kind="stable")[:limit]
+        return [int(pk) for pk in self.ids[positions[best]]]
+
+
+_trigram_indexes = {
+    Movie: VersionedIndex(lambda: TrigramIndex.build_for(Movie)),
+    Show: VersionedIndex(lambda: TrigramIndex.build_for(Show)),
+}
+
+
+def get_trigram_index(model) -> TrigramIndex:
+    """Return this process's title trigram index for ``model``."""
+    return _trigram_indexes[model].get()
+
+
+def reset_trigram_indexes():
+    """Drop the cached indexes so the next search rebuilds them."""
+    for index in _trigram_indexes.values():
+        index.reset()
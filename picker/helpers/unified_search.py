@@ -0,0 +1,329 @@
+# picker/helpers/unified_search.py
+
+import sys
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional
+from urllib.parse import urlencode
+
+import numpy as np
+from django.conf import settings
+from django.urls import reverse
+
+from picker.helpers.movie_index import VersionedIndex
+from picker.helpers.search import SEARCH_RESULT_LIMIT
+from picker.helpers.suggest_index import normalize
+from sync.models import Episode, Genre, Movie, Person, Role, Show
+from utils.logger_utils import setup_logging
+
+logger = setup_logging(__name__)
+
+# Result groups, in the order they are shown
+RESULT_TYPES = ("movie", "show", "episode", "person", "genre")
+
+# What a term is worth in each field; a document scores a term's best field
+FIELD_WEIGHTS = {
+    "title": 10.0,
+    "name": 10.0,
+    "tagline": 3.0,
+    "people": 2.0,
+    "summary": 1.0,
+}
+# Multiplier for documents whose title or name starts with the whole query
+PREFIX_BOOST = 2.0
+
+
+class SearchHit(NamedTuple):
+    type: str
+    pk: int
+    label: str
+    url: Optional[str]
+    score: float
+
+
+class UnifiedSearchIndex:
+    """
+    One inverted index over movies, shows, episodes, people and genres.
+
+    Each document is a set of weighted fields: titles, names, taglines,
+    summaries and, for movies and shows, the names of everyone credited
+    through a Role. Posting lists are stored as flat arrays with one
+    ``offsets`` slice per term. A query reads only the lists of its own terms
+    (the last one as a prefix), keeps the documents that match every term and
+    ranks all types with the same function: the sum over terms of the term's
+    idf times its best field weight, boosted when the title starts with the
+    query. Episodes are indexed by title only, to keep the index small.
+
+    Every web process holds its own copy. It costs roughly 200 bytes per
+    document for the label, URL and title key, plus 8 bytes for each
+    distinct word of a document; cast names count once per title they are
+    credited in. Episodes are usually most of the documents, so large libraries can
+    leave them out with SEARCH_INDEX_EPISODES. The size is logged on build.
+    The index is built by the first search after a library version bump,
+    and a sync run bumps the version once.
+    """
+
+    def __init__(self):
+        self.types: List[int] = []
+        self.pks: List[int] = []
+        self.labels: List[str] = []
+        self.urls: List[Optional[str]] = []
+        self.keys: List[str] = []
+        self._postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+
+    def add(self, kind: str, pk: int, label: str, url: Optional[str], **fields):
+        """Index one document; ``fields`` maps FIELD_WEIGHTS names to text."""
+        doc = len(self.pks)
+        self.types.append(RESULT_TYPES.index(kind))
+        self.pks.append(pk)
+        self.labels.append(label)
+        self.urls.append(url)
+        self.keys.append(normalize(fields.get("title") or fields.get("name")))
+        for field, text in fields.items():
+            weight = FIELD_WEIGHTS[field]
+            for term in normalize(text).split():
+                if weight > self._postings[term].get(doc, 0.0):
+                    self._postings[term][doc] = weight
+
+    def finish(self) -> "UnifiedSearchIndex":
+        """Pack the posting lists into arrays once every document is added."""
+        self.vocabulary = sorted(self._postings)
+        self.term_ids = {term: i for i, term in enumerate(self.vocabulary)}
+        lengths = [len(self._postings[term]) for term in self.vocabulary]
+        self.offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=self.offsets[1:])
+        self.docs = np.fromiter(
+            (doc for term in self.vocabulary for doc in self._postings[term]),
+            dtype=np.int32,
+            count=int(self.offsets[-1]),
+        )
+        self.weights = np.fromiter(
+            (w for term in self.vocabulary for w in self._postings[term].values()),
+            dtype=np.float32,
+            count=int(self.offsets[-1]),
+        )
+        self.idf = np.log1p(len(self.pks) / np.maximum(lengths, 1)).astype(np.float32)
+        self.type_codes = np.array(self.types, dtype=np.int8)
+        self.pks = np.array(self.pks, dtype=np.int64)
+        del self._postings, self.types
+        return self
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the index; shared URLs count once."""
+        arrays = (
+            self.pks,
+            self.offsets,
+            self.docs,
+            self.weights,
+            self.idf,
+            self.type_codes,
+        )
+        urls = {id(url): url for url in self.urls if url is not None}
+        strings = [*self.labels, *self.keys, *self.vocabulary, *urls.values()]
+        pointers = len(self.labels) + len(self.keys) + len(self.urls)
+        return (
+            sum(array.nbytes for array in arrays)
+            + sum(map(sys.getsizeof, strings))
+            + 8 * pointers
+        )
+
+    @classmethod
+    def build(cls) -> "UnifiedSearchIndex":
+        started = time.monotonic()
+        index = cls()
+
+        names = {
+            pk: f"{first_name} {last_name}".strip()
+            for pk, first_name, last_name in Person.objects.values_list(
+                "id", "first_name", "last_name"
+            )
+        }
+        credits = defaultdict(set)
+        people = defaultdict(list)
+        for person_id, movie_id, show_id in Role.objects.filter(
+            episode__isnull=True
+        ).values_list("person_id", "movie_id", "show_id"):
+            key = ("movie", movie_id) if movie_id else ("show", show_id)
+            if key not in credits[person_id]:
+                credits[person_id].add(key)
+                people[key].append(names.get(person_id, ""))
+
+        movie_url = reverse("movie_detail", args=[0]).replace("/0/", "/{}/")
+        for (
+            pk,
+            title,
+            original_title,
+            year,
+            tagline,
+            summary,
+        ) in Movie.objects.values_list(
+            "id", "title", "original_title", "year", "tagline", "summary"
+        ).iterator():
+            index.add(
+                "movie",
+                pk,
+                f"{title} ({year})" if year else title,
+                movie_url.format(pk),
+                title=f"{title} {original_title or ''}",
+                tagline=tagline or "",
+                people=" ".join(people[("movie", pk)]),
+                summary=summary or "",
+            )
+
+        show_url = reverse("show_detail", args=[0]).replace("/0/", "/{}/")
+        for pk, title, year, tagline, summary in Show.objects.values_list(
+            "id", "title", "year", "tagline", "summary"
+        ).iterator():
+            index.add(
+                "show",
+                pk,
+                f"{title} ({year})" if year else title,
+                show_url.format(pk),
+                title=title,
+                tagline=tagline or "",
+                people=" ".join(people[("show", pk)]),
+                summary=summary or "",
+            )
+
+        # Episodes have no page of their own; they share their show's URL
+        show_urls = {}
+        episodes = Episode.objects.values_list(
+            "id",
+            "title",
+            "season_number",
+            "episode_number",
+            "show_id",
+            "show__title",
+        )
+        if not settings.SEARCH_INDEX_EPISODES:
+            episodes = episodes.none()
+        for pk, title, season, episode, show_id, show_title in episodes.iterator():
+            label = f"{show_title} S{season:02}E{episode:02}: {title}"
+            url = show_urls.setdefault(show_id, show_url.format(show_id))
+            index.add("episode", pk, label, url, title=title)
+
+        # Searching for a person lists the titles they are credited in
+        search_url = reverse("plex_content")
+        for pk, name in names.items():
+            if not name:
+                continue
+            count = len(credits[pk])
+            label = f"{name} ({count} title{'s' if count != 1 else ''})"
+            url = f"{search_url}?{urlencode({'query': name})}"
+            index.add("person", pk, label, url, name=name)
+
+        random_url = reverse("random_movie")
+        for pk, name in Genre.objects.values_list("id", "name"):
+            url = f"{random_url}?{urlencode({'genre': name})}"
+            index.add("genre", pk, name, url, name=name)
+
+        index.finish()
+        logger.info(
+            f"Built search index with {len(index.pks)} documents and "
+            f"{len(index.vocabulary)} terms, about "
+            f"{index.nbytes() / 2**20:.1f} MiB, in "
+            f"{(time.monotonic() - started) * 1000:.1f} ms"
+        )
+        return index
+
+    def term_scores(self, term: str, prefix: bool):
+        """Documents containing ``term`` with its idf-weighted score."""
+        if prefix:
+            start = bisect_left(self.vocabulary, term)
+            # Bumping the last character gives the first string past every
+            # completion; normalize() never keeps U+10FFFF, so it can be bumped
+            end = bisect_left(
+                self.vocabulary, term[:-1] + chr(ord(term[-1]) + 1), start
+            )
+            term_ids = range(start, end)
+        else:
+            term_ids = [self.term_ids[term]] if term in self.term_ids else []
+        if not term_ids:
+            return None, None
+        docs = np.concatenate(
+            [self.docs[self.offsets[i] : self.offsets[i + 1]] for i in term_ids]
+        )
+        scores = np.concatenate(
+            [
+                self.weights[self.offsets[i] : self.offsets[i + 1]] * self.idf[i]
+                for i in term_ids
+            ]
+        )
+        # A document matching several completions of a prefix scores the best
+        order = np.argsort(docs, kind="stable")
+        docs, scores = docs[order], scores[order]
+        docs, starts = np.unique(docs, return_index=True)
+        return docs, np.maximum.reduceat(scores, starts)
+
+    def search(
+        self, query: str, limit: int = SEARCH_RESULT_LIMIT
+    ) -> Dict[str, List[SearchHit]]:
+        """
+        Hits for ``query`` grouped by type, best first, with at most
+        ``limit`` per group. Every term must match; the last also matches as
+        a prefix, so results show up while typing.
+        """
+        phrase = normalize(query)
+        terms = phrase.split()
+        if not terms or not len(self.pks):
+            return {}
+        docs = scores = None
+        for position, term in enumerate(terms):
+            term_docs, term_scores = self.term_scores(
+                term, prefix=position == len(terms) - 1
+            )
+            if term_docs is None:
+                return {}
+            if docs is None:
+                docs, scores = term_docs, term_scores
+                continue
+            docs, mine, theirs = np.intersect1d(
+                docs, term_docs, assume_unique=True, return_indices=True
+            )
+            scores = scores[mine] + term_scores[theirs]
+            if not len(docs):
+                return {}
+
+        boost = np.array([self.keys[doc].startswith(phrase) for doc in docs])
+        scores = np.where(boost, scores * PREFIX_BOOST, scores)
+        # Best score first; ties keep index order, which is by type then id
+        order = np.lexsort((docs, -scores))
+        docs, scores = docs[order], scores[order]
+
+        groups = {}
+        for code, kind in enumerate(RESULT_TYPES):
+            mask = self.type_codes[docs] == code
+            hits = [
+                SearchHit(
+                    kind,
+                    int(self.pks[doc]),
+                    self.labels[doc],
+                    self.urls[doc],
+                    float(score),
+                )
+                for doc, score in zip(docs[mask][:limit], scores[mask][:limit])
+            ]
+            if hits:
+                groups[kind] = hits
+        return groups
+
+
+_search_index = VersionedIndex(UnifiedSearchIndex.build)
+
+
+def get_search_index() -> UnifiedSearchIndex:
+    """Return this process's search index for the current library version."""
+    return _search_index.get()
+
+
+def reset_search_index():
+    """Drop the cached index so the next search rebuilds it."""
+    _search_index.reset()
+
+
+def unified_search(
+    query: str, limit: int = SEARCH_RESULT_LIMIT
+) -> Dict[str, List[SearchHit]]:
+    """Search every content type at once; see ``UnifiedSearchIndex.search``."""
+    return get_search_index().search(query, limit)
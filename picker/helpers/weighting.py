@@ -0,0 +1,79 @@
+# picker/helpers/weighting.py
+
+import numpy as np
+
+# How much more likely an unwatched movie is than a watched one
+UNWATCHED_WEIGHT = 4.0
+# A movie added this long before the newest one is half as likely
+RECENT_HALF_LIFE_DAYS = 180
+# Keeps old movies possible under the "recent" weighting
+RECENT_FLOOR = 0.05
+
+
+def unwatched_weights(index):
+    return np.where(index.view_counts > 0, 1.0, UNWATCHED_WEIGHT)
+
+
+def rating_weights(index):
+    # Audience ratings are 0-10; unrated movies weigh as much as a 0
+    return 1.0 + np.nan_to_num(index.audience_ratings, nan=0.0).clip(min=0)
+
+
+def recent_weights(index):
+    # Ages are measured from the newest movie, not from now, so the weights
+    # (and seeded picks) only change when the library does
+    added = index.added_at
+    if np.isnan(added).all():
+        return np.ones(index.size)
+    age_days = (np.nanmax(added) - added) / 86400
+    weights = 0.5 ** (age_days / RECENT_HALF_LIFE_DAYS)
+    return np.nan_to_num(weights, nan=0.0) + RECENT_FLOOR
+
+
+WEIGHTINGS = {
+    "unwatched": ("Unwatched first", unwatched_weights),
+    "rating": ("Highly rated first", rating_weights),
+    "recent": ("Recently added first", recent_weights),
+}
+
+
+class AliasTable:
+    """
+    Vose's alias method: after an O(n) setup, each weighted draw is one
+    uniform column pick and one coin flip against that column's threshold.
+    """
+
+    def __init__(self, weights: np.ndarray):
+        size = len(weights)
+        total = weights.sum()
+        if not size or total <= 0:
+            weights, total = np.ones(size), float(size)
+        scaled = weights * size / total
+        self.threshold = np.ones(size)
+        self.alias = np.arange(size)
+
+        small = [i for i in range(size) if scaled[i] < 1]
+        large = [i for i in range(size) if scaled[i] >= 1]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.threshold[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] += scaled[less] - 1
+            (small if scaled[more] < 1 else large).append(more)
+        # Whatever is left is 1 up to rounding errors and keeps threshold 1
+
+    def draw(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        columns = rng.integers(len(self.threshold), size=size)
+        keep = rng.random(size) < self.threshold[columns]
+        return np.where(keep, columns, self.alias[columns])
+
+
+def weighted_permutation(
+    rng: np.random.Generator, positions: np.ndarray, weights: np.ndarray
+) -> np.ndarray:
+    """
+    Order ``positions`` so heavier ones tend to come first: each gets the key
+    u ** (1 / weight) and the keys are sorted, largest first.
+    """
+    keys = rng.random(len(positions)) ** (1 / weights[positions])
+    return positions[np.argsort(-keys, kind="stable")]
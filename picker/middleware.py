@@ -0,0 +1,46 @@
+# picker/middleware.py
+
+from contextvars import ContextVar
+
+from django.middleware.cache import FetchFromCacheMiddleware, UpdateCacheMiddleware
+
+from sync.helpers.library_version import get_library_version
+
+_request_library_version = ContextVar("request_library_version", default=None)
+
+
+class LibraryVersionCacheMixin:
+    """
+    Scope the site-wide page cache to the library version, so every cached
+    page is invalidated as soon as a sync commits.
+
+    The version is read once per request, when the cache is checked, and
+    reused when the response is stored.
+    """
+
+    @property
+    def key_prefix(self):
+        return f"{self.base_key_prefix}library-{_request_library_version.get()}"
+
+    @key_prefix.setter
+    def key_prefix(self, value):
+        self.base_key_prefix = value
+
+
+class VersionedUpdateCacheMiddleware(LibraryVersionCacheMixin, UpdateCacheMiddleware):
+    def _should_update_cache(self, request, response):
+        version = getattr(request, "library_version", None)
+        # A page rendered while a sync committed may mix both versions
+        if version is None or version != get_library_version():
+            return False
+        _request_library_version.set(version)
+        return super()._should_update_cache(request, response)
+
+
+class VersionedFetchFromCacheMiddleware(
+    LibraryVersionCacheMixin, FetchFromCacheMiddleware
+):
+    def process_request(self, request):
+        request.library_version = get_library_version()
+        _request_library_version.set(request.library_version)
+        return super().process_request(request)
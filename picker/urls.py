@@ -6,10 +6,14 @@ from picker.views.movie_detail_view import movie_detail_view
 from picker.views.plex_content_view import plex_content_view
 from picker.views.random_movie_view import random_movie_view
 from picker.views.show_detail_view import show_detail_view
+from picker.views.suggest_view import suggest_view
+from picker.views.time_budget_view import time_budget_view
 
 urlpatterns = [
     path("", plex_content_view, name="plex_content"),
     path("random/", random_movie_view, name="random_movie"),
+    path("random/time-budget/", time_budget_view, name="time_budget"),
     path("movies/<int:movie_id>/", movie_detail_view, name="movie_detail"),
     path("shows/<int:show_id>/", show_detail_view, name="show_detail"),
+    path("api/suggest/", suggest_view, name="suggest"),
 ]
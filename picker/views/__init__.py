@@ -3,3 +3,5 @@ from .movie_detail_view import movie_detail_view
 from .plex_content_view import plex_content_view
 from .random_movie_view import random_movie_view
 from .show_detail_view import show_detail_view
+from .suggest_view import suggest_view
+from .time_budget_view import time_budget_view
@@ -1,23 +1,76 @@
 # picker/views/plex_content_view.py
 
-import json
+from typing import List, Optional
 
-from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
-from django.core.serializers import serialize
-from django.db.models import Q
 from django.http import HttpRequest, HttpResponse, JsonResponse
 from django.shortcuts import render
-from django.views.decorators.cache import never_cache
+from django.utils.cache import add_never_cache_headers
 from django.views.decorators.http import require_GET
+from django.views.decorators.vary import vary_on_headers
 
 from picker.forms.search_form import SearchForm
+from picker.helpers.fast_json import fast_json_response
+from picker.helpers.keyset import keyset_page, ranked_page
+from picker.helpers.search import fuzzy_search_ids
+from picker.helpers.unified_search import unified_search
 from sync.models import Movie, Show
 from utils.logger_utils import setup_logging
 
 logger = setup_logging(__name__)
 
 
-@never_cache
+# Columns the AJAX endpoint can return with ?fields=; pk and title always are
+PROJECTION_FIELDS = {
+    "year",
+    "duration",
+    "summary",
+    "tagline",
+    "content_rating",
+    "rotten_tomatoes_rating",
+    "audience_rating",
+    "poster_url",
+    "added_at",
+}
+DEFAULT_PROJECTION = ["year"]
+
+
+def projection(request: HttpRequest) -> List[str]:
+    """Columns requested as ``fields=year,duration``; unknown ones are ignored."""
+    requested = [
+        field.strip()
+        for field in request.GET.get("fields", "").split(",")
+        if field.strip() in PROJECTION_FIELDS
+    ]
+    return ["pk", "title", *(dict.fromkeys(requested) or DEFAULT_PROJECTION)]
+
+
+def hydrate_page(page, model, fields: Optional[List[str]] = None):
+    """
+    Replace a page of search result ids with the rows, keeping the ranking;
+    with ``fields``, with ``values()`` dicts of just those columns.
+    """
+    if fields:
+        rows = model.objects.filter(pk__in=page.object_list).values(*fields)
+        by_id = {row["pk"]: row for row in rows}
+    else:
+        by_id = model.objects.in_bulk(page.object_list)
+    page.object_list = [by_id[pk] for pk in page.object_list if pk in by_id]
+
+
+# Search result groups shown besides the movie and show lists
+OTHER_GROUPS = [("episode", "Episodes"), ("person", "People"), ("genre", "Genres")]
+
+
+def cursors(request: HttpRequest, page_type: str) -> dict:
+    """The ``after``/``before`` cursors of one list, from ``movie_after`` etc."""
+    return {
+        "after": request.GET.get(f"{page_type}_after"),
+        "before": request.GET.get(f"{page_type}_before"),
+    }
+
+
+# Cached by the site-wide, library-versioned page cache; AJAX requests get JSON
+@vary_on_headers("X-Requested-With")
 @require_GET
 def plex_content_view(request: HttpRequest) -> HttpResponse:
     try:
@@ -25,59 +78,76 @@ def plex_content_view(request: HttpRequest) -> HttpResponse:
         movies = Movie.objects.all()
         shows = Show.objects.all()
 
+        # AJAX only needs a few columns; pages rendered as HTML need the models
+        is_ajax = request.headers.get("X-Requested-With") == "XMLHttpRequest"
+        fields = projection(request) if is_ajax else None
+
+        per_page = 10
+        groups = []
         if search_form.is_valid() and search_form.cleaned_data["query"].strip():
+            # One ranked search over every content type; movies and shows
+            # with no match fall back to similar titles. Only the shown page
+            # of each group is fetched.
             query = search_form.cleaned_data["query"]
-            title_query = Q(title__icontains=query)
-            combined_query = title_query
-            movies = movies.filter(combined_query).distinct()
-            shows = shows.filter(combined_query).distinct()
-
-        movies = movies.order_by("title")
-        shows = shows.order_by("title")
-
-        movies_per_page = 10
-        shows_per_page = 10
-        movie_page_number = request.GET.get("movie_page", 1)
-        show_page_number = request.GET.get("show_page", 1)
-
-        movie_paginator = Paginator(movies, movies_per_page)
-        show_paginator = Paginator(shows, shows_per_page)
-
-        try:
-            movies_page = movie_paginator.page(movie_page_number)
-        except PageNotAnInteger:
-            movies_page = movie_paginator.page(1)
-        except EmptyPage:
-            movies_page = movie_paginator.page(movie_paginator.num_pages)
-
-        try:
-            shows_page = show_paginator.page(show_page_number)
-        except PageNotAnInteger:
-            shows_page = show_paginator.page(1)
-        except EmptyPage:
-            shows_page = show_paginator.page(show_paginator.num_pages)
-
-        is_ajax = request.headers.get("X-Requested-With") == "XMLHttpRequest"
+            hits = unified_search(query)
+            movie_ids = [hit.pk for hit in hits.get("movie", [])]
+            show_ids = [hit.pk for hit in hits.get("show", [])]
+            movies_page = ranked_page(
+                movie_ids or fuzzy_search_ids(Movie, query),
+                per_page,
+                **cursors(request, "movie"),
+            )
+            shows_page = ranked_page(
+                show_ids or fuzzy_search_ids(Show, query),
+                per_page,
+                **cursors(request, "show"),
+            )
+            hydrate_page(movies_page, Movie, fields)
+            hydrate_page(shows_page, Show, fields)
+            for kind, title in OTHER_GROUPS:
+                if kind in hits:
+                    page = ranked_page(hits[kind], per_page, **cursors(request, kind))
+                    groups.append({"type": kind, "title": title, "page": page})
+        else:
+            # Cursor pages in (title, id) order, one indexed range query each
+            movies_page = keyset_page(
+                movies, per_page, fields=fields, **cursors(request, "movie")
+            )
+            shows_page = keyset_page(
+                shows, per_page, fields=fields, **cursors(request, "show")
+            )
 
         context = {
             "movies_page": movies_page,
             "shows_page": shows_page,
             "search_form": search_form,
-            "movie_total_pages": movie_paginator.num_pages,
-            "show_total_pages": show_paginator.num_pages,
+            "groups": groups,
         }
 
         if is_ajax:
             response_data = {
-                "movies": json.loads(serialize("json", movies_page)),
-                "shows": json.loads(serialize("json", shows_page)),
-                "movie_page": movies_page.number,
-                "show_page": shows_page.number,
-                "movie_total_pages": movie_paginator.num_pages,
-                "show_total_pages": show_paginator.num_pages,
+                "movies": movies_page.object_list,
+                "shows": shows_page.object_list,
+                "movie_next": movies_page.next_cursor,
+                "movie_previous": movies_page.previous_cursor,
+                "movie_count": movies_page.count,
+                "show_next": shows_page.next_cursor,
+                "show_previous": shows_page.previous_cursor,
+                "show_count": shows_page.count,
+                "groups": [
+                    {
+                        "type": group["type"],
+                        "title": group["title"],
+                        "results": [hit._asdict() for hit in group["page"]],
+                        "next": group["page"].next_cursor,
+                        "previous": group["page"].previous_cursor,
+                        "count": group["page"].count,
+                    }
+                    for group in groups
+                ],
                 "query": search_form.data.get("query", ""),
             }
-            return JsonResponse(response_data)
+            return fast_json_response(response_data)
         else:
             return render(request, "plex_content/plex_content.html", context)
 
@@ -85,7 +155,7 @@ def plex_content_view(request: HttpRequest) -> HttpResponse:
         logger.error(f"Unexpected error: {e}")
         if request.headers.get("X-Requested-With") == "XMLHttpRequest":
             return JsonResponse({"error": str(e)}, status=500)
-        return render(
+        response = render(
             request,
             "error.html",
             {
@@ -93,3 +163,6 @@ def plex_content_view(request: HttpRequest) -> HttpResponse:
                 "error_message": "An unexpected error occurred. Please try again later.",
             },
         )
+        # Keep the error page out of the page cache
+        add_never_cache_headers(response)
+        return response
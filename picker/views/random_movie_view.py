@@ -1,19 +1,25 @@
 # picker/views/random_movie_view.py
 
-from django.db.models import Count
+from django.conf import settings
 from django.http import HttpRequest, HttpResponseRedirect, JsonResponse
 from django.shortcuts import render
 from django.template.loader import render_to_string
 from django.urls import reverse
+from django.utils.cache import add_never_cache_headers, patch_cache_control
+from django.views.decorators.vary import vary_on_headers
 
 from picker.forms import RandomMovieForm
-from picker.helpers.movie_helpers import get_random_movies
-from sync.models import Movie
+from picker.helpers.movie_index import pick_random_movies
+from picker.helpers.pick_pools import pick_pools, record_filters
+from picker.helpers.shuffle_deck import session_deck
+from picker.helpers.weighting import WEIGHTINGS
 from utils.logger_utils import setup_logging
 
 logger = setup_logging(__name__)
 
 
+# The AJAX and full page responses share a URL, so caches must tell them apart
+@vary_on_headers("X-Requested-With")
 def random_movie_view(request: HttpRequest):
     try:
         # Initialize the form with GET data; genres are fetched in the form itself
@@ -30,45 +36,42 @@ def random_movie_view(request: HttpRequest):
         selected_duration = form.data.get("max_duration", "")
         selected_min_year = form.data.get("min_year", "")
         selected_max_year = form.data.get("max_year", "")
+        selected_weight = form.data.get("weight", "")
         randomize = request.GET.get("randomize", "").lower() == "true"
         movie_ids = request.GET.get("movies", "")
+        seed = request.GET.get("seed", "")
+
+        filters = {
+            "genres": selected_genres,
+            "min_rating": int(selected_rating) if selected_rating.isdigit() else None,
+            "max_duration": (
+                int(selected_duration) * 60 * 1000
+                if selected_duration.isdigit()
+                else None
+            ),
+            "min_year": int(selected_min_year) if selected_min_year.isdigit() else None,
+            "max_year": int(selected_max_year) if selected_max_year.isdigit() else None,
+            "weight": selected_weight if selected_weight in WEIGHTINGS else None,
+        }
 
-        if randomize or not movie_ids:
-            # If randomizing or no movie IDs provided, filter and select movies
-            movies = Movie.objects.all()
-
-            if selected_genres:
-                # Filter movies that have all selected genres
-                movies = (
-                    movies.filter(genres__name__in=selected_genres)
-                    .annotate(num_genres=Count("genres"))
-                    .filter(num_genres=len(selected_genres))
-                )
-
-            # Filter by the minimum rotten tomatoes rating if specified
-            if selected_rating.isdigit():
-                movies = movies.filter(rotten_tomatoes_rating__gte=int(selected_rating))
-
-            # Filter by the maximum duration if specified
-            if selected_duration.isdigit():
-                movies = movies.filter(duration__lte=int(selected_duration) * 60 * 1000)
-
-            if selected_min_year.isdigit():
-                movies = movies.filter(year__gte=int(selected_min_year))
-
-            if selected_max_year.isdigit():
-                movies = movies.filter(year__lte=int(selected_max_year))
-
-            logger.debug(f"Number of movies after filtering: {movies.count()}")
-
-            if movies.exists():
-                selected_movies = get_random_movies(movies, count)
-                movie_ids = ",".join(str(movie.id) for movie in selected_movies)
-
-                # Limit the summary length for each selected movie
-                for movie in selected_movies:
-                    if len(movie.summary) > 100:
-                        movie.summary = movie.summary[:100] + "..."
+        if seed.isdigit():
+            # A seeded pick is repeatable for the same filters and library
+            # version, so it is rendered directly and the page can be cached
+            selected_movies = pick_random_movies(count, seed=int(seed), **filters)
+            movie_ids = ",".join(str(movie.id) for movie in selected_movies)
+            for movie in selected_movies:
+                if len(movie.summary or "") > 100:
+                    movie.summary = movie.summary[:100] + "..."
+        elif randomize or not movie_ids:
+            # If randomizing or no movie IDs provided, draw from the session's
+            # shuffle deck so movies do not repeat until every match was shown
+            record_filters(filters)
+            deck = session_deck(request.session, filters)
+            dealt_ids = deck.draw(count)
+            if dealt_ids:
+                # Hydrate these and the next movies of the deck for the redirect
+                pick_pools.prefetch(dealt_ids, deck)
+                movie_ids = ",".join(str(movie_id) for movie_id in dealt_ids)
 
                 # Redirect to the same view with selected movie IDs in the URL
                 genres_param = "&".join([f"genre={genre}" for genre in selected_genres])
@@ -76,14 +79,16 @@ def random_movie_view(request: HttpRequest):
                     f"{reverse('random_movie')}?{genres_param}&count={count}&movies={movie_ids}"
                     f"&min_rotten_tomatoes_rating={selected_rating}&max_duration={selected_duration}"
                     f"&min_year={selected_min_year}&max_year={selected_max_year}"
+                    f"&weight={selected_weight}"
                 )
             else:
                 logger.warning("No movies found matching the criteria")
                 selected_movies = []
         else:
-            # If movie IDs are provided, retrieve movies from those IDs
+            # If movie IDs are provided, retrieve movies from those IDs, served
+            # from the pick pools when they hold them
             movie_id_list = [int(id) for id in movie_ids.split(",") if id.isdigit()]
-            selected_movies = list(Movie.objects.filter(id__in=movie_id_list))
+            selected_movies = pick_pools.movies(movie_id_list)
 
             # Limit the summary length for each selected movie
             for movie in selected_movies:
@@ -99,25 +104,37 @@ def random_movie_view(request: HttpRequest):
             html = render_to_string(
                 "partials/_movie_list.html", {"movies": selected_movies}
             )
-            return JsonResponse({"html": html})
-
-        # Prepare the context for rendering the template
-        context = {
-            "form": form,
-            "movies": selected_movies,
-            "selected_genres": selected_genres,
-            "count": count,
-            "movie_ids": movie_ids,
-            "min_rotten_tomatoes_rating": selected_rating,
-            "max_duration": selected_duration,
-            "min_year": selected_min_year,
-            "max_year": selected_max_year,
-        }
-        logger.debug(f"Rendering template with {len(selected_movies)} movies")
-        return render(request, "random_movie/random_movie.html", context)
+            response = JsonResponse({"html": html})
+        else:
+            # Prepare the context for rendering the template
+            context = {
+                "form": form,
+                "movies": selected_movies,
+                "selected_genres": selected_genres,
+                "count": count,
+                "movie_ids": movie_ids,
+                "seed": seed,
+                "min_rotten_tomatoes_rating": selected_rating,
+                "max_duration": selected_duration,
+                "min_year": selected_min_year,
+                "max_year": selected_max_year,
+                "weight": selected_weight,
+            }
+            logger.debug(f"Rendering template with {len(selected_movies)} movies")
+            response = render(request, "random_movie/random_movie.html", context)
+
+        if seed.isdigit():
+            # Shared caches and browsers may keep seeded picks for a while
+            patch_cache_control(
+                response, public=True, max_age=settings.RANDOM_MOVIE_CACHE_SECONDS
+            )
+        return response
     except Exception as e:
         # Log any exceptions that occur during processing
         logger.error(f"Error fetching random movie: {str(e)}")
         if request.headers.get("X-Requested-With") == "XMLHttpRequest":
             return JsonResponse({"error": str(e)}, status=500)
-        return render(request, "error.html", {"error": str(e)})
+        response = render(request, "error.html", {"error": str(e)})
+        # Keep the error page out of the page cache
+        add_never_cache_headers(response)
+        return response
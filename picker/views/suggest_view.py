@@ -0,0 +1,28 @@
+# picker/views/suggest_view.py
+
+from django.http import HttpRequest, JsonResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_GET
+
+from picker.helpers.suggest_index import get_suggest_index
+from utils.logger_utils import setup_logging
+
+logger = setup_logging(__name__)
+
+MAX_SUGGESTIONS = 20
+# Suggestions only change with the library; let browsers reuse them briefly
+SUGGEST_MAX_AGE = 60
+
+
+@require_GET
+def suggest_view(request: HttpRequest):
+    """Typeahead suggestions for ``?q=``, e.g. ``/api/suggest/?q=matr&limit=5``."""
+    limit = request.GET.get("limit", "")
+    limit = min(int(limit), MAX_SUGGESTIONS) if limit.isdigit() else 8
+    query = request.GET.get("q", "")[:100]
+    suggestions = get_suggest_index().suggest(query, limit)
+    response = JsonResponse(
+        {"q": query, "results": [suggestion._asdict() for suggestion in suggestions]}
+    )
+    patch_cache_control(response, public=True, max_age=SUGGEST_MAX_AGE)
+    return response
@@ -0,0 +1,75 @@
+# picker/views/time_budget_view.py
+
+from django.http import HttpRequest, JsonResponse
+from django.urls import reverse
+from django.utils.cache import add_never_cache_headers
+from django.views.decorators.http import require_GET
+
+from picker.helpers.time_budget import pick_for_time_budget
+from sync.models import Movie
+from utils.logger_utils import setup_logging
+
+logger = setup_logging(__name__)
+
+MEDIA_CHOICES = {
+    "movies": ("movies",),
+    "episodes": ("episodes",),
+    "both": ("movies", "episodes"),
+}
+
+
+def serialize_item(item):
+    if isinstance(item, Movie):
+        return {
+            "type": "movie",
+            "id": item.id,
+            "title": item.title,
+            "duration": item.duration,
+            "url": reverse("movie_detail", args=[item.id]),
+        }
+    return {
+        "type": "episode",
+        "id": item.id,
+        "title": str(item),
+        "duration": item.duration,
+        "url": reverse("show_detail", args=[item.show_id]),
+    }
+
+
+@require_GET
+def time_budget_view(request: HttpRequest):
+    """
+    Random movies and/or episodes that fit in ``minutes``, e.g.
+    ``?minutes=90&count=3&media=episodes&unwatched=true``.
+    """
+    minutes = request.GET.get("minutes", "")
+    if not minutes.isdigit() or not int(minutes):
+        return JsonResponse({"error": "minutes must be a positive number"}, status=400)
+
+    count = request.GET.get("count", "")
+    seed = request.GET.get("seed", "")
+    media = MEDIA_CHOICES.get(request.GET.get("media", "both"), MEDIA_CHOICES["both"])
+    try:
+        items = pick_for_time_budget(
+            int(minutes) * 60 * 1000,
+            count=max(1, min(int(count), 20)) if count.isdigit() else None,
+            media=media,
+            genres=[genre for genre in request.GET.getlist("genre") if genre],
+            unwatched=request.GET.get("unwatched", "").lower() == "true",
+            seed=int(seed) if seed.isdigit() else None,
+        )
+    except Exception as e:
+        logger.error(f"Error picking for a time budget: {str(e)}")
+        return JsonResponse({"error": str(e)}, status=500)
+
+    response = JsonResponse(
+        {
+            "minutes": int(minutes),
+            "total_duration": sum(item.duration for item in items),
+            "items": [serialize_item(item) for item in items],
+        }
+    )
+    if not seed.isdigit():
+        # Only a seeded pick is repeatable; keep random ones out of the cache
+        add_never_cache_headers(response)
+    return response
@@ -30,15 +30,25 @@ INSTALLED_APPS = [
     "theme",
 ]
 
+# The cache is shared by every worker process and by the sync commands. The
+# default file-based cache needs no extra service; the oldest 1/CULL_FREQUENCY
+# of the entries is dropped once MAX_ENTRIES is reached. Set CACHE_BACKEND and
+# CACHE_LOCATION to use e.g. DatabaseCache (after createcachetable) instead.
 CACHES = {
     "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-        "LOCATION": "unique-snowflake",
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.filebased.FileBasedCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", str(BASE_DIR / "cache")),
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.getenv("CACHE_MAX_ENTRIES", 5000)),
+            "CULL_FREQUENCY": int(os.getenv("CACHE_CULL_FREQUENCY", 4)),
+        },
     }
 }
 
 MIDDLEWARE = [
-    "django.middleware.cache.UpdateCacheMiddleware",
+    "picker.middleware.VersionedUpdateCacheMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -46,7 +56,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
-    "django.middleware.cache.FetchFromCacheMiddleware",
+    "picker.middleware.VersionedFetchFromCacheMiddleware",
 ]
 
 ROOT_URLCONF = "plexpicker.urls"
@@ -72,6 +82,25 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "plexpicker.wsgi.application"
 
+# SQLite profile for running the web server and a sync concurrently. WAL lets
+# readers keep reading while the sync writes, and BEGIN IMMEDIATE takes the
+# write lock up front so writers queue on busy_timeout instead of failing with
+# "database is locked" when a read transaction tries to upgrade.
+SQLITE_OPTIONS = {
+    "timeout": 20,
+    "transaction_mode": "IMMEDIATE",
+    "init_command": ";".join(
+        [
+            "PRAGMA journal_mode=WAL",
+            "PRAGMA synchronous=NORMAL",
+            "PRAGMA busy_timeout=20000",
+            "PRAGMA mmap_size=268435456",  # 256 MiB
+            "PRAGMA cache_size=-65536",  # 64 MiB
+            "PRAGMA temp_store=MEMORY",
+        ]
+    ),
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -116,3 +145,44 @@ TMDB_API_URL = os.getenv("TMDB_API_URL")
 TVDB_API_KEY = os.getenv("TVDB_API_KEY")
 TRAKT_CLIENT_ID = os.getenv("TRAKT_CLIENT_ID")
 TRAKT_CLIENT_SECRET = os.getenv("TRAKT_CLIENT_SECRET")
+
+# Sync commits in chunks of at most SYNC_CHUNK_SIZE items, or sooner once the
+# oldest pending item has waited SYNC_CHUNK_MS milliseconds
+SYNC_CHUNK_SIZE = int(os.getenv("SYNC_CHUNK_SIZE", 100))
+SYNC_CHUNK_MS = int(os.getenv("SYNC_CHUNK_MS", 1000))
+
+# Syncs hold a PostgreSQL advisory lock, or on other databases a file lock in
+# SYNC_LOCK_DIR. SYNC_LOCK_WAIT is how long sync_content waits for a running
+# sync before skipping.
+SYNC_LOCK_DIR = os.getenv("SYNC_LOCK_DIR", str(BASE_DIR / "locks"))
+SYNC_LOCK_WAIT = int(os.getenv("SYNC_LOCK_WAIT", 0))
+
+# The library version lives in the database and is mirrored into the cache for
+# LIBRARY_VERSION_CHECK_SECONDS; data derived from the library is cached per
+# version for LIBRARY_CACHE_TIMEOUT
+LIBRARY_VERSION_CHECK_SECONDS = int(os.getenv("LIBRARY_VERSION_CHECK_SECONDS", 5))
+LIBRARY_CACHE_TIMEOUT = int(os.getenv("LIBRARY_CACHE_TIMEOUT", 86400))
+
+# Random picks with a ?seed= are repeatable; browsers and proxies may cache them
+# for RANDOM_MOVIE_CACHE_SECONDS (the page cache drops them on the next sync)
+RANDOM_MOVIE_CACHE_SECONDS = int(os.getenv("RANDOM_MOVIE_CACHE_SECONDS", 300))
+
+# Each web process keeps hydrated movies in memory for the
+# PICK_POOL_COMBINATIONS most picked random filter combinations, up to
+# PICK_POOL_SIZE per combination, refilled in a background thread every
+# PICK_POOL_REFILL_SECONDS and whenever the library version changes
+PICK_POOL_COMBINATIONS = int(os.getenv("PICK_POOL_COMBINATIONS", 10))
+PICK_POOL_SIZE = int(os.getenv("PICK_POOL_SIZE", 200))
+PICK_POOL_REFILL_SECONDS = int(os.getenv("PICK_POOL_REFILL_SECONDS", 300))
+PICK_POOL_BACKGROUND_REFILL = True
+# Movies a session's shuffle deck deals next are prefetched along with
+# each dealt movie; each process keeps up to PICK_POOL_UPCOMING_LIMIT of them
+PICK_POOL_UPCOMING_LIMIT = int(os.getenv("PICK_POOL_UPCOMING_LIMIT", 5000))
+
+# Each web process holds the whole search index in memory; episodes are most
+# of its documents, so set SEARCH_INDEX_EPISODES=false to leave them out
+SEARCH_INDEX_EPISODES = os.getenv("SEARCH_INDEX_EPISODES", "true").lower() == "true"
+
+# Episode cast storage: "compact" stores only guest stars on episodes and reads
+# series regulars from the show's roles; "full" repeats the main cast per episode
+EPISODE_ROLE_STORAGE = os.getenv("EPISODE_ROLE_STORAGE", "compact")
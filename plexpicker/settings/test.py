@@ -19,3 +19,14 @@ DATABASES = {
 PASSWORD_HASHERS = [
     "django.contrib.auth.hashers.MD5PasswordHasher",
 ]
+
+# Keep the cache in memory so tests never touch the shared cache directory
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "unique-snowflake",
+    }
+}
+
+# The in-memory test database is not visible to other threads
+PICK_POOL_BACKGROUND_REFILL = False
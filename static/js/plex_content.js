@@ -3,6 +3,7 @@
 document.addEventListener("DOMContentLoaded", function () {
     const moviesList = document.getElementById("movie-list");
     const showsList = document.getElementById("show-list");
+    const searchGroups = document.getElementById("search-groups");
     const searchForm = document.getElementById("search-form");
     const resetButton = document.getElementById("reset-button");
     const searchInput = document.querySelector('input[name="query"]');
@@ -41,40 +42,68 @@ document.addEventListener("DOMContentLoaded", function () {
 
     function updateContent(response) {
         if (moviesList) {
-            updateList(moviesList, response.movies, 'movie', response.movie_page, response.movie_total_pages);
+            updateList(moviesList, response.movies, 'movie', response.movie_previous, response.movie_next, response.movie_count);
         }
         if (showsList) {
-            updateList(showsList, response.shows, 'show', response.show_page, response.show_total_pages);
+            updateList(showsList, response.shows, 'show', response.show_previous, response.show_next, response.show_count);
         }
+        if (searchGroups) {
+            updateGroups(response.groups || []);
+        }
+    }
+
+    // Episodes, people and genres matching a search, each with its own pages
+    function updateGroups(groups) {
+        searchGroups.classList.toggle('hidden', !groups.length);
+        searchGroups.innerHTML = groups.map(group => `
+            <div>
+                <h2 class="text-2xl font-semibold text-white mb-4">${escapeHtml(group.title)}</h2>
+                <ul id="${group.type}-list" class="space-y-2">
+                    ${group.results.map(hit => `
+                        <li class="bg-gray-800 rounded-md p-3 hover:bg-gray-700 transition duration-150">
+                            <a href="${escapeHtml(hit.url)}" class="text-blue-400 hover:text-blue-300">${escapeHtml(hit.label)}</a>
+                        </li>
+                    `).join("")}
+                </ul>
+                <div class="${group.type}-pagination mt-4"></div>
+            </div>
+        `).join("");
+
+        groups.forEach(group => {
+            updatePagination(`.${group.type}-pagination`, group.previous, group.next, group.count, group.type);
+        });
     }
 
-    function updateList(listElement, items, type, currentPage, totalPages) {
+    function updateList(listElement, items, type, previousCursor, nextCursor, count) {
         listElement.innerHTML = items.map(item => `
             <li class="bg-gray-800 rounded-md p-3 hover:bg-gray-700 transition duration-150">
-                <a href="/${type}s/${item.pk}/" class="text-blue-400 hover:text-blue-300">${item.fields.title}</a>
-                <span class="text-gray-400">(${item.fields.year})</span>
+                <a href="/${type}s/${item.pk}/" class="text-blue-400 hover:text-blue-300">${escapeHtml(item.title)}</a>
+                <span class="text-gray-400">(${item.year})</span>
             </li>
         `).join("");
 
-        updatePagination(`.${type}-pagination`, currentPage, totalPages, type);
+        updatePagination(`.${type}-pagination`, previousCursor, nextCursor, count, type);
     }
 
-    function updatePagination(selector, currentPage, totalPages, type) {
+    function updatePagination(selector, previousCursor, nextCursor, count, type) {
         const paginationElement = document.querySelector(selector);
         if (!paginationElement) return;
+        if (!previousCursor && !nextCursor) {
+            paginationElement.innerHTML = '';
+            return;
+        }
 
         let html = '<span class="step-links flex items-center justify-center space-x-2">';
 
-        if (currentPage > 1) {
-            html += `<a href="#" data-page="1" data-type="${type}" class="first-page px-3 py-2 bg-gray-700 text-white rounded-md hover:bg-gray-600 focus:outline-none focus:ring-2 focus:ring-gray-500">« First</a>`;
-            html += `<a href="#" data-page="${currentPage - 1}" data-type="${type}" class="previous-page px-3 py-2 bg-gray-700 text-white rounded-md hover:bg-gray-600 focus:outline-none focus:ring-2 focus:ring-gray-500">Previous</a>`;
+        if (previousCursor) {
+            html += `<a href="#" data-type="${type}" class="first-page px-3 py-2 bg-gray-700 text-white rounded-md hover:bg-gray-600 focus:outline-none focus:ring-2 focus:ring-gray-500">« First</a>`;
+            html += `<a href="#" data-cursor="${previousCursor}" data-direction="before" data-type="${type}" class="previous-page px-3 py-2 bg-gray-700 text-white rounded-md hover:bg-gray-600 focus:outline-none focus:ring-2 focus:ring-gray-500">Previous</a>`;
         }
 
-        html += `<span class="current-page text-gray-400">Page ${currentPage} of ${totalPages}</span>`;
+        html += `<span class="current-page text-gray-400">${count} total</span>`;
 
-        if (currentPage < totalPages) {
-            html += `<a href="#" data-page="${currentPage + 1}" data-type="${type}" class="next-page px-3 py-2 bg-gray-700 text-white rounded-md hover:bg-gray-600 focus:outline-none focus:ring-2 focus:ring-gray-500">Next</a>`;
-            html += `<a href="#" data-page="${totalPages}" data-type="${type}" class="last-page px-3 py-2 bg-gray-700 text-white rounded-md hover:bg-gray-600 focus:outline-none focus:ring-2 focus:ring-gray-500">Last »</a>`;
+        if (nextCursor) {
+            html += `<a href="#" data-cursor="${nextCursor}" data-direction="after" data-type="${type}" class="next-page px-3 py-2 bg-gray-700 text-white rounded-md hover:bg-gray-600 focus:outline-none focus:ring-2 focus:ring-gray-500">Next</a>`;
         }
 
         html += '</span>';
@@ -87,10 +116,16 @@ document.addEventListener("DOMContentLoaded", function () {
         paginationElement.querySelectorAll('a').forEach(link => {
             link.addEventListener('click', function (event) {
                 event.preventDefault();
-                const page = this.getAttribute('data-page');
+                const cursor = this.getAttribute('data-cursor');
+                const direction = this.getAttribute('data-direction');
                 const paginationType = this.getAttribute('data-type');
                 const params = new URLSearchParams(window.location.search);
-                params.set(`${paginationType}_page`, page);
+                params.delete(`${paginationType}_after`);
+                params.delete(`${paginationType}_before`);
+                // The first page has no cursor
+                if (cursor) {
+                    params.set(`${paginationType}_${direction}`, cursor);
+                }
                 if (searchInput.value) {
                     params.set('query', searchInput.value);
                 }
@@ -100,6 +135,89 @@ document.addEventListener("DOMContentLoaded", function () {
         });
     }
 
+    // Typeahead suggestions, fetched as the user types
+    const suggestionsList = document.getElementById("search-suggestions");
+    let suggestTimer = null;
+    let suggestController = null;
+
+    function hideSuggestions() {
+        suggestionsList.classList.add("hidden");
+        suggestionsList.innerHTML = "";
+    }
+
+    function escapeHtml(text) {
+        const element = document.createElement("span");
+        element.textContent = text;
+        return element.innerHTML;
+    }
+
+    function showSuggestions(results) {
+        if (!results.length) {
+            hideSuggestions();
+            return;
+        }
+        suggestionsList.innerHTML = results.map(result => `
+            <li>
+                <a href="${result.url || "#"}" data-label="${escapeHtml(result.label)}" class="suggestion flex justify-between px-4 py-2 text-white hover:bg-gray-700">
+                    <span>${escapeHtml(result.label)}</span>
+                    <span class="text-gray-400 text-sm">${result.type}</span>
+                </a>
+            </li>
+        `).join("");
+        suggestionsList.classList.remove("hidden");
+    }
+
+    function fetchSuggestions(query) {
+        if (suggestController) {
+            suggestController.abort();
+        }
+        suggestController = new AbortController();
+        fetch(`${suggestionsList.dataset.url}?${new URLSearchParams({q: query})}`, {
+            signal: suggestController.signal
+        })
+            .then(response => response.json())
+            .then(data => showSuggestions(data.results))
+            .catch(error => {
+                if (error.name !== 'AbortError') {
+                    console.error('Error fetching suggestions:', error);
+                }
+            });
+    }
+
+    if (suggestionsList) {
+        searchInput.addEventListener('input', function () {
+            clearTimeout(suggestTimer);
+            const query = searchInput.value.trim();
+            if (!query) {
+                hideSuggestions();
+                return;
+            }
+            suggestTimer = setTimeout(() => fetchSuggestions(query), 120);
+        });
+
+        suggestionsList.addEventListener('click', function (event) {
+            const link = event.target.closest('a.suggestion');
+            if (link && link.getAttribute('href') === '#') {
+                // People have no page; search for them instead
+                event.preventDefault();
+                searchInput.value = link.dataset.label;
+                hideSuggestions();
+                searchForm.requestSubmit();
+            }
+        });
+
+        document.addEventListener('click', function (event) {
+            if (!searchForm.contains(event.target)) {
+                hideSuggestions();
+            }
+        });
+        searchInput.addEventListener('keydown', function (event) {
+            if (event.key === 'Escape') {
+                hideSuggestions();
+            }
+        });
+    }
+
     // Reset button functionality
     resetButton.addEventListener('click', function (event) {
         event.preventDefault();
@@ -111,13 +229,16 @@ document.addEventListener("DOMContentLoaded", function () {
     // Handle form submission
     searchForm.addEventListener('submit', function (event) {
         event.preventDefault();
+        if (suggestionsList) {
+            hideSuggestions();
+        }
         const params = new URLSearchParams(new FormData(searchForm));
         fetchContent(window.location.pathname, params);
         history.pushState({}, '', `${window.location.pathname}?${params.toString()}`);
     });
 
     // Attach pagination listeners to existing pagination elements
-    document.querySelectorAll('.movie-pagination, .show-pagination').forEach(attachPaginationListeners);
+    document.querySelectorAll('.movie-pagination, .show-pagination, .episode-pagination, .person-pagination, .genre-pagination').forEach(attachPaginationListeners);
 
     // Handle browser back/forward buttons
     window.addEventListener('popstate', function (event) {
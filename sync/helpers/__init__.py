@@ -1,3 +1,10 @@
 # sync/utils/__init__.py
 
+from .bulk_loader import *
+from .episode_roles import *
+from .library_version import *
 from .movie_links import *
+from .people import *
+from .snapshot import *
+from .sync_lock import *
+from .transactions import *
@@ -0,0 +1,428 @@
+# sync/helpers/bulk_loader.py
+
+import time
+from collections import defaultdict
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from sync.helpers.episode_roles import compact_episode_roles_enabled
+from sync.helpers.library_version import bump_library_version
+from sync.helpers.people import PersonResolver, split_name
+from sync.models import Episode, Genre, Movie, Person, Role, Show, Studio
+from utils.logger_utils import setup_logging
+
+logger = setup_logging(__name__)
+
+BATCH_SIZE = 1000
+
+
+def copy_text(value):
+    """Render a value in PostgreSQL's COPY text format."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+class LibraryLoader:
+    """
+    Load a whole prepared library in a handful of set-based statements.
+
+    Used by ``sync_media --initial-load``. Items are collected with add_movie(),
+    add_show() and add_episode() (the same prepared dicts the chunked sync
+    writes) and written by load() in one transaction.
+
+    On PostgreSQL each table is streamed into a temporary staging table with
+    ``COPY FROM STDIN`` and merged with ``INSERT ... ON CONFLICT``. Other
+    backends fall back to ``bulk_create``. Image optimization is skipped; it
+    runs on the next regular save of each movie or show.
+    """
+
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        self.using = using
+        self.connection = connections[using]
+        self.use_copy = self.connection.vendor == "postgresql"
+        self.movies = []
+        self.shows = []
+        self.episodes = []
+
+    def add_movie(self, prepared):
+        self.movies.append(prepared)
+
+    def add_show(self, prepared):
+        self.shows.append(prepared)
+
+    def add_episode(self, prepared, show_plex_key):
+        self.episodes.append((prepared, str(show_plex_key)))
+
+    def load(self):
+        started = time.monotonic()
+        with transaction.atomic(using=self.using):
+            studio_ids = self.load_names(
+                Studio, [p["studio"] for p in self.movies + self.shows]
+            )
+            genre_ids = self.load_names(
+                Genre,
+                [
+                    name.strip()
+                    for p in self.movies + self.shows
+                    for name in p["genres"].split(",")
+                ],
+            )
+            people = PersonResolver()
+            self.load_people(people)
+
+            movie_ids = self.load_media(Movie, self.movies, "movie", studio_ids)
+            show_ids = self.load_media(Show, self.shows, "show", studio_ids)
+            episode_ids = self.load_episodes(show_ids)
+
+            self.load_genre_links(Movie, self.movies, movie_ids, genre_ids)
+            self.load_genre_links(Show, self.shows, show_ids, genre_ids)
+            roles = self.load_roles(people, movie_ids, show_ids, episode_ids)
+            bump_library_version(self.using)
+
+        logger.info(
+            f"Loaded {len(movie_ids)} movies, {len(show_ids)} shows, "
+            f"{len(episode_ids)} episodes and {roles} roles in "
+            f"{time.monotonic() - started:.1f}s"
+        )
+        return {
+            "movies": len(movie_ids),
+            "shows": len(show_ids),
+            "episodes": len(episode_ids),
+            "roles": roles,
+        }
+
+    def load_names(self, model, names):
+        """Insert missing studios or genres and map every name to its id."""
+        names = {name for name in names if name}
+        self.merge(model, [model(name=name) for name in sorted(names)], ["name"])
+        return dict(model.objects.using(self.using).values_list("name", "id"))
+
+    def load_people(self, people):
+        """
+        Create every credited person the resolver does not know yet.
+
+        Credits are matched like PersonResolver.resolve: by TMDB id first,
+        then by normalized name, so a person credited both with and without
+        a TMDB id becomes one row. People found by name get the TMDB id of
+        the first credit that has one.
+        """
+        new_people = []
+        linked = {}
+        for prepared in self.all_prepared():
+            for credit in prepared["credits"]:
+                person = people.match(credit["name"], credit["tmdb_id"])
+                if person is None:
+                    first_name, last_name = split_name(credit["name"])
+                    person = Person(
+                        first_name=first_name,
+                        last_name=last_name,
+                        photo_url=credit["photo_url"],
+                        tmdb_id=credit["tmdb_id"],
+                    )
+                    new_people.append(person)
+                elif credit["tmdb_id"] and not person.tmdb_id:
+                    person.tmdb_id = credit["tmdb_id"]
+                    if person.pk:
+                        linked[person.pk] = person
+                else:
+                    continue
+                # Later credits in this load match the new or linked person
+                people.remember(person)
+
+        if self.use_copy:
+            # Ids are drawn from the sequence up front so roles can refer to
+            # new people without reading them back
+            for person, pk in zip(new_people, self.next_ids(Person, len(new_people))):
+                person.pk = pk
+            self.merge(Person, new_people, ["tmdb_id"], include_pk=True)
+        else:
+            Person.objects.using(self.using).bulk_create(
+                new_people, batch_size=BATCH_SIZE
+            )
+        Person.objects.using(self.using).bulk_update(
+            linked.values(), ["tmdb_id"], batch_size=BATCH_SIZE
+        )
+        logger.debug(
+            f"Created {len(new_people)} people and linked {len(linked)} to TMDB"
+        )
+
+    def load_media(self, model, prepared_items, key, studio_ids):
+        rows = []
+        for prepared in prepared_items:
+            data = dict(prepared[key])
+            data["studio_id"] = studio_ids.get(prepared["studio"])
+            data.pop("studio", None)
+            rows.append(data)
+        self.merge_rows(model, rows)
+        return {
+            str(plex_key): pk
+            for plex_key, pk in model.objects.using(self.using).values_list(
+                "plex_key", "id"
+            )
+        }
+
+    def load_episodes(self, show_ids):
+        rows = [
+            {**prepared["episode"], "show_id": show_ids[show_plex_key]}
+            for prepared, show_plex_key in self.episodes
+            if show_plex_key in show_ids
+        ]
+        self.merge_rows(Episode, rows)
+        return {
+            str(plex_key): pk
+            for plex_key, pk in Episode.objects.using(self.using).values_list(
+                "plex_key", "id"
+            )
+        }
+
+    def merge_rows(self, model, rows):
+        """
+        Upsert prepared dicts on ``plex_key``, updating only the columns each
+        dict sets. Prepared data leaves out columns it must not overwrite,
+        such as a trailer URL that is already stored, so rows are merged in
+        groups that share the same keys.
+        """
+        groups = defaultdict(list)
+        for data in rows:
+            groups[tuple(sorted(data))].append(model(**data))
+        for fields, objs in groups.items():
+            update_fields = [field for field in fields if field != "plex_key"]
+            self.merge(model, objs, ["plex_key"], update_fields)
+
+    def load_genre_links(self, model, prepared_items, media_ids, genre_ids):
+        through = model.genres.through
+        media_column = f"{model._meta.model_name}_id"
+        links = {
+            (
+                media_ids[str(prepared[model._meta.model_name]["plex_key"])],
+                genre_ids[name],
+            )
+            for prepared in prepared_items
+            for name in (n.strip() for n in prepared["genres"].split(","))
+            if name
+        }
+        objs = [
+            through(**{media_column: media_id, "genre_id": genre_id})
+            for media_id, genre_id in sorted(links)
+        ]
+        self.merge(through, objs, [media_column, "genre_id"])
+
+    def load_roles(self, people, movie_ids, show_ids, episode_ids):
+        roles = {}
+
+        def add_roles(credits, skip_person_ids=frozenset(), **media):
+            actor_ids = set()
+            for credit in credits:
+                person = people.match(credit["name"], credit["tmdb_id"])
+                if person.pk in skip_person_ids:
+                    continue
+                if credit["role_type"] == "ACTOR":
+                    actor_ids.add(person.pk)
+                key = (person.pk, credit["role_type"], *media.items())
+                roles.setdefault(
+                    key,
+                    Role(
+                        person_id=person.pk,
+                        role_type=credit["role_type"],
+                        character_name=credit["character_name"],
+                        order=credit["order"],
+                        **media,
+                    ),
+                )
+            return actor_ids
+
+        for prepared in self.movies:
+            add_roles(
+                prepared["credits"],
+                movie_id=movie_ids[str(prepared["movie"]["plex_key"])],
+            )
+
+        # Series regulars are read from the show's roles in compact mode
+        regular_ids = defaultdict(set)
+        for prepared in self.shows:
+            show_id = show_ids[str(prepared["show"]["plex_key"])]
+            actor_ids = add_roles(prepared["credits"], show_id=show_id)
+            if compact_episode_roles_enabled():
+                regular_ids[show_id] = actor_ids
+
+        for prepared, show_plex_key in self.episodes:
+            episode_key = str(prepared["episode"]["plex_key"])
+            if episode_key not in episode_ids:
+                continue
+            add_roles(
+                prepared["credits"],
+                skip_person_ids=regular_ids[show_ids[show_plex_key]],
+                episode_id=episode_ids[episode_key],
+            )
+
+        return self.insert_roles(list(roles.values()))
+
+    def insert_roles(self, roles):
+        """Insert roles that are not stored yet; roles have no unique key."""
+        if self.use_copy:
+            columns = self.columns(Role)
+            staging = self.copy_to_staging(Role, roles, columns)
+            column_list = ", ".join(self.quote(c) for c in columns)
+            matches = " AND ".join(
+                f"r.{self.quote(c)} IS NOT DISTINCT FROM s.{self.quote(c)}"
+                for c in ("person_id", "role_type", "movie_id", "show_id", "episode_id")
+            )
+            with self.connection.cursor() as cursor:
+                cursor.execute(
+                    f"INSERT INTO {self.quote(Role._meta.db_table)} ({column_list}) "
+                    f"SELECT {column_list} FROM {staging} s WHERE NOT EXISTS "
+                    f"(SELECT 1 FROM {self.quote(Role._meta.db_table)} r WHERE {matches})"
+                )
+                return cursor.rowcount
+
+        existing = set(
+            Role.objects.using(self.using).values_list(
+                "person_id", "role_type", "movie_id", "show_id", "episode_id"
+            )
+        )
+        new_roles = [
+            role
+            for role in roles
+            if (
+                role.person_id,
+                role.role_type,
+                role.movie_id,
+                role.show_id,
+                role.episode_id,
+            )
+            not in existing
+        ]
+        Role.objects.using(self.using).bulk_create(new_roles, batch_size=BATCH_SIZE)
+        return len(new_roles)
+
+    def merge(self, model, objs, unique_fields, update_fields=(), include_pk=False):
+        """
+        Insert ``objs``, skipping or updating rows that clash on
+        ``unique_fields``.
+        """
+        if not objs:
+            return
+        if not self.use_copy:
+            model.objects.using(self.using).bulk_create(
+                objs,
+                batch_size=BATCH_SIZE,
+                update_conflicts=bool(update_fields),
+                ignore_conflicts=not update_fields,
+                unique_fields=unique_fields if update_fields else None,
+                update_fields=update_fields or None,
+            )
+            return
+
+        columns = self.columns(model, include_pk)
+        staging = self.copy_to_staging(model, objs, columns)
+        column_list = ", ".join(self.quote(c) for c in columns)
+        conflict = ", ".join(
+            self.quote(model._meta.get_field(f).column) for f in unique_fields
+        )
+        if update_fields:
+            assignments = ", ".join(
+                f"{self.quote(c)} = EXCLUDED.{self.quote(c)}"
+                for c in (model._meta.get_field(f).column for f in update_fields)
+            )
+            action = f"DO UPDATE SET {assignments}"
+        else:
+            action = "DO NOTHING"
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {self.quote(model._meta.db_table)} ({column_list}) "
+                f"SELECT {column_list} FROM {staging} "
+                f"ON CONFLICT ({conflict}) {action}"
+            )
+        logger.debug(f"Merged {len(objs)} rows into {model._meta.db_table}")
+
+    def copy_to_staging(self, model, objs, columns):
+        """Stream ``objs`` into a temporary table that is dropped on commit."""
+        table = model._meta.db_table
+        staging = self.quote(f"staging_{table}")
+        column_list = ", ".join(self.quote(c) for c in columns)
+        fields = {f.column: f for f in model._meta.concrete_fields}
+        rows = (
+            [
+                fields[column].get_db_prep_save(
+                    getattr(obj, fields[column].attname), self.connection
+                )
+                for column in columns
+            ]
+            for obj in objs
+        )
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+            cursor.execute(
+                f"CREATE TEMPORARY TABLE {staging} ON COMMIT DROP AS "
+                f"SELECT {column_list} FROM {self.quote(table)} WITH NO DATA"
+            )
+            sql = f"COPY {staging} ({column_list}) FROM STDIN"
+            if hasattr(cursor.cursor, "copy"):
+                # psycopg 3
+                with cursor.cursor.copy(sql) as copy:
+                    for row in rows:
+                        copy.write_row(row)
+            else:
+                # psycopg2
+                cursor.cursor.copy_expert(sql, CopyStream(rows))
+        return staging
+
+    def next_ids(self, model, count):
+        if not count:
+            return []
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, %s)) "
+                "FROM generate_series(1, %s)",
+                [self.quote(model._meta.db_table), model._meta.pk.column, count],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def columns(self, model, include_pk=False):
+        return [
+            f.column
+            for f in model._meta.concrete_fields
+            if include_pk or not f.primary_key
+        ]
+
+    def quote(self, name):
+        return self.connection.ops.quote_name(name)
+
+    def all_prepared(self):
+        yield from self.movies
+        yield from self.shows
+        for prepared, _ in self.episodes:
+            yield prepared
+
+
+class CopyStream:
+    """File-like reader over rows in COPY text format, for psycopg2."""
+
+    def __init__(self, rows):
+        self.lines = (
+            "\t".join(copy_text(value) for value in row) + "\n" for row in rows
+        )
+        self.buffer = ""
+
+    def read(self, size=-1):
+        while size < 0 or len(self.buffer) < size:
+            line = next(self.lines, None)
+            if line is None:
+                break
+            self.buffer += line
+        if size < 0:
+            data, self.buffer = self.buffer, ""
+        else:
+            data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
@@ -0,0 +1,37 @@
+# sync/helpers/episode_roles.py
+
+from typing import Set
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef
+
+from sync.models.role import Role
+
+
+def compact_episode_roles_enabled() -> bool:
+    """
+    In compact mode episodes only store the cast that differs from the show's
+    main cast (guest stars); series regulars are resolved from the show's
+    roles at read time. Directors and writers are always stored per episode.
+    """
+    return getattr(settings, "EPISODE_ROLE_STORAGE", "compact") == "compact"
+
+
+def get_series_regular_ids(show) -> Set[int]:
+    return set(
+        Role.objects.filter(show=show, role_type="ACTOR").values_list(
+            "person_id", flat=True
+        )
+    )
+
+
+def redundant_episode_roles():
+    """Episode actor roles that repeat a credit from the show's main cast."""
+    show_credit = Role.objects.filter(
+        show_id=OuterRef("episode__show_id"),
+        person_id=OuterRef("person_id"),
+        role_type="ACTOR",
+    )
+    return Role.objects.filter(episode__isnull=False, role_type="ACTOR").filter(
+        Exists(show_credit)
+    )
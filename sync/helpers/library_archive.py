@@ -0,0 +1,255 @@
+# sync/helpers/library_archive.py
+
+import struct
+import zlib
+from datetime import date, datetime
+
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from sync.helpers.library_version import bump_library_version
+from sync.models import Episode, Genre, Movie, Person, Role, Show, Studio
+from utils.logger_utils import setup_logging
+
+logger = setup_logging(__name__)
+
+MAGIC = b"PLEXLIB\x01"
+BATCH_SIZE = 2000
+READ_SIZE = 1 << 16
+
+# Record tags
+TABLE, ROW, END = b"T", b"R", b"E"
+
+# Value tags
+NONE, FALSE, TRUE, INT, FLOAT, STR, DATE, DATETIME = (
+    b"N",
+    b"0",
+    b"1",
+    b"i",
+    b"f",
+    b"s",
+    b"d",
+    b"t",
+)
+
+INT64 = struct.Struct("<q")
+FLOAT64 = struct.Struct("<d")
+UINT32 = struct.Struct("<I")
+
+
+class ArchiveError(Exception):
+    """Raised for a malformed archive or one that does not match the models."""
+
+
+def archive_models():
+    """Catalog models in an order where every foreign key target comes first."""
+    return [
+        Studio,
+        Genre,
+        Person,
+        Show,
+        Movie,
+        Episode,
+        Role,
+        Movie.genres.through,
+        Show.genres.through,
+    ]
+
+
+def encode_str(value):
+    data = value.encode()
+    return UINT32.pack(len(data)) + data
+
+
+def encode_value(value):
+    if value is None:
+        return NONE
+    if isinstance(value, bool):
+        return TRUE if value else FALSE
+    if isinstance(value, int):
+        return INT + INT64.pack(value)
+    if isinstance(value, float):
+        return FLOAT + FLOAT64.pack(value)
+    if isinstance(value, datetime):
+        return DATETIME + encode_str(value.isoformat())
+    if isinstance(value, date):
+        return DATE + encode_str(value.isoformat())
+    return STR + encode_str(str(value))
+
+
+class ArchiveWriter:
+    """
+    Write catalog tables as a zlib-compressed stream of length-prefixed,
+    type-tagged records.
+
+    Each table starts with a TABLE record holding its name and column names,
+    followed by one ROW record per row and an END record. Rows are encoded
+    and compressed as they are read, so memory use does not grow with the
+    size of the catalog.
+    """
+
+    def __init__(self, fileobj, level=6):
+        self.fileobj = fileobj
+        self.compressor = zlib.compressobj(level)
+        self.fileobj.write(MAGIC)
+
+    def write(self, data):
+        self.fileobj.write(self.compressor.compress(data))
+
+    def write_table(self, name, columns, rows):
+        self.write(TABLE + encode_str(name) + UINT32.pack(len(columns)))
+        for column in columns:
+            self.write(encode_str(column))
+        count = 0
+        for row in rows:
+            self.write(ROW + b"".join(encode_value(value) for value in row))
+            count += 1
+        self.write(END)
+        return count
+
+    def close(self):
+        self.fileobj.write(self.compressor.flush())
+
+
+class ArchiveReader:
+    """Stream tables back out of a file written by ArchiveWriter."""
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.decompressor = zlib.decompressobj()
+        self.buffer = b""
+        self.offset = 0
+        if fileobj.read(len(MAGIC)) != MAGIC:
+            raise ArchiveError("Not a library archive")
+
+    def read(self, size):
+        while len(self.buffer) - self.offset < size:
+            chunk = self.fileobj.read(READ_SIZE)
+            if not chunk:
+                raise ArchiveError("Unexpected end of archive")
+            self.buffer = self.buffer[self.offset :] + self.decompressor.decompress(
+                chunk
+            )
+            self.offset = 0
+        data = self.buffer[self.offset : self.offset + size]
+        self.offset += size
+        return data
+
+    def at_end(self):
+        if len(self.buffer) > self.offset:
+            return False
+        chunk = self.fileobj.read(READ_SIZE)
+        if not chunk:
+            return True
+        self.buffer, self.offset = self.decompressor.decompress(chunk), 0
+        return self.at_end()
+
+    def read_str(self):
+        (length,) = UINT32.unpack(self.read(4))
+        return self.read(length).decode()
+
+    def read_value(self):
+        tag = self.read(1)
+        if tag == NONE:
+            return None
+        if tag in (FALSE, TRUE):
+            return tag == TRUE
+        if tag == INT:
+            return INT64.unpack(self.read(8))[0]
+        if tag == FLOAT:
+            return FLOAT64.unpack(self.read(8))[0]
+        if tag == STR:
+            return self.read_str()
+        if tag == DATE:
+            return date.fromisoformat(self.read_str())
+        if tag == DATETIME:
+            return datetime.fromisoformat(self.read_str())
+        raise ArchiveError(f"Unknown value tag {tag!r}")
+
+    def tables(self):
+        """Yield ``(name, columns, rows)``; consume ``rows`` before moving on."""
+        while not self.at_end():
+            if self.read(1) != TABLE:
+                raise ArchiveError("Expected a table record")
+            name = self.read_str()
+            (column_count,) = UINT32.unpack(self.read(4))
+            columns = [self.read_str() for _ in range(column_count)]
+            yield name, columns, self.rows(len(columns))
+
+    def rows(self, column_count):
+        while True:
+            tag = self.read(1)
+            if tag == END:
+                return
+            if tag != ROW:
+                raise ArchiveError(f"Unexpected record tag {tag!r}")
+            yield [self.read_value() for _ in range(column_count)]
+
+
+def export_library(fileobj, using=DEFAULT_DB_ALIAS):
+    """Write every catalog table to ``fileobj``; returns row counts per table."""
+    writer = ArchiveWriter(fileobj)
+    counts = {}
+    for model in archive_models():
+        columns = [field.attname for field in model._meta.concrete_fields]
+        rows = (
+            model.objects.using(using)
+            .order_by("pk")
+            .values_list(*columns)
+            .iterator(chunk_size=BATCH_SIZE)
+        )
+        counts[model._meta.db_table] = writer.write_table(
+            model._meta.db_table, columns, rows
+        )
+    writer.close()
+    return counts
+
+
+def import_library(fileobj, replace=False, using=DEFAULT_DB_ALIAS):
+    """
+    Load an archive written by export_library() with bulk inserts, keeping
+    the original primary keys. The catalog must be empty unless ``replace``
+    is set, in which case the existing catalog is deleted first.
+    """
+    models = {model._meta.db_table: model for model in archive_models()}
+    reader = ArchiveReader(fileobj)
+    counts = {}
+    with transaction.atomic(using=using):
+        if replace:
+            for model in reversed(archive_models()):
+                model.objects.using(using).delete()
+        elif any(model.objects.using(using).exists() for model in archive_models()):
+            raise ArchiveError("The catalog is not empty; use --replace")
+
+        for name, columns, rows in reader.tables():
+            model = models.get(name)
+            if model is None:
+                raise ArchiveError(f"Unknown table {name}")
+            known = {field.attname for field in model._meta.concrete_fields}
+            unknown = set(columns) - known
+            if unknown:
+                raise ArchiveError(f"Unknown columns in {name}: {sorted(unknown)}")
+
+            count, batch = 0, []
+            for row in rows:
+                batch.append(model(**dict(zip(columns, row))))
+                if len(batch) >= BATCH_SIZE:
+                    model.objects.using(using).bulk_create(batch)
+                    count += len(batch)
+                    batch = []
+            model.objects.using(using).bulk_create(batch)
+            counts[name] = count + len(batch)
+            logger.debug(f"Imported {counts[name]} rows into {name}")
+
+        reset_sequences(list(models.values()), using)
+        bump_library_version(using)
+    return counts
+
+
+def reset_sequences(models, using=DEFAULT_DB_ALIAS):
+    """Move id sequences past the imported primary keys (PostgreSQL)."""
+    connection = connections[using]
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
@@ -0,0 +1,61 @@
+# sync/helpers/library_version.py
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F
+
+from sync.models.library_state import LibraryState
+from utils.logger_utils import setup_logging
+
+logger = setup_logging(__name__)
+
+LIBRARY_VERSION_KEY = "library:version"
+LIBRARY_STATE_ID = 1
+
+
+def get_library_version() -> int:
+    """
+    The current library version. Anything derived from the catalog can be
+    cached under a key that includes it and is invalidated by the next sync.
+
+    The version lives in the database and is mirrored into the cache, so a
+    read is normally one cache hit. The mirror expires after
+    LIBRARY_VERSION_CHECK_SECONDS, which bounds how long a process with its
+    own cache can miss a bump made by another process.
+    """
+    version = cache.get(LIBRARY_VERSION_KEY)
+    if version is None:
+        version = (
+            LibraryState.objects.filter(pk=LIBRARY_STATE_ID)
+            .values_list("version", flat=True)
+            .first()
+        ) or 1
+        cache.set(LIBRARY_VERSION_KEY, version, settings.LIBRARY_VERSION_CHECK_SECONDS)
+    return version
+
+
+def bump_library_version(using=DEFAULT_DB_ALIAS) -> int:
+    """
+    Increment the version. Inside a transaction the new version becomes
+    visible together with the catalog changes, when the transaction commits.
+    """
+    with transaction.atomic(using=using):
+        state, created = LibraryState.objects.using(using).get_or_create(
+            pk=LIBRARY_STATE_ID, defaults={"version": 2}
+        )
+        if not created:
+            LibraryState.objects.using(using).filter(pk=LIBRARY_STATE_ID).update(
+                version=F("version") + 1
+            )
+            state.refresh_from_db(fields=["version"])
+        version = state.version
+
+    transaction.on_commit(
+        lambda: cache.set(
+            LIBRARY_VERSION_KEY, version, settings.LIBRARY_VERSION_CHECK_SECONDS
+        ),
+        using=using,
+    )
+    logger.debug(f"Library version is now {version}")
+    return version
@@ -3,6 +3,8 @@
 import requests
 from django.conf import settings
 
+from utils.tmdb_utils import get_imdb_id
+
 
 def get_tmdb_id_from_movie(movie):
     return movie.tmdb_id
@@ -39,3 +41,24 @@ def fetch_movie_links_from_tmdb_id(tmdb_id):
 def fetch_movie_links(movie):
     tmdb_id = get_tmdb_id_from_movie(movie)
     return fetch_movie_links_from_tmdb_id(tmdb_id)
+
+
+def build_movie_links(tmdb_id, tmdb_info=None, trakt_url=None):
+    """
+    Build TMDB, Trakt and IMDb links from an already fetched TMDB response.
+
+    The IMDb id comes from TMDB's external ids, so Trakt is only queried when
+    no Trakt link is stored yet and a Trakt client id is configured.
+    """
+    if not tmdb_id:
+        return None, None, None
+
+    tmdb_url = f"https://www.themoviedb.org/movie/{tmdb_id}"
+    imdb_id = get_imdb_id(tmdb_info)
+    imdb_url = f"https://www.imdb.com/title/{imdb_id}" if imdb_id else None
+
+    if not trakt_url and settings.TRAKT_CLIENT_ID:
+        _, trakt_url, trakt_imdb_url = fetch_movie_links_from_tmdb_id(tmdb_id)
+        imdb_url = imdb_url or trakt_imdb_url
+
+    return tmdb_url, trakt_url, imdb_url
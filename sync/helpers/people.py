@@ -0,0 +1,186 @@
+# sync/helpers/people.py
+
+import re
+import unicodedata
+from typing import Dict, Optional
+
+from sync.helpers.transactions import RollbackJournal
+from sync.models.person import Person
+from sync.models.role import Role
+from utils.logger_utils import setup_logging
+from utils.tmdb_utils import get_character_name
+
+logger = setup_logging(__name__)
+
+
+def normalize_name(name: str) -> str:
+    """Fold case, accents, punctuation and whitespace so name variants compare equal."""
+    decomposed = unicodedata.normalize("NFKD", name or "")
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    cleaned = re.sub(r"[^\w\s]", " ", stripped.casefold())
+    return " ".join(cleaned.split())
+
+
+def split_name(full_name: str):
+    name_parts = full_name.split(maxsplit=1)
+    if len(name_parts) == 2:
+        return name_parts[0], name_parts[1]
+    return (name_parts[0] if name_parts else ""), ""
+
+
+def get_tmdb_person_ids(tmdb_info: Optional[Dict]) -> Dict[str, int]:
+    """Map normalized names to TMDB person ids from a response's credits."""
+    if not tmdb_info or "credits" not in tmdb_info:
+        return {}
+    credits = tmdb_info["credits"]
+    person_ids = {}
+    for key in ("cast", "guest_stars", "crew"):
+        for credit in credits.get(key, []):
+            if credit.get("id") and credit.get("name"):
+                person_ids.setdefault(normalize_name(credit["name"]), credit["id"])
+    return person_ids
+
+
+def extract_credits(plex_people, role_type: str, tmdb_info: Optional[Dict] = None):
+    """
+    Turn Plex role tags into plain credit dicts.
+
+    This needs no database access, so credits can be prepared before the
+    write transaction opens and saved later with save_credits().
+    """
+    tmdb_person_ids = get_tmdb_person_ids(tmdb_info)
+    credits = []
+    for order, plex_person in enumerate(plex_people):
+        # The tag may include the character name, e.g. "Keanu Reeves as Neo"
+        name, _, character = plex_person.tag.partition(" as ")
+        character_name = None
+        if role_type == "ACTOR":
+            character_name = character.strip() or get_character_name(tmdb_info, name)
+        credits.append(
+            {
+                "name": name,
+                "photo_url": getattr(plex_person, "thumb", None),
+                "tmdb_id": tmdb_person_ids.get(normalize_name(name)),
+                "role_type": role_type,
+                "character_name": character_name,
+                "order": order,
+            }
+        )
+    return credits
+
+
+class PersonResolver:
+    """
+    Resolve Plex people to Person rows, matching on TMDB id first and falling
+    back to the normalized name.
+
+    All existing people are preloaded so resolving a known person costs no
+    queries. A name match is never used when it carries a different TMDB id,
+    which keeps distinct actors who share a name apart.
+
+    Cache updates go through ``journal``, so a ChunkedWriter sharing it
+    forgets the people a rolled back write created or changed.
+    """
+
+    def __init__(self, journal: Optional[RollbackJournal] = None):
+        self.journal = journal or RollbackJournal()
+        self.reload()
+
+    def reload(self):
+        """Load every person from the database."""
+        self.by_tmdb_id: Dict[int, Person] = {}
+        self.by_name: Dict[str, Person] = {}
+        for person in Person.objects.order_by("id"):
+            self.remember(person)
+        logger.info(f"Preloaded {len(self.by_name)} people")
+
+    def remember(self, person: Person):
+        if person.tmdb_id:
+            self.journal.set(self.by_tmdb_id, person.tmdb_id, person)
+        key = normalize_name(person.full_name)
+        current = self.by_name.get(key)
+        # Prefer the person already linked to TMDB for name-only lookups
+        if current is None or (person.tmdb_id and not current.tmdb_id):
+            self.journal.set(self.by_name, key, person)
+
+    def match(self, full_name: str, tmdb_id: Optional[int] = None) -> Optional[Person]:
+        """Return the known person for a credit without touching the database."""
+        person = self.by_tmdb_id.get(tmdb_id) if tmdb_id else None
+        if person is None:
+            candidate = self.by_name.get(normalize_name(full_name))
+            if candidate and not (
+                tmdb_id and candidate.tmdb_id and candidate.tmdb_id != tmdb_id
+            ):
+                person = candidate
+        return person
+
+    def resolve(
+        self,
+        full_name: str,
+        photo_url: Optional[str] = None,
+        tmdb_id: Optional[int] = None,
+    ) -> Person:
+        person = self.match(full_name, tmdb_id)
+        if person is None:
+            first_name, last_name = split_name(full_name)
+            person = Person.objects.create(
+                first_name=first_name,
+                last_name=last_name,
+                photo_url=photo_url,
+                tmdb_id=tmdb_id,
+            )
+            self.remember(person)
+            return person
+
+        update_fields = []
+        if tmdb_id and not person.tmdb_id:
+            self.journal.setattr(person, "tmdb_id", tmdb_id)
+            update_fields.append("tmdb_id")
+        if photo_url and person.photo_url != photo_url:
+            self.journal.setattr(person, "photo_url", photo_url)
+            update_fields.append("photo_url")
+        if update_fields:
+            person.save(update_fields=update_fields)
+            self.remember(person)
+        return person
+
+
+def save_credits(people: PersonResolver, credits, skip_person_ids=frozenset(), **media):
+    """
+    Upsert the roles of one movie, show or episode from prepared credits.
+
+    ``media`` is the role's media field, e.g. ``movie=movie``. Existing roles
+    are loaded in one query, only changed roles are updated and new roles are
+    bulk created. Credits for people in ``skip_person_ids`` are not stored.
+    """
+    existing = {
+        (role.person_id, role.role_type): role for role in Role.objects.filter(**media)
+    }
+    new_roles = []
+    for credit in credits:
+        person = people.resolve(credit["name"], credit["photo_url"], credit["tmdb_id"])
+        if person.pk in skip_person_ids:
+            continue
+
+        key = (person.pk, credit["role_type"])
+        role = existing.get(key)
+        if role is None:
+            role = Role(
+                person=person,
+                role_type=credit["role_type"],
+                character_name=credit["character_name"],
+                order=credit["order"],
+                **media,
+            )
+            existing[key] = role
+            new_roles.append(role)
+        elif role.pk and (role.character_name, role.order) != (
+            credit["character_name"],
+            credit["order"],
+        ):
+            role.character_name = credit["character_name"]
+            role.order = credit["order"]
+            role.save(update_fields=["character_name", "order"])
+
+    Role.objects.bulk_create(new_roles)
+    return len(new_roles)
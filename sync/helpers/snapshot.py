@@ -0,0 +1,291 @@
+# sync/helpers/snapshot.py
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from sync.helpers.library_version import bump_library_version
+from sync.models import Episode, Genre, Movie, Person, Role, Show, Studio
+from utils.logger_utils import setup_logging
+
+logger = setup_logging(__name__)
+
+SHADOW_SCHEMA = "sync_shadow"
+RETIRED_SCHEMA = "sync_retired"
+PRUNE_BATCH_SIZE = 500
+
+
+class SnapshotError(Exception):
+    """Raised when a built snapshot fails validation and is not published."""
+
+
+def catalog_tables():
+    return [
+        model._meta.db_table
+        for model in (
+            Studio,
+            Genre,
+            Person,
+            Show,
+            Movie,
+            Episode,
+            Role,
+            Movie.genres.through,
+            Show.genres.through,
+        )
+    ]
+
+
+class CatalogSnapshot:
+    """
+    Publish a LibraryLoader's library as one consistent catalog snapshot.
+
+    The snapshot starts as a copy of the live catalog, so ids and stored
+    lookups such as trailer URLs survive. The loader then merges the library
+    into it, titles no longer in Plex are pruned and the result is validated
+    before anything becomes visible.
+
+    On PostgreSQL the snapshot is built in shadow tables in a separate schema
+    that only carry the primary and unique keys the merge needs. Secondary
+    indexes and foreign keys are added once the data is in, and the shadow
+    tables replace the live ones with ``ALTER TABLE ... SET SCHEMA`` in a
+    single short transaction. On SQLite the whole build runs in one
+    transaction instead; WAL readers keep seeing the previous snapshot until it
+    commits, and a failed validation rolls it back.
+    """
+
+    def __init__(self, loader, using=DEFAULT_DB_ALIAS):
+        self.loader = loader
+        self.using = using
+        self.connection = connections[using]
+
+    def publish(self):
+        if self.connection.vendor == "postgresql":
+            self.publish_swap()
+        else:
+            with transaction.atomic(using=self.using):
+                self.build()
+        logger.info("Published catalog snapshot")
+
+    def build(self):
+        self.loader.load()
+        self.prune()
+        self.validate()
+
+    def prune(self):
+        """Delete titles that are no longer in the Plex library."""
+        expected = self.expected_keys()
+        for model, keys in expected.items():
+            stale_ids = [
+                pk
+                for plex_key, pk in model.objects.using(self.using).values_list(
+                    "plex_key", "id"
+                )
+                if str(plex_key) not in keys
+            ]
+            for start in range(0, len(stale_ids), PRUNE_BATCH_SIZE):
+                model.objects.using(self.using).filter(
+                    id__in=stale_ids[start : start + PRUNE_BATCH_SIZE]
+                ).delete()
+            if stale_ids:
+                logger.info(
+                    f"Pruned {len(stale_ids)} {model._meta.verbose_name_plural}"
+                )
+
+    def validate(self):
+        expected = self.expected_keys()
+        if not any(expected.values()):
+            raise SnapshotError("Plex returned an empty library")
+
+        problems = []
+        for model, keys in expected.items():
+            count = model.objects.using(self.using).count()
+            if count != len(keys):
+                problems.append(
+                    f"{count} {model._meta.verbose_name_plural}, expected {len(keys)}"
+                )
+
+        roles = Role.objects.using(self.using)
+        if roles.filter(
+            movie_id__isnull=True, show_id__isnull=True, episode_id__isnull=True
+        ).exists():
+            problems.append("roles without a movie, show or episode")
+        if roles.exclude(
+            person_id__in=Person.objects.using(self.using).values("id")
+        ).exists():
+            problems.append("roles pointing at missing people")
+        if (
+            Episode.objects.using(self.using)
+            .exclude(show_id__in=Show.objects.using(self.using).values("id"))
+            .exists()
+        ):
+            problems.append("episodes pointing at missing shows")
+
+        if problems:
+            raise SnapshotError(f"Snapshot failed validation: {'; '.join(problems)}")
+
+    def expected_keys(self):
+        loaded_shows = {str(p["show"]["plex_key"]) for p in self.loader.shows}
+        return {
+            Movie: {str(p["movie"]["plex_key"]) for p in self.loader.movies},
+            Show: loaded_shows,
+            Episode: {
+                str(prepared["episode"]["plex_key"])
+                for prepared, show_plex_key in self.loader.episodes
+                if show_plex_key in loaded_shows
+            },
+        }
+
+    def publish_swap(self):
+        tables = catalog_tables()
+        with self.connection.cursor() as cursor:
+            cursor.execute("SELECT current_schema()")
+            live = cursor.fetchone()[0]
+
+        try:
+            with transaction.atomic(using=self.using):
+                self.create_shadow_tables(live, tables)
+
+            with transaction.atomic(using=self.using):
+                with self.connection.cursor() as cursor:
+                    # Unqualified table names now resolve to the shadow tables
+                    cursor.execute(
+                        f"SET LOCAL search_path TO {self.quote(SHADOW_SCHEMA)}, "
+                        f"{self.quote(live)}"
+                    )
+                self.build()
+
+            with transaction.atomic(using=self.using):
+                self.finish_shadow_tables(live, tables)
+
+            with transaction.atomic(using=self.using):
+                with self.connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL lock_timeout = '10s'")
+                    cursor.execute(f"CREATE SCHEMA {self.quote(RETIRED_SCHEMA)}")
+                    for table in tables:
+                        cursor.execute(
+                            f"ALTER TABLE {self.quote(live)}.{self.quote(table)} "
+                            f"SET SCHEMA {self.quote(RETIRED_SCHEMA)}"
+                        )
+                        cursor.execute(
+                            f"ALTER TABLE {self.quote(SHADOW_SCHEMA)}.{self.quote(table)} "
+                            f"SET SCHEMA {self.quote(live)}"
+                        )
+                bump_library_version(self.using)
+        finally:
+            with self.connection.cursor() as cursor:
+                for schema in (SHADOW_SCHEMA, RETIRED_SCHEMA):
+                    cursor.execute(
+                        f"DROP SCHEMA IF EXISTS {self.quote(schema)} CASCADE"
+                    )
+
+    def create_shadow_tables(self, live, tables):
+        """Copy the live catalog into bare shadow tables with only their keys."""
+        shadow = self.quote(SHADOW_SCHEMA)
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DROP SCHEMA IF EXISTS {shadow} CASCADE")
+            cursor.execute(
+                f"DROP SCHEMA IF EXISTS {self.quote(RETIRED_SCHEMA)} CASCADE"
+            )
+            cursor.execute(f"CREATE SCHEMA {shadow}")
+            for table in tables:
+                source = f"{self.quote(live)}.{self.quote(table)}"
+                target = f"{shadow}.{self.quote(table)}"
+                cursor.execute(
+                    f"CREATE TABLE {target} (LIKE {source} INCLUDING DEFAULTS "
+                    f"INCLUDING IDENTITY INCLUDING CONSTRAINTS INCLUDING GENERATED)"
+                )
+                # Generated columns such as the search vector fill themselves
+                cursor.execute(
+                    "SELECT column_name FROM information_schema.columns "
+                    "WHERE table_schema = %s AND table_name = %s "
+                    "AND is_generated = 'NEVER' ORDER BY ordinal_position",
+                    [live, table],
+                )
+                columns = ", ".join(self.quote(name) for (name,) in cursor.fetchall())
+                cursor.execute(
+                    f"INSERT INTO {target} ({columns}) SELECT {columns} FROM {source}"
+                )
+                cursor.execute(
+                    f"SELECT setval(pg_get_serial_sequence(%s, 'id'), "
+                    f"COALESCE(MAX(id), 0) + 1, false) FROM {target}",
+                    [target],
+                )
+                self.copy_constraints(cursor, live, table, "pu")
+
+    def finish_shadow_tables(self, live, tables):
+        """Add the secondary indexes and foreign keys under their live names."""
+        with self.connection.cursor() as cursor:
+            for sql in index_definitions(cursor, live, tables, SHADOW_SCHEMA):
+                cursor.execute(sql)
+            for table in tables:
+                self.copy_constraints(cursor, live, table, "f")
+
+    def copy_constraints(self, cursor, live, table, types):
+        for sql in constraint_definitions(cursor, live, table, types, SHADOW_SCHEMA):
+            cursor.execute(sql)
+
+    def quote(self, name):
+        # Unlike quote_name(), escapes quotes inside the name as well
+        return '"' + name.replace('"', '""') + '"'
+
+
+# With only pg_catalog on the search path, pg_get_indexdef() and
+# pg_get_constraintdef() print every table as format('%I.%I', schema, table).
+# The definitions are moved to another schema by replacing exactly that
+# text, built by PostgreSQL's own quoting, so any schema name works.
+def index_definitions(cursor, schema, tables, target_schema):
+    """CREATE INDEX statements recreating ``tables``' secondary indexes."""
+    cursor.execute("SET LOCAL search_path TO pg_catalog")
+    cursor.execute(
+        "SELECT pg_get_indexdef(i.indexrelid), "
+        "format('%%I.%%I', n.nspname, t.relname), "
+        "format('%%I.%%I', %s::text, t.relname) "
+        "FROM pg_index i JOIN pg_class t ON t.oid = i.indrelid "
+        "JOIN pg_namespace n ON n.oid = t.relnamespace "
+        "WHERE n.nspname = %s AND t.relname = ANY(%s) AND NOT EXISTS "
+        "(SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid "
+        "AND c.conrelid = i.indrelid AND c.contype IN ('p', 'u', 'x')) "
+        "ORDER BY t.relname, i.indexrelid",
+        [target_schema, schema, list(tables)],
+    )
+    rows = cursor.fetchall()
+    cursor.execute("RESET search_path")
+    return [
+        definition.replace(f" ON {source} ", f" ON {target} ", 1).replace(
+            f" ON ONLY {source} ", f" ON ONLY {target} ", 1
+        )
+        for definition, source, target in rows
+    ]
+
+
+def constraint_definitions(cursor, schema, table, types, target_schema):
+    """
+    ALTER TABLE statements adding ``table``'s constraints of ``types`` (e.g.
+    "pu" or "f") to the same table in ``target_schema``, with foreign keys
+    pointing at the tables there.
+    """
+    cursor.execute("SET LOCAL search_path TO pg_catalog")
+    cursor.execute(
+        "SELECT format('ALTER TABLE %%I.%%I ADD CONSTRAINT %%I ', %s::text, "
+        "t.relname, c.conname), pg_get_constraintdef(c.oid), "
+        # %I rejects NULL, and only foreign keys reference another table
+        "CASE WHEN c.confrelid <> 0 THEN format('%%I.%%I', rn.nspname, r.relname) "
+        "END, CASE WHEN c.confrelid <> 0 THEN format('%%I.%%I', %s::text, "
+        "r.relname) END "
+        "FROM pg_constraint c JOIN pg_class t ON t.oid = c.conrelid "
+        "JOIN pg_namespace n ON n.oid = t.relnamespace "
+        "LEFT JOIN pg_class r ON r.oid = c.confrelid "
+        "LEFT JOIN pg_namespace rn ON rn.oid = r.relnamespace "
+        "WHERE n.nspname = %s AND t.relname = %s AND c.contype = ANY(%s) "
+        "ORDER BY c.contype, c.conname",
+        [target_schema, target_schema, schema, table, list(types)],
+    )
+    rows = cursor.fetchall()
+    cursor.execute("RESET search_path")
+    statements = []
+    for alter, definition, referenced, target in rows:
+        if referenced:
+            definition = definition.replace(
+                f"REFERENCES {referenced}(", f"REFERENCES {target}(", 1
+            )
+        statements.append(alter + definition)
+    return statements
@@ -0,0 +1,107 @@
+# sync/helpers/sync_lock.py
+
+import hashlib
+import os
+import re
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from utils.logger_utils import setup_logging
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+logger = setup_logging(__name__)
+
+POLL_SECONDS = 1
+
+
+class SyncLock:
+    """
+    A lock shared by every process that syncs the library.
+
+    On PostgreSQL it is a session-level advisory lock held on a connection of
+    its own, so transactions committed or rolled back by the sync do not
+    affect it. Elsewhere it is an exclusive ``flock`` on a file in
+    SYNC_LOCK_DIR. Either way the lock is released by the database or the
+    kernel when its holder exits, so a crashed sync never leaves a stale lock
+    behind and no expiry or heartbeat is needed.
+    """
+
+    def __init__(self, name, using=DEFAULT_DB_ALIAS):
+        self.name = name
+        self.using = using
+        self.connection = None
+        self.file = None
+
+    def acquire(self, wait=0):
+        """Try to take the lock for up to ``wait`` seconds; returns success."""
+        deadline = time.monotonic() + wait
+        while not self.try_acquire():
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(POLL_SECONDS)
+        logger.debug(f"Acquired sync lock {self.name}")
+        return True
+
+    def try_acquire(self):
+        if connections[self.using].vendor == "postgresql":
+            return self.try_advisory_lock()
+        return self.try_file_lock()
+
+    def release(self):
+        if self.connection is not None:
+            try:
+                with self.connection.cursor() as cursor:
+                    cursor.execute("SELECT pg_advisory_unlock(%s)", [self.key])
+            finally:
+                self.connection.close()
+                self.connection = None
+        if self.file is not None:
+            fcntl.flock(self.file, fcntl.LOCK_UN)
+            self.file.close()
+            self.file = None
+
+    @property
+    def key(self):
+        digest = hashlib.blake2b(self.name.encode(), digest_size=8).digest()
+        return int.from_bytes(digest, "big", signed=True)
+
+    def try_advisory_lock(self):
+        connection = connections.create_connection(self.using)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_try_advisory_lock(%s)", [self.key])
+            locked = cursor.fetchone()[0]
+        if locked:
+            self.connection = connection
+        else:
+            connection.close()
+        return locked
+
+    def try_file_lock(self):
+        if fcntl is None:
+            raise RuntimeError("File based sync locks need fcntl (POSIX)")
+        os.makedirs(settings.SYNC_LOCK_DIR, exist_ok=True)
+        filename = re.sub(r"[^\w.-]", "_", self.name) + ".lock"
+        lock_file = open(os.path.join(settings.SYNC_LOCK_DIR, filename), "a+")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return False
+        # The pid is only informational; the lock itself is the flock
+        lock_file.truncate(0)
+        lock_file.write(f"{os.getpid()}\n")
+        lock_file.flush()
+        self.file = lock_file
+        return True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
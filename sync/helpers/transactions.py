@@ -0,0 +1,156 @@
+# sync/helpers/transactions.py
+
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+from sync.helpers.library_version import bump_library_version
+
+from utils.logger_utils import setup_logging
+
+logger = setup_logging(__name__)
+
+
+class RollbackJournal:
+    """
+    Undo log for the in-memory caches a sync write updates.
+
+    ChunkedWriter starts the journal before each write and rolls it back
+    when that write's savepoint is rolled back, so the caches drop exactly
+    the entries the failed write added or changed and nothing is reloaded.
+    Outside of a write nothing is recorded.
+    """
+
+    def __init__(self):
+        self.recording = False
+        self.undo = []
+
+    def start(self):
+        self.recording = True
+        self.undo = []
+
+    def commit(self):
+        self.recording = False
+        self.undo = []
+
+    def rollback(self):
+        for undo in reversed(self.undo):
+            undo()
+        self.commit()
+
+    def set(self, cache: dict, key, value):
+        """``cache[key] = value``, undone on rollback."""
+        if self.recording:
+            if key in cache:
+                old = cache[key]
+                self.undo.append(lambda: cache.__setitem__(key, old))
+            else:
+                self.undo.append(lambda: cache.pop(key, None))
+        cache[key] = value
+
+    def setattr(self, obj, name: str, value):
+        """``setattr(obj, name, value)``, undone on rollback."""
+        if self.recording:
+            old = getattr(obj, name)
+            self.undo.append(lambda: setattr(obj, name, old))
+        setattr(obj, name, value)
+
+
+class ChunkedWriter:
+    """
+    Buffer prepared sync writes and commit them in short, bounded transactions.
+
+    A chunk is committed once it holds ``chunk_size`` writes or its oldest write
+    has waited ``chunk_ms`` milliseconds. Callers do all network I/O before
+    adding a write, so the database write lock is only held while rows are
+    written. Every write runs in its own savepoint, so one failing item is
+    rolled back and reported without losing the rest of its chunk.
+
+    Callers that cache rows across writes (people, shows, studios) update
+    those caches through ``journal``. When a savepoint is rolled back the
+    journal undoes that write's cache updates before the next write of the
+    chunk, so later writes never refer to rows that were never committed.
+
+    The library version is bumped once, when the writer is closed, and only
+    if at least one write was committed. Bumping per chunk would invalidate
+    every cached page and index many times during a single sync run.
+
+    Usage:
+        with ChunkedWriter() as writer:
+            for plex_movie in movies:
+                prepared = self.prepare_movie(plex_movie)  # network I/O
+                writer.add(plex_movie.title, self.write_movie, prepared)
+    """
+
+    def __init__(
+        self,
+        chunk_size=None,
+        chunk_ms=None,
+        on_error=None,
+        journal=None,
+        using=None,
+    ):
+        self.chunk_size = chunk_size or settings.SYNC_CHUNK_SIZE
+        self.chunk_ms = settings.SYNC_CHUNK_MS if chunk_ms is None else chunk_ms
+        self.on_error = on_error
+        self.journal = journal or RollbackJournal()
+        self.using = using
+        self.pending = []
+        self.oldest_pending_at = None
+        self.written = 0
+        self.failed = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+        if self.written:
+            with transaction.atomic(using=self.using):
+                bump_library_version(self.using)
+        return False
+
+    def add(self, label, write, *args):
+        if not self.pending:
+            self.oldest_pending_at = time.monotonic()
+        self.pending.append((label, write, args))
+        if self.should_flush():
+            self.flush()
+
+    def should_flush(self):
+        if len(self.pending) >= self.chunk_size:
+            return True
+        waited_ms = (time.monotonic() - self.oldest_pending_at) * 1000
+        return bool(self.chunk_ms) and waited_ms >= self.chunk_ms
+
+    def flush(self):
+        if not self.pending:
+            return
+
+        chunk, self.pending = self.pending, []
+        errors = []
+        started = time.monotonic()
+        with transaction.atomic(using=self.using):
+            for label, write, args in chunk:
+                self.journal.start()
+                try:
+                    with transaction.atomic(using=self.using):
+                        write(*args)
+                except Exception as e:
+                    self.journal.rollback()
+                    errors.append((label, e))
+                else:
+                    self.journal.commit()
+
+        elapsed_ms = (time.monotonic() - started) * 1000
+        self.written += len(chunk) - len(errors)
+        self.failed += len(errors)
+        logger.debug(f"Committed {len(chunk)} writes in {elapsed_ms:.0f} ms")
+
+        for label, error in errors:
+            if self.on_error:
+                self.on_error(label, error)
+            else:
+                logger.error(f"Error writing {label}: {str(error)}")
@@ -0,0 +1,30 @@
+# sync/management/commands/compact_episode_roles.py
+
+from django.core.management.base import BaseCommand
+
+from sync.helpers.episode_roles import redundant_episode_roles
+from sync.helpers.library_version import bump_library_version
+from utils.logger_utils import setup_logging
+
+logger = setup_logging(__name__)
+
+
+class Command(BaseCommand):
+    help = "Remove episode actor roles that repeat the show's main cast"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report the number of redundant roles without deleting them",
+        )
+
+    def handle(self, *args, **options):
+        redundant = redundant_episode_roles()
+        if options["dry_run"]:
+            logger.info(f"Found {redundant.count()} redundant episode roles.")
+            return
+
+        deleted, _ = redundant.delete()
+        bump_library_version()
+        logger.info(f"Removed {deleted} redundant episode roles.")
@@ -0,0 +1,26 @@
+# sync/management/commands/export_library.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from sync.helpers.library_archive import export_library
+from utils.logger_utils import setup_logging
+
+logger = setup_logging(__name__)
+
+
+class Command(BaseCommand):
+    help = "Export the synced catalog to a compressed library archive"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to write the archive to")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        with open(options["path"], "wb") as fileobj:
+            counts = export_library(fileobj)
+        logger.info(
+            f"Exported {sum(counts.values())} rows to {options['path']} in "
+            f"{time.monotonic() - started:.1f}s"
+        )
@@ -0,0 +1,34 @@
+# sync/management/commands/import_library.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sync.helpers.library_archive import ArchiveError, import_library
+from utils.logger_utils import setup_logging
+
+logger = setup_logging(__name__)
+
+
+class Command(BaseCommand):
+    help = "Import a library archive written by export_library"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Archive to import")
+        parser.add_argument(
+            "--replace",
+            action="store_true",
+            help="Delete the existing catalog before importing",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        try:
+            with open(options["path"], "rb") as fileobj:
+                counts = import_library(fileobj, replace=options["replace"])
+        except ArchiveError as e:
+            raise CommandError(str(e))
+        logger.info(
+            f"Imported {sum(counts.values())} rows from {options['path']} in "
+            f"{time.monotonic() - started:.1f}s"
+        )
@@ -0,0 +1,104 @@
+# sync/management/commands/merge_duplicate_people.py
+
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Case, Min, Value, When
+
+from sync.helpers.library_version import bump_library_version
+from sync.helpers.people import normalize_name
+from sync.models import Person, Role
+from utils.logger_utils import setup_logging
+
+logger = setup_logging(__name__)
+
+
+class Command(BaseCommand):
+    help = "Merge duplicate people and reassign their roles"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of duplicate people reassigned per query (default: 500)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report the merges without changing the database",
+        )
+
+    def handle(self, *args, **options):
+        merges = self.find_merges()
+        logger.info(
+            f"Found {len(merges)} duplicate people across "
+            f"{len(set(merges.values()))} distinct people."
+        )
+        if options["dry_run"] or not merges:
+            return
+
+        with transaction.atomic():
+            self.merge(merges, options["batch_size"])
+            bump_library_version()
+
+        logger.info(f"Merged {len(merges)} duplicate people.")
+
+    def find_merges(self):
+        """
+        Map duplicate person ids to the id of the person they should merge into.
+
+        People are grouped by normalized name. A group is only merged when its
+        members carry at most one distinct TMDB id; the person holding that id
+        (or the oldest person) is kept. Groups with several TMDB ids are
+        different people sharing a name and are left alone.
+        """
+        groups = defaultdict(list)
+        for person_id, first_name, last_name, tmdb_id in Person.objects.values_list(
+            "id", "first_name", "last_name", "tmdb_id"
+        ).order_by("id"):
+            key = normalize_name(f"{first_name} {last_name}")
+            groups[key].append((person_id, tmdb_id))
+
+        merges = {}
+        for key, members in groups.items():
+            if len(members) < 2:
+                continue
+            tmdb_ids = {tmdb_id for _, tmdb_id in members if tmdb_id}
+            if len(tmdb_ids) > 1:
+                logger.debug(f"Skipping ambiguous name '{key}': {sorted(tmdb_ids)}")
+                continue
+            keep_id = next(
+                (person_id for person_id, tmdb_id in members if tmdb_id),
+                members[0][0],
+            )
+            for person_id, _ in members:
+                if person_id != keep_id:
+                    merges[person_id] = keep_id
+        return merges
+
+    def merge(self, merges, batch_size):
+        duplicate_ids = list(merges)
+        for start in range(0, len(duplicate_ids), batch_size):
+            batch = duplicate_ids[start : start + batch_size]
+            updated = Role.objects.filter(person_id__in=batch).update(
+                person_id=Case(
+                    *[When(person_id=dup, then=Value(merges[dup])) for dup in batch]
+                )
+            )
+            logger.debug(f"Reassigned {updated} roles from {len(batch)} people")
+
+        # Reassignment can leave the same person credited twice for one title
+        kept_ids = set(merges.values())
+        affected = Role.objects.filter(person_id__in=kept_ids)
+        first_roles = affected.values(
+            "person_id", "movie_id", "show_id", "episode_id", "role_type"
+        ).annotate(keep_id=Min("id"))
+        deleted, _ = affected.exclude(id__in=first_roles.values("keep_id")).delete()
+        logger.debug(f"Removed {deleted} duplicate roles")
+
+        for start in range(0, len(duplicate_ids), batch_size):
+            Person.objects.filter(
+                id__in=duplicate_ids[start : start + batch_size]
+            ).delete()
@@ -1,18 +1,18 @@
 # sync/management/commands/sync_content.py
 
 from django.conf import settings
-from django.core.cache import cache
 from django.core.management import call_command
 from django.core.management.base import BaseCommand
 
+from sync.helpers.sync_lock import SyncLock
 from utils.logger_utils import setup_logging
 
 logger = setup_logging(__name__)
 
 
 class Command(BaseCommand):
-    # 1800 seconds (30 minutes):
-    # python manage.py sync_content --lock-timeout 1800
+    # Wait up to 1800 seconds (30 minutes) for a running sync to finish:
+    # python manage.py sync_content --lock-wait 1800
     help = "Sync Plex movies and TV shows with database locking"
 
     def add_arguments(self, parser):
@@ -26,15 +26,24 @@ class Command(BaseCommand):
             action="store_true",
             help="Sync only TV shows",
         )
+        parser.add_argument(
+            "--lock-wait",
+            type=int,
+            default=settings.SYNC_LOCK_WAIT,
+            help="Seconds to wait for a running sync before skipping (default: 0)",
+        )
         parser.add_argument(
             "--lock-timeout",
             type=int,
-            default=getattr(settings, "SYNC_LOCK_TIMEOUT", 300),
-            help="Lock timeout in seconds (default: 300)",
+            help="Deprecated and ignored; the lock is released when its holder exits",
         )
 
     def handle(self, *args, **options):
-        self.lock_timeout = options["lock_timeout"]
+        self.lock_wait = options["lock_wait"]
+        if options["lock_timeout"] is not None:
+            logger.warning(
+                "--lock-timeout is deprecated and ignored; use --lock-wait instead."
+            )
         movies_only = options["movies_only"]
         shows_only = options["shows_only"]
 
@@ -85,24 +94,18 @@ class Command(BaseCommand):
                 logger.error(f"Error during combined sync: {str(e)}")
 
     def run_task_with_lock(self, task_name, task_command, movies_only, shows_only):
-        lock_id = f"lock_{task_command}"
-        acquire_lock = lambda: cache.add(lock_id, "true", self.lock_timeout)
-        release_lock = lambda: cache.delete(lock_id)
-        got_lock = acquire_lock()
-
-        if got_lock:
-            try:
-                logger.info(f"Starting {task_name}")
-                call_command(task_command)
-                if (movies_only and task_command == "sync_movies") or (
-                    shows_only and task_command == "sync_shows"
-                ):
-                    logger.info(f"{task_name} completed successfully.")
-                elif not movies_only and not shows_only:
-                    logger.info(f"{task_name} completed successfully.")
-            finally:
-                release_lock()
-        else:
-            logger.warning(
-                f"{task_name} is already being run by another process. Skipping."
-            )
+        with SyncLock(f"lock_{task_command}") as lock:
+            if not lock.acquire(self.lock_wait):
+                logger.warning(
+                    f"{task_name} is already being run by another process. Skipping."
+                )
+                return
+
+            logger.info(f"Starting {task_name}")
+            call_command(task_command)
+            if (movies_only and task_command == "sync_movies") or (
+                shows_only and task_command == "sync_shows"
+            ):
+                logger.info(f"{task_name} completed successfully.")
+            elif not movies_only and not shows_only:
+                logger.info(f"{task_name} completed successfully.")
@@ -1,46 +1,31 @@
 # sync/management/commands/sync_media.py
 
-import random
-import time
-import traceback
-from functools import wraps
-
 from django.conf import settings
 from django.core.management.base import BaseCommand
-from django.db import OperationalError, transaction
 from django.utils.timezone import make_aware
 from plexapi.server import PlexServer
 
-from sync.helpers import fetch_movie_links
-from sync.models import Episode, Genre, Movie, Person, Role, Show, Studio
+from sync.helpers import (
+    CatalogSnapshot,
+    ChunkedWriter,
+    LibraryLoader,
+    PersonResolver,
+    RollbackJournal,
+    build_movie_links,
+    compact_episode_roles_enabled,
+    extract_credits,
+    get_series_regular_ids,
+    save_credits,
+)
+from sync.models import Episode, Movie, Show, Studio
+from utils.genre_utils import get_or_create_genres
 from utils.logger_utils import setup_logging
+from utils.tmdb_utils import TMDBClient
 from utils.trailer_utils import TrailerFetcher
 
 logger = setup_logging(__name__)
 
 
-def retry_on_db_lock(max_attempts=5, delay=0.1):
-    def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            for attempt in range(max_attempts):
-                try:
-                    return func(*args, **kwargs)
-                except OperationalError as e:
-                    if "database is locked" in str(e) and attempt < max_attempts - 1:
-                        sleep_time = delay * (2**attempt) + random.uniform(0, 0.1)
-                        logger.warning(
-                            f"Database locked. Retrying in {sleep_time:.2f} seconds..."
-                        )
-                        time.sleep(sleep_time)
-                    else:
-                        raise
-
-        return wrapper
-
-    return decorator
-
-
 class Command(BaseCommand):
     help = "Sync Plex movies and TV shows to the local database"
 
@@ -48,27 +33,102 @@ class Command(BaseCommand):
         super().__init__(*args, **kwargs)
         self.plex = PlexServer(settings.PLEX_URL, settings.PLEX_TOKEN)
         self.existing_studios = {}
+        self.people = None
+        self.journal = RollbackJournal()
+        self.regular_ids = {}
         self.trailer_fetcher = TrailerFetcher(
             tmdb_api_url=settings.TMDB_API_URL,
             tmdb_api_key=settings.TMDB_API_KEY,
             youtube_api_key=settings.YOUTUBE_API_KEY,
         )
+        self.tmdb_client = TMDBClient(
+            tmdb_api_url=settings.TMDB_API_URL,
+            tmdb_api_key=settings.TMDB_API_KEY,
+        )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=None,
+            help="Commit after this many items (default: SYNC_CHUNK_SIZE)",
+        )
+        parser.add_argument(
+            "--chunk-ms",
+            type=int,
+            default=None,
+            help="Commit once a pending write has waited this long (default: SYNC_CHUNK_MS)",
+        )
+        parser.add_argument(
+            "--initial-load",
+            action="store_true",
+            help="Load the whole library in one bulk transaction (COPY on PostgreSQL)",
+        )
+        parser.add_argument(
+            "--snapshot",
+            action="store_true",
+            help="Build the catalog as a validated snapshot and publish it atomically",
+        )
 
-    def handle(self, *args, **kwargs):
+    def handle(self, *args, **options):
         try:
             self.preload_existing_data()
-            self.sync_movies()
-            self.sync_shows()
+            if options.get("initial_load") or options.get("snapshot"):
+                self.load_library(snapshot=options.get("snapshot"))
+            else:
+                self.sync_library(options)
+            logger.info(
+                f"Synced {Movie.objects.count()} movies and "
+                f"{Show.objects.count()} shows to the database."
+            )
             logger.info("Media sync completed successfully.")
         except Exception as e:
             logger.error(f"Error syncing media: {str(e)}")
 
+    def sync_library(self, options):
+        with ChunkedWriter(
+            chunk_size=options.get("chunk_size"),
+            chunk_ms=options.get("chunk_ms"),
+            on_error=self.on_write_error,
+            journal=self.journal,
+        ) as writer:
+            for prepared in self.prepared_movies():
+                label = f"movie {prepared['movie']['title']}"
+                writer.add(label, self.write_movie, prepared)
+            for prepared, episodes in self.prepared_shows():
+                show_plex_key = prepared["show"]["plex_key"]
+                writer.add(
+                    f"show {prepared['show']['title']}", self.write_show, prepared
+                )
+                for prepared_episode in episodes:
+                    label = f"episode {prepared_episode['episode']['title']}"
+                    writer.add(
+                        label, self.write_episode, prepared_episode, show_plex_key
+                    )
+
+    def load_library(self, snapshot=False):
+        """Write the whole library at once with the set-based bulk loader."""
+        loader = LibraryLoader()
+        for prepared in self.prepared_movies():
+            loader.add_movie(prepared)
+        for prepared, episodes in self.prepared_shows():
+            loader.add_show(prepared)
+            for prepared_episode in episodes:
+                loader.add_episode(prepared_episode, prepared["show"]["plex_key"])
+        if snapshot:
+            CatalogSnapshot(loader).publish()
+        else:
+            loader.load()
+
+    def on_write_error(self, label, error):
+        logger.error(f"Error processing {label}: {str(error)}")
+
     def preload_existing_data(self):
         self.existing_studios = {studio.name: studio for studio in Studio.objects.all()}
         logger.info(f"Preloaded {len(self.existing_studios)} studios")
+        self.people = PersonResolver(self.journal)
 
-    @retry_on_db_lock()
-    def sync_movies(self):
+    def prepared_movies(self):
         movies = self.plex.library.section("Movies").all()
         logger.info(f"Found {len(movies)} movies in Plex.")
 
@@ -77,186 +137,146 @@ class Command(BaseCommand):
                 logger.debug(
                     f"Processing movie {index}/{len(movies)}: {plex_movie.title}"
                 )
-                self.process_movie(plex_movie)
+                yield self.prepare_movie(plex_movie)
             except Exception as e:
                 logger.error(f"Error processing movie {plex_movie.title}: {str(e)}")
 
-        logger.info(f"Synced {Movie.objects.count()} movies to the database.")
-
-    @retry_on_db_lock()
-    def sync_shows(self):
+    def prepared_shows(self):
+        """Yield each prepared show with a lazy iterator over its episodes."""
         shows = self.plex.library.section("TV Shows").all()
         logger.info(f"Found {len(shows)} shows in Plex.")
 
         for index, plex_show in enumerate(shows, 1):
             try:
                 logger.debug(f"Processing show {index}/{len(shows)}: {plex_show.title}")
-                self.process_show(plex_show)
+                prepared = self.prepare_show(plex_show)
+                plex_episodes = plex_show.episodes()
             except Exception as e:
                 logger.error(f"Error processing show {plex_show.title}: {str(e)}")
+                continue
+            yield prepared, self.prepared_episodes(plex_episodes)
 
-        logger.info(f"Synced {Show.objects.count()} shows to the database.")
+    def prepared_episodes(self, plex_episodes):
+        for plex_episode in plex_episodes:
+            try:
+                yield self.prepare_episode(plex_episode)
+            except Exception as e:
+                logger.error(f"Error processing episode {plex_episode.title}: {str(e)}")
 
-    @retry_on_db_lock()
-    def process_genres(self, plex_media, content_object):
-        try:
-            genre_objects = []
-            for genre in plex_media.genres:
-                genre_obj, created = Genre.objects.get_or_create(name=genre.tag)
-                genre_objects.append(genre_obj)
-            content_object.genres.set(genre_objects)
-            logger.debug(f"Processed {len(genre_objects)} genres for {content_object}")
-        except Exception as e:
-            logger.error(f"Error processing genres for {content_object}: {str(e)}")
-            logger.error(traceback.format_exc())
+    def prepare_movie(self, plex_movie):
+        """Gather everything a movie write needs; only reads from the database."""
+        movie_data = self.extract_movie_data(plex_movie)
 
-    @retry_on_db_lock()
-    def process_roles(self, plex_media, content_object):
-        try:
-            roles_count = 0
-            for order, plex_role in enumerate(plex_media.roles):
-                person = self.get_or_create_person(plex_role)
-                character_name = self.extract_character_name(
-                    plex_role, plex_media.title
-                )
+        # One TMDB request covers credits, external ids and the trailer
+        tmdb_id = movie_data["tmdb_id"]
+        tmdb_info = self.tmdb_client.get_movie(tmdb_id) if tmdb_id else None
+        stored_trakt_url, stored_trailer_url = (
+            Movie.objects.filter(plex_key=movie_data["plex_key"])
+            .values_list("trakt_url", "trailer_url")
+            .first()
+        ) or (None, None)
+        tmdb_url, trakt_url, imdb_url = build_movie_links(
+            tmdb_id, tmdb_info, trakt_url=stored_trakt_url
+        )
+        movie_data.update(
+            {"tmdb_url": tmdb_url, "trakt_url": trakt_url, "imdb_url": imdb_url}
+        )
 
-                role_data = {
-                    "character_name": character_name,
-                    "role_type": "ACTOR",
-                    "order": order,
-                }
-
-                if isinstance(content_object, Movie):
-                    role_data["movie"] = content_object
-                elif isinstance(content_object, Show):
-                    role_data["show"] = content_object
-                elif isinstance(content_object, Episode):
-                    role_data["episode"] = content_object
-                else:
-                    raise ValueError(
-                        f"Unsupported content object type: {type(content_object)}"
-                    )
+        if not stored_trailer_url:
+            movie_data["trailer_url"] = self.find_trailer(
+                plex_movie.title, tmdb_id, tmdb_info
+            )
 
-                Role.objects.update_or_create(
-                    person=person,
-                    **{k: v for k, v in role_data.items() if k != "character_name"},
-                    defaults={"character_name": character_name},
-                )
-                roles_count += 1
-            logger.debug(f"Processed {roles_count} roles for {content_object}")
-        except Exception as e:
-            logger.error(f"Error processing roles for {content_object}: {str(e)}")
-            logger.error(traceback.format_exc())
-
-    @retry_on_db_lock()
-    def get_or_create_person(self, plex_person):
-        full_name = plex_person.tag.split(" as ", 1)[0]
-        first_name, last_name = self.split_name(full_name)
-
-        person, created = Person.objects.get_or_create(
-            first_name=first_name,
-            last_name=last_name,
-            defaults={"photo_url": getattr(plex_person, "thumb", None)},
-        )
+        return {
+            "movie": movie_data,
+            "studio": plex_movie.studio,
+            "genres": ", ".join(genre.tag for genre in plex_movie.genres),
+            "credits": extract_credits(plex_movie.roles, "ACTOR", tmdb_info),
+        }
 
-        if not created and person.photo_url != getattr(plex_person, "thumb", None):
-            person.photo_url = getattr(plex_person, "thumb", None)
-            person.save()
+    def prepare_show(self, plex_show):
+        show_data = self.extract_show_data(plex_show)
+        return {
+            "show": show_data,
+            "studio": plex_show.studio,
+            "genres": ", ".join(genre.tag for genre in plex_show.genres),
+            "credits": extract_credits(plex_show.roles, "ACTOR"),
+        }
 
-        return person
+    def prepare_episode(self, plex_episode):
+        return {
+            "episode": self.extract_episode_data(plex_episode, None),
+            "credits": extract_credits(plex_episode.roles, "ACTOR"),
+        }
 
-    @staticmethod
-    def extract_character_name(plex_role, title):
-        if " as " in plex_role.tag:
-            _, character_name = plex_role.tag.split(" as ", 1)
-            return character_name.strip()
-        return None
+    def find_trailer(self, title, tmdb_id, tmdb_info):
+        try:
+            trailer_url = self.trailer_fetcher.find_trailer_url(
+                title, tmdb_id, tmdb_info, details_fetched=True
+            )
+            if trailer_url:
+                logger.info(f"Found trailer URL for movie: {title}")
+            else:
+                logger.warning(f"No trailer found for movie: {title}")
+            return trailer_url
+        except Exception as e:
+            logger.error(f"Error fetching trailer for movie {title}: {str(e)}")
+            return None
 
-    @transaction.atomic
-    @retry_on_db_lock()
-    def process_movie(self, plex_movie):
-        movie_data = self.extract_movie_data(plex_movie)
+    def write_movie(self, prepared):
+        movie_data = {
+            **prepared["movie"],
+            "studio": self.get_or_create_studio(prepared["studio"]),
+        }
         movie, created = Movie.objects.update_or_create(
             plex_key=movie_data["plex_key"], defaults=movie_data
         )
-        self.process_genres(plex_movie, movie)
-        self.process_roles(plex_movie, movie)
+        movie.genres.set(get_or_create_genres(prepared["genres"]))
+        save_credits(self.people, prepared["credits"], movie=movie)
 
-        # Fetch and update movie links
-        tmdb_url, trakt_url, imdb_url = fetch_movie_links(movie)
-        movie.tmdb_url = tmdb_url
-        movie.trakt_url = trakt_url
-        movie.imdb_url = imdb_url
-        movie.save()
-
-        if created or not movie.trailer_url:
-            try:
-                trailer_url = self.trailer_fetcher.fetch_trailer_url(movie)
-                if trailer_url:
-                    movie.trailer_url = trailer_url
-                    movie.save()
-                    logger.info(f"Added trailer URL for movie: {movie.title}")
-                else:
-                    logger.warning(f"No trailer found for movie: {movie.title}")
-            except Exception as e:
-                logger.error(
-                    f"Error fetching trailer for movie {movie.title}: {str(e)}"
-                )
-
-    @transaction.atomic
-    @retry_on_db_lock()
-    def process_show(self, plex_show):
-        show_data = self.extract_show_data(plex_show)
+    def write_show(self, prepared):
+        show_data = {
+            **prepared["show"],
+            "studio": self.get_or_create_studio(prepared["studio"]),
+        }
         show, created = Show.objects.update_or_create(
             plex_key=show_data["plex_key"], defaults=show_data
         )
-        self.process_genres(plex_show, show)
-        self.process_roles(plex_show, show)
-
-        # if created or not show.trailer_url:
-        #     try:
-        #         trailer_url = self.trailer_fetcher.fetch_trailer_url(show)
-        #         if trailer_url:
-        #             show.trailer_url = trailer_url
-        #             show.save()
-        #             logger.info(f"Added trailer URL for show: {show.title}")
-        #         else:
-        #             logger.warning(f"No trailer found for show: {show.title}")
-        #     except Exception as e:
-        #         logger.error(f"Error fetching trailer for show {show.title}: {str(e)}")
-
-        for plex_episode in plex_show.episodes():
-            self.process_episode(plex_episode, show)
-
-    @retry_on_db_lock()
-    def process_episode(self, plex_episode, show):
-        episode_data = self.extract_episode_data(plex_episode, show.id)
+        show.genres.set(get_or_create_genres(prepared["genres"]))
+        save_credits(self.people, prepared["credits"], show=show)
+
+        # Series regulars are read from the show's roles in compact mode
+        self.journal.set(
+            self.regular_ids,
+            show.plex_key,
+            get_series_regular_ids(show) if compact_episode_roles_enabled() else set(),
+        )
+
+    def write_episode(self, prepared, show_plex_key):
+        show = Show.objects.only("id").filter(plex_key=show_plex_key).first()
+        if show is None:
+            raise LookupError(f"Show {show_plex_key} was not written")
+        episode_data = {**prepared["episode"], "show_id": show.id}
         episode, created = Episode.objects.update_or_create(
             plex_key=episode_data["plex_key"], defaults=episode_data
         )
-        self.process_roles(plex_episode, episode)
-
-    @staticmethod
-    def split_name(full_name):
-        name_parts = full_name.split(maxsplit=1)
-        return (
-            (name_parts[0], name_parts[1])
-            if len(name_parts) == 2
-            else (name_parts[0], "")
+        save_credits(
+            self.people,
+            prepared["credits"],
+            skip_person_ids=self.regular_ids.get(show_plex_key, frozenset()),
+            episode=episode,
         )
 
-    @retry_on_db_lock()
     def get_or_create_studio(self, studio_name):
         if not studio_name:
             return None
         if studio_name in self.existing_studios:
             return self.existing_studios[studio_name]
         studio, created = Studio.objects.get_or_create(name=studio_name)
-        self.existing_studios[studio_name] = studio
+        self.journal.set(self.existing_studios, studio_name, studio)
         return studio
 
     def extract_movie_data(self, plex_movie):
-        studio = self.get_or_create_studio(plex_movie.studio)
         return {
             "plex_key": str(plex_movie.ratingKey),
             "title": plex_movie.title,
@@ -273,7 +293,7 @@ class Command(BaseCommand):
                 None,
             ),
             "content_rating": plex_movie.contentRating,
-            "studio": studio,
+            "studio": None,  # Set at write time from the Plex studio name
             "originally_available_at": (
                 make_aware(plex_movie.originallyAvailableAt)
                 if plex_movie.originallyAvailableAt
@@ -302,7 +322,6 @@ class Command(BaseCommand):
         }
 
     def extract_show_data(self, plex_show):
-        studio = self.get_or_create_studio(plex_show.studio)
         return {
             "plex_key": str(plex_show.ratingKey),
             "title": plex_show.title,
@@ -324,7 +343,7 @@ class Command(BaseCommand):
             "content_rating": plex_show.contentRating,
             "art": f"{settings.PLEX_URL}{plex_show.art}?X-Plex-Token={settings.PLEX_TOKEN}",
             "tagline": plex_show.tagline,
-            "studio": studio,
+            "studio": None,  # Set at write time from the Plex studio name
             "audience_rating": plex_show.audienceRating,
             "audience_rating_image": plex_show.audienceRatingImage,
             "added_at": make_aware(plex_show.addedAt) if plex_show.addedAt else None,
@@ -3,13 +3,16 @@
 import requests
 from django.conf import settings
 from django.core.management.base import BaseCommand
-from django.db import transaction
 from django.utils.timezone import make_aware
 from plexapi.server import PlexServer
 
+from sync.helpers.episode_roles import (
+    compact_episode_roles_enabled,
+    get_series_regular_ids,
+)
+from sync.helpers.people import PersonResolver, extract_credits, save_credits
+from sync.helpers.transactions import ChunkedWriter, RollbackJournal
 from sync.models.episode import Episode
-from sync.models.person import Person
-from sync.models.role import Role
 from sync.models.show import Show
 from sync.models.studio import Studio
 from utils.genre_utils import get_or_create_genres
@@ -24,6 +27,7 @@ class Command(BaseCommand):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self.journal = RollbackJournal()
         self.trailer_fetcher = TrailerFetcher(
             tmdb_api_url=settings.TMDB_API_URL,
             tmdb_api_key=settings.TMDB_API_KEY,
@@ -31,26 +35,47 @@ class Command(BaseCommand):
         )
 
         self.tmdb_cache = {}
+        self.regular_ids = {}
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=None,
+            help="Commit after this many shows and episodes (default: SYNC_CHUNK_SIZE)",
+        )
+        parser.add_argument(
+            "--chunk-ms",
+            type=int,
+            default=None,
+            help="Commit once a pending write has waited this long (default: SYNC_CHUNK_MS)",
+        )
 
-    def handle(self, *args, **kwargs):
+    def handle(self, *args, **options):
         try:
             plex = PlexServer(settings.PLEX_URL, settings.PLEX_TOKEN)
             shows = plex.library.section("TV Shows").all()
             logger.info(f"Found {len(shows)} shows in Plex.")
 
-            existing_shows = {show.plex_key: show for show in Show.objects.all()}
+            existing_shows = {str(show.plex_key): show for show in Show.objects.all()}
             existing_episodes = {
-                episode.plex_key: episode for episode in Episode.objects.all()
+                str(episode.plex_key): episode for episode in Episode.objects.all()
             }
-            existing_people = {
-                f"{person.first_name} {person.last_name}": person
-                for person in Person.objects.all()
-            }
-
-            for plex_show in shows:
-                self.process_show(
-                    plex_show, existing_shows, existing_episodes, existing_people
-                )
+            people = PersonResolver(self.journal)
+
+            def on_error(title, error):
+                logger.error(f"Error processing {title}: {str(error)}")
+
+            with ChunkedWriter(
+                chunk_size=options.get("chunk_size"),
+                chunk_ms=options.get("chunk_ms"),
+                on_error=on_error,
+                journal=self.journal,
+            ) as writer:
+                for plex_show in shows:
+                    self.process_show(
+                        plex_show, existing_shows, existing_episodes, people, writer
+                    )
 
             logger.info("Show, episode, and role sync completed successfully.")
 
@@ -60,212 +85,155 @@ class Command(BaseCommand):
             logger.error(f"Unexpected error: {str(e)}")
 
     def process_show(
-        self, plex_show, existing_shows, existing_episodes, existing_people
+        self, plex_show, existing_shows, existing_episodes, people, writer
     ):
-        try:
-            show_data = self.extract_show_data(plex_show)
-            plex_key = show_data["plex_key"]
-            genres = ", ".join([g.tag for g in plex_show.genres])
-
-            studio_name = plex_show.studio
-            if studio_name:
-                studio, _ = Studio.objects.get_or_create(name=studio_name)
-                show_data["studio"] = studio
-
-            with transaction.atomic():
-                show, created = Show.objects.update_or_create(
-                    plex_key=plex_key, defaults=show_data
-                )
-
-                if created:
-                    existing_shows[plex_key] = show
-                    logger.info(f"Created new show: {show.title}")
-                else:
-                    logger.debug(f"Updated existing show: {show.title}")
-
-                genre_objects = get_or_create_genres(genres)
-                show.genres.set(genre_objects)
-
-                self.process_roles(plex_show, show, existing_people)
-                self.process_episodes(
-                    plex_show, show, existing_episodes, existing_people
-                )
-
-                if created or not show.trailer_url:
-                    self.fetch_show_trailer(show)
+        """
+        Prepare a show and its episodes and queue their writes.
 
+        All Plex and TMDB requests happen here, outside of any transaction. The
+        show is queued before its episodes, so it is always written first.
+        """
+        try:
+            prepared = self.prepare_show(plex_show, existing_shows)
+            plex_episodes = plex_show.episodes()
         except Exception as e:
             logger.error(f"Error processing show {plex_show.title}: {str(e)}")
+            return
+
+        plex_key = str(prepared["show"]["plex_key"])
+        writer.add(
+            f"show {plex_show.title}",
+            self.write_show,
+            prepared,
+            existing_shows,
+            people,
+        )
 
-    def fetch_show_trailer(self, show):
-        if not show.trailer_url:
+        for plex_episode in plex_episodes:
             try:
-                trailer_url = self.trailer_fetcher.fetch_trailer_url(show)
-                if trailer_url:
-                    show.trailer_url = trailer_url
-                    show.save()
-                    logger.info(f"Added trailer URL for show: {show.title}")
-                else:
-                    logger.warning(f"No trailer found for show: {show.title}")
+                prepared_episode = self.prepare_episode(
+                    plex_episode, prepared["show"]["tmdb_id"]
+                )
             except Exception as e:
-                logger.error(f"Error fetching trailer for show {show.title}: {str(e)}")
+                logger.error(f"Error processing episode {plex_episode.title}: {str(e)}")
+                continue
+            writer.add(
+                f"episode {plex_episode.title}",
+                self.write_episode,
+                prepared_episode,
+                plex_key,
+                existing_shows,
+                existing_episodes,
+                people,
+            )
 
-    def process_roles(self, plex_show, db_show, existing_people):
-        # Instead of deleting all roles, we'll update or create as needed
-        tmdb_show_info = (
-            self.get_tmdb_show(db_show.tmdb_id) if db_show.tmdb_id else None
-        )
-        self.process_role_type(
-            plex_show.roles, db_show, existing_people, "ACTOR", tmdb_show_info
-        )
+    def prepare_show(self, plex_show, existing_shows):
+        show_data = self.extract_show_data(plex_show)
+        existing_show = existing_shows.get(str(show_data["plex_key"]))
+        tmdb_id = show_data["tmdb_id"]
 
-    def process_episodes(self, plex_show, db_show, existing_episodes, existing_people):
-        for plex_episode in plex_show.episodes():
-            try:
-                episode_data = self.extract_episode_data(plex_episode, db_show.id)
-                plex_key = episode_data["plex_key"]
-
-                if plex_key in existing_episodes:
-                    episode = existing_episodes[plex_key]
-                    for key, value in episode_data.items():
-                        setattr(episode, key, value)
-                    episode.save()
-                    logger.debug(f"Updated existing episode: {episode.title}")
-                else:
-                    episode = Episode.objects.create(**episode_data)
-                    existing_episodes[plex_key] = episode
-                    logger.info(f"Created new episode: {episode.title}")
-
-                self.process_episode_roles(plex_episode, episode, existing_people)
+        if not (existing_show and existing_show.trailer_url):
+            show_data["trailer_url"] = self.find_show_trailer(plex_show.title, tmdb_id)
 
-            except Exception as e:
-                logger.error(f"Error processing episode {plex_episode.title}: {str(e)}")
+        tmdb_show_info = self.get_tmdb_show(tmdb_id) if tmdb_id else None
+        return {
+            "show": show_data,
+            "studio": plex_show.studio,
+            "genres": ", ".join([g.tag for g in plex_show.genres]),
+            "credits": extract_credits(plex_show.roles, "ACTOR", tmdb_show_info),
+        }
 
-    def process_episode_roles(self, plex_episode, db_episode, existing_people):
+    def find_show_trailer(self, title, tmdb_id):
+        try:
+            trailer_url = self.trailer_fetcher.find_trailer_url(title, tmdb_id)
+            if trailer_url:
+                logger.info(f"Found trailer URL for show: {title}")
+            else:
+                logger.warning(f"No trailer found for show: {title}")
+            return trailer_url
+        except Exception as e:
+            logger.error(f"Error fetching trailer for show {title}: {str(e)}")
+            return None
+
+    def prepare_episode(self, plex_episode, show_tmdb_id):
+        episode_data = self.extract_episode_data(plex_episode, None)
         tmdb_episode_info = (
             self.get_tmdb_episode(
-                db_episode.show.tmdb_id,
-                db_episode.season_number,
-                db_episode.episode_number,
+                show_tmdb_id,
+                episode_data["season_number"],
+                episode_data["episode_number"],
             )
-            if db_episode.show.tmdb_id
+            if show_tmdb_id
             else None
         )
 
-        self.process_role_type(
-            plex_episode.roles,
-            db_episode,
-            existing_people,
-            "ACTOR",
-            tmdb_episode_info,
-            is_episode=True,
-        )
-
+        credits = extract_credits(plex_episode.roles, "ACTOR", tmdb_episode_info)
         if hasattr(plex_episode, "directors"):
-            self.process_role_type(
-                plex_episode.directors,
-                db_episode,
-                existing_people,
-                "DIRECTOR",
-                is_episode=True,
+            credits += extract_credits(
+                plex_episode.directors, "DIRECTOR", tmdb_episode_info
             )
-
         if hasattr(plex_episode, "writers"):
-            self.process_role_type(
-                plex_episode.writers,
-                db_episode,
-                existing_people,
-                "WRITER",
-                is_episode=True,
+            credits += extract_credits(
+                plex_episode.writers, "WRITER", tmdb_episode_info
             )
 
-    def process_role_type(
-        self,
-        plex_roles,
-        db_object,
-        existing_people,
-        role_type,
-        tmdb_info=None,
-        is_episode=False,
-    ):
-        for plex_role in plex_roles:
-            try:
-                person = self.get_or_create_person(plex_role, existing_people)
-                character_name = None
-
-                if role_type == "ACTOR":
-                    character_name = self.extract_character_name(
-                        plex_role, db_object.title
-                    )
-                    if character_name is None and tmdb_info:
-                        character_name = self.get_character_name_from_tmdb(
-                            tmdb_info, person.full_name
-                        )
-
-                role_data = {
-                    "person": person,
-                    "role_type": role_type,
-                    "character_name": character_name,
-                }
-
-                if is_episode:
-                    role_data["episode"] = db_object
-                    existing_role = Role.objects.filter(
-                        person=person, episode=db_object, role_type=role_type
-                    ).first()
-                else:
-                    role_data["show"] = db_object
-                    existing_role = Role.objects.filter(
-                        person=person, show=db_object, role_type=role_type
-                    ).first()
-
-                if existing_role:
-                    for key, value in role_data.items():
-                        setattr(existing_role, key, value)
-                    existing_role.save()
-                    logger.debug(
-                        f"Updated existing {role_type.lower()} role: {person.full_name} in {db_object.title}"
-                    )
-                else:
-                    Role.objects.create(**role_data)
-                    logger.debug(
-                        f"Created new {role_type.lower()} role: {person.full_name} in {db_object.title}"
-                    )
+        return {"episode": episode_data, "credits": credits}
 
-            except Exception as e:
-                logger.error(
-                    f"Error processing {role_type.lower()} role for {plex_role.tag} in {db_object.title}: {str(e)}"
-                )
+    def write_show(self, prepared, existing_shows, people):
+        show_data = prepared["show"]
+        if prepared["studio"]:
+            show_data["studio"], _ = Studio.objects.get_or_create(
+                name=prepared["studio"]
+            )
 
-    def get_or_create_person(self, plex_person, existing_persons):
-        full_name = plex_person.tag.split(" as ", 1)[0]
-        first_name, last_name = self.split_name(full_name)
+        show, created = Show.objects.update_or_create(
+            plex_key=show_data["plex_key"], defaults=show_data
+        )
+        self.journal.set(existing_shows, str(show.plex_key), show)
 
-        if full_name in existing_persons:
-            person = existing_persons[full_name]
-            if person.photo_url != getattr(plex_person, "thumb", None):
-                person.photo_url = getattr(plex_person, "thumb", None)
-                person.save()
+        if created:
+            logger.info(f"Created new show: {show.title}")
         else:
-            person = Person.objects.create(
-                first_name=first_name,
-                last_name=last_name,
-                photo_url=getattr(plex_person, "thumb", None),
-            )
-            existing_persons[full_name] = person
+            logger.debug(f"Updated existing show: {show.title}")
 
-        return person
+        genre_objects = get_or_create_genres(prepared["genres"])
+        show.genres.set(genre_objects)
 
-    def extract_character_name(self, plex_role, title):
-        logger.debug(f"Extracting character name for role: {plex_role.tag} in {title}")
+        save_credits(people, prepared["credits"], show=show)
 
-        if " as " in plex_role.tag:
-            actor_name, character_name = plex_role.tag.split(" as ", 1)
-            logger.debug(f"Extracted character name from tag: {character_name}")
-            return character_name.strip()
+        # Series regulars are read from the show's roles in compact mode
+        self.journal.set(
+            self.regular_ids,
+            show.pk,
+            get_series_regular_ids(show) if compact_episode_roles_enabled() else set(),
+        )
 
-        logger.debug(f"Could not extract character name for {plex_role.tag} in {title}")
-        return None
+    def write_episode(
+        self, prepared, show_plex_key, existing_shows, existing_episodes, people
+    ):
+        show = existing_shows.get(show_plex_key)
+        if show is None:
+            raise LookupError(f"Show {show_plex_key} was not written")
+        episode_data = {**prepared["episode"], "show_id": show.id}
+        plex_key = str(episode_data["plex_key"])
+
+        if plex_key in existing_episodes:
+            episode = existing_episodes[plex_key]
+            for key, value in episode_data.items():
+                self.journal.setattr(episode, key, value)
+            episode.save()
+            logger.debug(f"Updated existing episode: {episode.title}")
+        else:
+            episode = Episode.objects.create(**episode_data)
+            self.journal.set(existing_episodes, plex_key, episode)
+            logger.info(f"Created new episode: {episode.title}")
+
+        save_credits(
+            people,
+            prepared["credits"],
+            skip_person_ids=self.regular_ids.get(show.pk, frozenset()),
+            episode=episode,
+        )
 
     def get_tmdb_show(self, tmdb_id):
         if tmdb_id in self.tmdb_cache:
@@ -302,22 +270,6 @@ class Command(BaseCommand):
             )
             return None
 
-    def get_character_name_from_tmdb(self, tmdb_info, actor_name):
-        if not tmdb_info or "credits" not in tmdb_info:
-            return None
-        for cast in tmdb_info["credits"].get("cast", []):
-            if cast["name"].lower() == actor_name.lower():
-                return cast["character"]
-        return None
-
-    @staticmethod
-    def split_name(full_name):
-        name_parts = full_name.split(maxsplit=1)
-        if len(name_parts) == 2:
-            return name_parts[0], name_parts[1]
-        else:
-            return name_parts[0], ""
-
     def make_aware_if_naive(self, dt):
         return make_aware(dt) if dt and dt.tzinfo is None else dt
 
@@ -343,7 +295,7 @@ class Command(BaseCommand):
             "content_rating": plex_show.contentRating,
             "art": f"{settings.PLEX_URL}{plex_show.art}?X-Plex-Token={settings.PLEX_TOKEN}",
             "tagline": plex_show.tagline,
-            "studio": None,  # This will be set in process_show if a studio exists
+            "studio": None,  # This will be set in write_show if a studio exists
             "audience_rating": plex_show.audienceRating,
             "audience_rating_image": plex_show.audienceRatingImage,
             "originally_available_at": self.make_aware_if_naive(
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.1 on 2026-10-19 02:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sync", "0008_movie_imdb_url_movie_tmdb_url_movie_trakt_url"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LibraryState",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("version", models.PositiveBigIntegerField(default=1)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Library state",
+                "verbose_name_plural": "Library state",
+            },
+        ),
+    ]
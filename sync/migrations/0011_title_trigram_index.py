@@ -0,0 +1,37 @@
+# sync/migrations/0011_title_trigram_index.py
+
+from django.db import migrations
+
+TRIGRAM_TABLES = ["sync_movie", "sync_show"]
+
+
+# Only PostgreSQL gets a database index; elsewhere picker.helpers.trigram_index
+# keeps an in-process one. Creating the extension needs a role allowed to do so
+# (the database owner on PostgreSQL 13+, where pg_trgm is a trusted extension).
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for table in TRIGRAM_TABLES:
+        schema_editor.execute(
+            f"CREATE INDEX {table}_title_trgm_idx ON {table} "
+            f"USING GIN (title gin_trgm_ops)"
+        )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for table in TRIGRAM_TABLES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {table}_title_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sync", "0009_librarystate"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
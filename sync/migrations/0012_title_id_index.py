@@ -0,0 +1,25 @@
+# Generated by Django 5.1.1 on 2026-10-19 02:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sync", "0011_title_trigram_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="movie",
+            index=models.Index(
+                fields=["title", "id"], name="sync_movie_title_a8f62b_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="show",
+            index=models.Index(
+                fields=["title", "id"], name="sync_show_title_2c35da_idx"
+            ),
+        ),
+    ]
@@ -2,6 +2,7 @@
 
 from .episode import Episode
 from .genre import Genre
+from .library_state import LibraryState
 from .mixins import FormattedActorsMixin, FormattedDurationMixin, FormattedGenresMixin
 from .movie import Movie
 from .person import Person
@@ -3,9 +3,11 @@
 
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import Q
 
 from sync.models.mixins import FormattedActorsMixin, FormattedDurationMixin
 from sync.models.person import Person
+from sync.models.role import Role
 from sync.models.show import Show
 
 
@@ -56,7 +58,14 @@ class Episode(
         return self.roles.filter(role_type=role_type).select_related("person")
 
     def get_actors(self):
-        return self.get_roles_by_type("ACTOR")
+        # Series regulars may only be stored on the show (compact episode roles)
+        episode_actors = Role.objects.filter(episode=self, role_type="ACTOR")
+        regulars = Q(show_id=self.show_id) & ~Q(
+            person__in=episode_actors.values("person")
+        )
+        return Role.objects.filter(
+            Q(episode=self) | regulars, role_type="ACTOR"
+        ).select_related("person")
 
     def get_directors(self):
         return self.get_roles_by_type("DIRECTOR")
@@ -68,7 +77,7 @@ class Episode(
         return Person.objects.filter(roles__episode=self, roles__role_type=role_type)
 
     def get_cast(self):
-        return self.get_people_by_role("ACTOR")
+        return Person.objects.filter(roles__in=self.get_actors())
 
     def clean(self):
         """Custom validation to ensure data integrity."""
@@ -0,0 +1,20 @@
+# sync/models/library_state.py
+
+from django.db import models
+
+
+class LibraryState(models.Model):
+    """
+    Single row holding the library version, a counter bumped in the same
+    transaction as every catalog change. See sync.helpers.library_version.
+    """
+
+    version = models.PositiveBigIntegerField(default=1)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Library state"
+        verbose_name_plural = "Library state"
+
+    def __str__(self):
+        return f"Library version {self.version}"
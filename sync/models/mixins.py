@@ -6,7 +6,7 @@ from io import BytesIO
 import requests
 from django.conf import settings
 from django.core.files.base import ContentFile
-from django.db import models
+from django.db import models, transaction
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from PIL import Image
@@ -27,11 +27,7 @@ class FormattedDurationMixin:
 
 class FormattedActorsMixin:
     def formatted_actors(self, limit=None):
-        actor_roles = (
-            self.roles.filter(role_type="ACTOR")
-            .select_related("person")
-            .order_by("order", "id")
-        )
+        actor_roles = self.get_actors().order_by("order", "id")
         if limit:
             actor_roles = actor_roles[:limit]
         if not actor_roles:
@@ -135,10 +131,12 @@ class ImageOptimizationMixin(models.Model):
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
         if not self._optimizing:
-            self.optimize_images()
+            # Downloading images must not hold the sync's write transaction open
+            transaction.on_commit(self.optimize_images)
 
 
 @receiver(post_save, sender="sync.Movie")
 @receiver(post_save, sender="sync.Show")
 def optimize_media_images(sender, instance, created, **kwargs):
-    instance.optimize_images()
+    if not instance._optimizing:
+        transaction.on_commit(instance.optimize_images)
@@ -73,6 +73,8 @@ class Movie(
         indexes = [
             models.Index(fields=["year"]),
             models.Index(fields=["tmdb_id"]),
+            # Keyset pagination of the browse lists
+            models.Index(fields=["title", "id"]),
         ]
 
     def __str__(self):
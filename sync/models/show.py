@@ -76,6 +76,8 @@ class Show(
         indexes = [
             models.Index(fields=["year"]),
             models.Index(fields=["tmdb_id"]),
+            # Keyset pagination of the browse lists
+            models.Index(fields=["title", "id"]),
         ]
 
     def __str__(self):
@@ -0,0 +1,105 @@
+# tests/picker/test_keyset.py
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from picker.helpers.keyset import (
+    decode_cursor,
+    encode_cursor,
+    keyset_page,
+    ranked_page,
+)
+from sync.models import Movie
+
+
+class KeysetPageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Duplicate titles are ordered by id
+        cls.movies = [
+            Movie.objects.create(title=title, plex_key=str(i))
+            for i, title in enumerate(["Alien", "Alien", "Brazil", "Casino", "Dune"])
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def titles(self, page):
+        return [(movie.title, movie.pk) for movie in page]
+
+    def expected(self, start, end):
+        return [(movie.title, movie.pk) for movie in self.movies[start:end]]
+
+    def test_cursor_round_trip(self):
+        self.assertEqual(decode_cursor(encode_cursor(["Alien", 3])), ["Alien", 3])
+        self.assertIsNone(decode_cursor("not a cursor!"))
+        self.assertIsNone(decode_cursor(None))
+
+    def test_walks_forward_and_back(self):
+        first = keyset_page(Movie.objects.all(), 2)
+        self.assertEqual(self.titles(first), self.expected(0, 2))
+        self.assertFalse(first.has_previous())
+        self.assertEqual(first.count, 5)
+
+        second = keyset_page(Movie.objects.all(), 2, after=first.next_cursor)
+        self.assertEqual(self.titles(second), self.expected(2, 4))
+        third = keyset_page(Movie.objects.all(), 2, after=second.next_cursor)
+        self.assertEqual(self.titles(third), self.expected(4, 5))
+        self.assertFalse(third.has_next())
+
+        back = keyset_page(Movie.objects.all(), 2, before=third.previous_cursor)
+        self.assertEqual(self.titles(back), self.expected(2, 4))
+        start = keyset_page(Movie.objects.all(), 2, before=back.previous_cursor)
+        self.assertEqual(self.titles(start), self.expected(0, 2))
+        self.assertFalse(start.has_previous())
+        self.assertTrue(start.has_next())
+
+    def test_count_is_cached(self):
+        keyset_page(Movie.objects.all(), 2)
+        with self.assertNumQueries(1):
+            page = keyset_page(Movie.objects.all(), 2)
+        self.assertEqual(page.count, 5)
+
+    def test_invalid_cursor_starts_over(self):
+        bad = encode_cursor({"title": "x"})
+        page = keyset_page(Movie.objects.all(), 2, after=bad)
+        self.assertEqual(self.titles(page), self.expected(0, 2))
+
+    def test_ranked_page(self):
+        ids = list(range(25))
+        first = ranked_page(ids, 10)
+        self.assertEqual(first.object_list, ids[:10])
+        last = ranked_page(
+            ids, 10, after=ranked_page(ids, 10, after=first.next_cursor).next_cursor
+        )
+        self.assertEqual(last.object_list, ids[20:])
+        self.assertFalse(last.has_next())
+        back = ranked_page(ids, 10, before=last.previous_cursor)
+        self.assertEqual(back.object_list, ids[10:20])
+        self.assertEqual(back.count, 25)
+
+    def test_view_returns_cursors(self):
+        Movie.objects.bulk_create(
+            Movie(title=f"Zed {i:02}", plex_key=f"z{i}") for i in range(10)
+        )
+        response = self.client.get(
+            reverse("plex_content"), HTTP_X_REQUESTED_WITH="XMLHttpRequest"
+        )
+        data = response.json()
+        self.assertEqual(len(data["movies"]), 10)
+        self.assertIsNone(data["movie_previous"])
+        self.assertEqual(data["movie_count"], 15)
+
+        response = self.client.get(
+            reverse("plex_content"),
+            {"movie_after": data["movie_next"]},
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest",
+        )
+        data = response.json()
+        self.assertEqual(
+            [movie["title"] for movie in data["movies"]],
+            [f"Zed {i:02}" for i in range(5, 10)],
+        )
+        self.assertIsNone(data["movie_next"])
+        self.assertIsNotNone(data["movie_previous"])
@@ -0,0 +1,79 @@
+# tests/picker/test_middleware.py
+
+from itertools import count
+
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseServerError
+from django.test import TestCase, override_settings
+from django.urls import path
+from django.views.decorators.cache import never_cache
+from django.views.decorators.vary import vary_on_headers
+
+from sync.helpers.library_version import bump_library_version
+
+renders = count(1)
+
+
+def counter_view(request):
+    return HttpResponse(f"render {next(renders)}")
+
+
+@vary_on_headers("X-Requested-With")
+def varied_view(request):
+    kind = "ajax" if request.headers.get("x-requested-with") else "html"
+    return HttpResponse(f"{kind} {next(renders)}")
+
+
+@never_cache
+def never_cached_view(request):
+    return HttpResponse(f"render {next(renders)}")
+
+
+def error_view(request):
+    return HttpResponseServerError(f"render {next(renders)}")
+
+
+urlpatterns = [
+    path("counter/", counter_view),
+    path("varied/", varied_view),
+    path("never/", never_cached_view),
+    path("error/", error_view),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class VersionedCacheMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def get(self, url, **extra):
+        return self.client.get(url, **extra).content.decode()
+
+    def test_pages_are_served_from_cache(self):
+        self.assertEqual(self.get("/counter/"), self.get("/counter/"))
+
+    def test_library_version_bump_misses_cache(self):
+        first = self.get("/counter/")
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_library_version()
+
+        second = self.get("/counter/")
+        self.assertNotEqual(first, second)
+        self.assertEqual(second, self.get("/counter/"))
+
+    def test_never_cache_responses_are_not_stored(self):
+        self.assertNotEqual(self.get("/never/"), self.get("/never/"))
+
+    def test_error_responses_are_not_stored(self):
+        self.assertNotEqual(self.get("/error/"), self.get("/error/"))
+
+    def test_ajax_and_html_responses_are_cached_separately(self):
+        html = self.get("/varied/")
+        ajax = self.get("/varied/", HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+
+        self.assertTrue(html.startswith("html"))
+        self.assertTrue(ajax.startswith("ajax"))
+        self.assertEqual(self.get("/varied/"), html)
+        self.assertEqual(
+            self.get("/varied/", HTTP_X_REQUESTED_WITH="XMLHttpRequest"), ajax
+        )
@@ -47,11 +47,11 @@ class TestRandomMovieHelpers(TestCase):
     @patch("sync.models.Movie.objects.all")
     def test_get_random_movies(self, mock_all):
         mock_queryset = MagicMock()
-        mock_queryset.order_by.return_value = [
-            self.movie1,
-            self.movie2,
-            self.movie3,
-            self.movie5,
+        mock_queryset.values_list.return_value = [
+            self.movie1.pk,
+            self.movie2.pk,
+            self.movie3.pk,
+            self.movie5.pk,
         ]
         mock_all.return_value = mock_queryset
         movies = get_random_movies(mock_all.return_value, 2)
@@ -71,3 +71,10 @@ class TestRandomMovieHelpers(TestCase):
                 for movie in movies
             )
         )
+        mock_queryset.order_by.assert_not_called()
+
+    def test_get_random_movies_with_fewer_matches(self):
+        movies = get_random_movies(Movie.objects.filter(genres__name="Action"), 4)
+        self.assertEqual(
+            sorted(movie.pk for movie in movies), [self.movie1.pk, self.movie2.pk]
+        )
@@ -0,0 +1,177 @@
+# tests/picker/test_movie_index.py
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from picker.helpers.movie_index import (
+    MovieIndex,
+    pick_random_movies,
+    reset_movie_index,
+)
+from picker.helpers.shuffle_deck import ShuffleDeck
+from sync.helpers.library_version import bump_library_version
+from sync.models import Genre, Movie
+
+
+class MovieIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        action = Genre.objects.create(name="Action")
+        comedy = Genre.objects.create(name="Comedy")
+        cls.action_comedy = Movie.objects.create(
+            title="Action Comedy",
+            summary="Two genres.",
+            plex_key="1",
+            year=1999,
+            duration=90 * 60 * 1000,
+            rotten_tomatoes_rating=80,
+        )
+        cls.action_comedy.genres.set([action, comedy])
+        cls.action = Movie.objects.create(
+            title="Action",
+            plex_key="2",
+            year=2010,
+            duration=150 * 60 * 1000,
+            rotten_tomatoes_rating=60,
+        )
+        cls.action.genres.set([action])
+        cls.unrated = Movie.objects.create(title="Unrated", plex_key="3")
+
+    def setUp(self):
+        cache.clear()
+        reset_movie_index()
+        self.index = MovieIndex.build()
+
+    def ids(self, **filters):
+        return sorted(self.index.filter(**filters).tolist())
+
+    def test_genres_must_all_match(self):
+        self.assertEqual(
+            self.ids(genres=["Action"]), [self.action_comedy.pk, self.action.pk]
+        )
+        self.assertEqual(self.ids(genres=["Action", "Comedy"]), [self.action_comedy.pk])
+        self.assertEqual(self.ids(genres=["Horror"]), [])
+
+    def test_ranges_skip_missing_values(self):
+        self.assertEqual(self.ids(min_rating=70), [self.action_comedy.pk])
+        self.assertEqual(
+            self.ids(max_duration=120 * 60 * 1000), [self.action_comedy.pk]
+        )
+        self.assertEqual(self.ids(min_year=2000, max_year=2020), [self.action.pk])
+        self.assertEqual(len(self.ids()), 3)
+
+    def test_sample(self):
+        self.assertEqual(len(set(self.index.sample(3))), 3)
+        self.assertEqual(
+            self.index.sample(4, genres=["Comedy"]), [self.action_comedy.pk]
+        )
+
+    def test_pick_random_movies_sees_new_movies(self):
+        self.assertEqual(pick_random_movies(4, min_year=2020), [])
+        new = Movie.objects.create(title="New", plex_key="4", year=2024)
+        self.assertEqual(pick_random_movies(4, min_year=2020), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_library_version()
+        self.assertEqual(pick_random_movies(4, min_year=2020), [new])
+
+    def test_random_movie_view_uses_filters(self):
+        response = self.client.get(
+            reverse("random_movie"), {"genre": ["Action", "Comedy"], "count": 2}
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(f"movies={self.action_comedy.pk}&", response.url)
+
+
+class ShuffleDeckTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        drama = Genre.objects.create(name="Drama")
+        cls.movies = [
+            Movie.objects.create(title=f"Drama {i}", summary="", plex_key=str(i))
+            for i in range(5)
+        ]
+        for movie in cls.movies:
+            movie.genres.set([drama])
+        Movie.objects.create(title="No Genre", plex_key="99")
+
+    def setUp(self):
+        cache.clear()
+        reset_movie_index()
+
+    def test_deck_deals_every_match_before_repeating(self):
+        deck = ShuffleDeck("session", {"genres": ["Drama"]})
+        drawn = deck.draw(2) + deck.draw(2) + deck.draw(1)
+
+        self.assertCountEqual(drawn, [movie.pk for movie in self.movies])
+        # The reshuffled deck does not start with the cards just drawn
+        self.assertNotIn(deck.draw(2)[0], drawn[-1:])
+
+    def test_deck_is_kept_per_filters_and_library_version(self):
+        first = ShuffleDeck("session", {"genres": ["Drama"], "min_year": None})
+        same = ShuffleDeck("session", {"min_year": None, "genres": ["Drama"]})
+        other = ShuffleDeck("other-session", {"genres": ["Drama"], "min_year": None})
+        self.assertCountEqual(
+            first.draw(3) + same.draw(2), [movie.pk for movie in self.movies]
+        )
+        self.assertEqual(len(other.draw(5)), 5)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_library_version()
+        fresh = ShuffleDeck("session", {"genres": ["Drama"], "min_year": None})
+        self.assertNotEqual(fresh.deck_key, first.deck_key)
+
+    def test_random_movie_view_uses_session_deck(self):
+        seen = set()
+        for _ in range(3):
+            response = self.client.get(
+                reverse("random_movie"), {"genre": "Drama", "count": 2}
+            )
+            movie_ids = response.url.split("movies=")[1].split("&")[0]
+            seen.update(movie_ids.split(","))
+
+        self.assertEqual(seen, {str(movie.pk) for movie in self.movies})
+
+    def test_random_movie_view_without_matches_renders_empty_page(self):
+        response = self.client.get(reverse("random_movie"), {"genre": "Nope"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, "random_movie/random_movie.html")
+        self.assertEqual(response.context["movies"], [])
+
+
+class SeededPickTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.movies = [
+            Movie.objects.create(
+                title=f"Movie {i}",
+                summary="",
+                plex_key=str(i),
+                optimized_poster=f"optimized_posters/{i}.webp",
+            )
+            for i in range(10)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        reset_movie_index()
+
+    def test_seed_makes_the_pick_repeatable(self):
+        first = pick_random_movies(3, seed=42)
+        self.assertEqual(len(first), 3)
+        self.assertEqual(pick_random_movies(3, seed=42), first)
+
+    def test_seeded_view_renders_without_redirect_and_is_cacheable(self):
+        url = reverse("random_movie")
+        response = self.client.get(url, {"count": 2, "seed": 7})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("public", response["Cache-Control"])
+        self.assertIn("max-age", response["Cache-Control"])
+        movies = response.context["movies"]
+        self.assertEqual(movies, pick_random_movies(2, seed=7))
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(url, {"count": 2, "seed": 7})
+        self.assertEqual(cached.content, response.content)
@@ -0,0 +1,109 @@
+# tests/picker/test_pick_pools.py
+
+from django.contrib.sessions.backends.cache import SessionStore
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from picker.helpers.movie_index import reset_movie_index
+from picker.helpers.pick_pools import PickPools, record_filters, top_combinations
+from picker.helpers.shuffle_deck import session_deck
+from sync.helpers.library_version import bump_library_version
+from sync.models import Genre, Movie
+
+
+class PickPoolTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        drama = Genre.objects.create(name="Drama")
+        cls.dramas = [
+            Movie.objects.create(title=f"Drama {i}", summary="x" * 300, plex_key=str(i))
+            for i in range(3)
+        ]
+        for movie in cls.dramas:
+            movie.genres.set([drama])
+        cls.other = Movie.objects.create(title="Other", plex_key="99")
+
+    def setUp(self):
+        cache.clear()
+        reset_movie_index()
+        self.pools = PickPools()
+
+    def test_top_combinations_ranks_by_hits(self):
+        drama = {"genres": ["Drama"]}
+        record_filters({"genres": []})
+        for _ in range(3):
+            record_filters(drama)
+
+        self.assertEqual(top_combinations(1), [drama])
+        self.assertEqual(len(top_combinations(5)), 2)
+
+    def test_popular_movies_are_served_from_memory(self):
+        record_filters({"genres": ["Drama"]})
+        ids = [movie.pk for movie in self.dramas]
+        self.pools.movies([])
+
+        with self.assertNumQueries(0):
+            movies = self.pools.movies(ids)
+        self.assertEqual([movie.pk for movie in movies], ids)
+        movies[0].summary = "changed"
+        self.assertNotEqual(self.pools.cards[ids[0]].summary, "changed")
+
+        # Movies outside the pools still come from the database
+        self.assertEqual(self.pools.movies([self.other.pk])[0], self.other)
+
+    def test_pools_are_dropped_on_new_library_version(self):
+        record_filters({"genres": ["Drama"]})
+        self.pools.movies([])
+        Movie.objects.filter(pk=self.dramas[0].pk).update(title="Renamed")
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_library_version()
+
+        self.assertEqual(self.pools.movies([self.dramas[0].pk])[0].title, "Renamed")
+
+    def test_random_movie_view_records_filters(self):
+        self.client.get(reverse("random_movie"), {"genre": "Drama"})
+        self.assertEqual(top_combinations(1)[0]["genres"], ["Drama"])
+
+
+@override_settings(PICK_POOL_SIZE=10)
+class DeckPrefetchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Movie.objects.bulk_create(
+            Movie(title=f"Movie {i}", plex_key=str(i)) for i in range(300)
+        )
+
+    def setUp(self):
+        cache.clear()
+        reset_movie_index()
+        self.pools = PickPools()
+
+    def test_dealt_movies_are_in_memory_with_large_library(self):
+        filters = {"genres": []}
+        record_filters(filters)
+        deck = session_deck(SessionStore(), filters)
+
+        with CaptureQueriesContext(connection) as prefetch_queries:
+            dealt = []
+            for _ in range(50):
+                dealt_ids = deck.draw(2)
+                self.pools.prefetch(dealt_ids, deck)
+                dealt.append(dealt_ids)
+        # A sampled pool of 10 out of 300 movies would serve almost none
+        for dealt_ids in dealt:
+            with self.assertNumQueries(0):
+                movies = self.pools.movies(dealt_ids)
+            self.assertEqual([movie.pk for movie in movies], dealt_ids)
+        # One query per six deals hydrates 12 movies, plus building the
+        # index and the sampled pool
+        self.assertLessEqual(len(prefetch_queries), 15)
+
+    @override_settings(PICK_POOL_UPCOMING_LIMIT=20)
+    def test_upcoming_movies_are_bounded(self):
+        deck = session_deck(SessionStore(), {"genres": []})
+        for _ in range(30):
+            self.pools.prefetch(deck.draw(2), deck)
+        self.assertLessEqual(len(self.pools.upcoming), 20)
@@ -2,9 +2,12 @@
 
 from unittest.mock import patch
 
+from django.core.cache import cache
 from django.test import TestCase
 from django.urls import reverse
 
+from picker.helpers.unified_search import reset_search_index, unified_search
+from sync.helpers.library_version import bump_library_version
 from sync.models import Genre, Movie, Show
 
 
@@ -57,3 +60,112 @@ class PlexContentViewTests(TestCase):
         self.assertContains(
             response, "An unexpected error occurred. Please try again later."
         )
+
+
+class PlexContentSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.heist = Movie.objects.create(
+            title="The Heist",
+            summary="A crew plans one last job.",
+            plex_key="1",
+        )
+        cls.caper = Movie.objects.create(
+            title="Caper",
+            tagline="The perfect heist",
+            summary="Nothing goes to plan.",
+            plex_key="2",
+        )
+        cls.original = Movie.objects.create(
+            title="Spirited Away", original_title="Sen to Chihiro", plex_key="3"
+        )
+        cls.show = Show.objects.create(
+            title="Heist Stories", summary="Robberies.", plex_key="4"
+        )
+
+    def setUp(self):
+        cache.clear()
+        reset_search_index()
+
+    def search_pks(self, query, kind):
+        return [hit.pk for hit in unified_search(query).get(kind, [])]
+
+    def test_search_ranks_titles_above_taglines(self):
+        self.assertEqual(
+            self.search_pks("heist", "movie"), [self.heist.pk, self.caper.pk]
+        )
+        self.assertEqual(self.search_pks("heist", "show"), [self.show.pk])
+
+    def test_search_covers_original_titles_and_prefixes(self):
+        self.assertEqual(self.search_pks("chihi", "movie"), [self.original.pk])
+        self.assertEqual(self.search_pks('last "job', "movie"), [self.heist.pk])
+        self.assertEqual(unified_search("*"), {})
+
+    def test_index_follows_updates_and_deletes(self):
+        self.search_pks("heist", "movie")
+        Movie.objects.filter(pk=self.caper.pk).update(tagline="A quiet drama")
+        self.heist.delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_library_version()
+        self.assertEqual(self.search_pks("heist", "movie"), [])
+
+    def test_view_returns_ranked_page(self):
+        response = self.client.get(
+            reverse("plex_content"),
+            {"query": "heist"},
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest",
+        )
+        data = response.json()
+        self.assertEqual(
+            [movie["pk"] for movie in data["movies"]], [self.heist.pk, self.caper.pk]
+        )
+        self.assertEqual([show["pk"] for show in data["shows"]], [self.show.pk])
+
+
+class PlexContentProjectionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.movie = Movie.objects.create(
+            title="Heat",
+            year=1995,
+            duration=10200000,
+            summary="A long summary that the list does not need.",
+            plex_key="1",
+        )
+
+    def setUp(self):
+        cache.clear()
+        reset_search_index()
+
+    def get_json(self, **params):
+        response = self.client.get(
+            reverse("plex_content"), params, HTTP_X_REQUESTED_WITH="XMLHttpRequest"
+        )
+        self.assertEqual(response["Content-Type"], "application/json")
+        return response.json()
+
+    def test_default_projection_is_lean(self):
+        data = self.get_json()
+        self.assertEqual(
+            data["movies"], [{"pk": self.movie.pk, "title": "Heat", "year": 1995}]
+        )
+
+    def test_fields_parameter_selects_columns(self):
+        data = self.get_json(fields="duration, summary,plex_key")
+        self.assertEqual(
+            data["movies"],
+            [
+                {
+                    "pk": self.movie.pk,
+                    "title": "Heat",
+                    "duration": 10200000,
+                    "summary": self.movie.summary,
+                }
+            ],
+        )
+
+    def test_search_results_use_projection(self):
+        data = self.get_json(query="heat", fields="year")
+        self.assertEqual(
+            data["movies"], [{"pk": self.movie.pk, "title": "Heat", "year": 1995}]
+        )
@@ -1,9 +1,11 @@
 # tests/picker/test_random_movie_form.py
 
+from django.core.cache import cache
 from django.http import QueryDict
 from django.test import TestCase
 
 from picker.forms.random_movie_form import RandomMovieForm
+from sync.helpers.library_version import bump_library_version
 from sync.models import Genre, Movie
 
 
@@ -29,6 +31,9 @@ class RandomMovieFormTest(TestCase):
         )
         movie2.genres.add(genre2)
 
+    def setUp(self):
+        cache.clear()
+
     def test_form_fields(self):
         form = RandomMovieForm()
         self.assertIn("genre", form.fields)
@@ -158,3 +163,14 @@ class RandomMovieFormTest(TestCase):
         self.assertTrue(form.is_valid())
         self.assertEqual(form.cleaned_data["genre"], ["Action", "Comedy"])
         self.assertEqual(form.cleaned_data["count"], "2")
+
+    def test_choices_are_cached_per_library_version(self):
+        RandomMovieForm()
+        with self.assertNumQueries(0):
+            RandomMovieForm()
+
+        Movie.objects.create(title="Old Movie", year=1950, plex_key="movie3")
+        self.assertNotIn((1950, "1950"), RandomMovieForm().fields["min_year"].choices)
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_library_version()
+        self.assertIn((1950, "1950"), RandomMovieForm().fields["min_year"].choices)
@@ -0,0 +1,101 @@
+# tests/picker/test_show_index.py
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from picker.helpers.show_index import (
+    get_episode_index,
+    get_show_index,
+    pick_random_episodes,
+    pick_random_shows,
+    reset_show_indexes,
+)
+from sync.models import Episode, Genre, Show
+
+
+class ShowIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        comedy = Genre.objects.create(name="Comedy")
+        cls.fresh = Show.objects.create(
+            title="Fresh Comedy", plex_key="1", year=2020, view_count=0
+        )
+        cls.fresh.genres.set([comedy])
+        cls.started = Show.objects.create(
+            title="Started Comedy", plex_key="2", year=2005
+        )
+        cls.started.genres.set([comedy])
+        cls.drama = Show.objects.create(title="Drama", plex_key="3")
+
+        cls.episodes = {}
+        for show in (cls.fresh, cls.started, cls.drama):
+            for season in (1, 2):
+                for number in (1, 2):
+                    cls.episodes[show.pk, season, number] = Episode.objects.create(
+                        show=show,
+                        title=f"{show.title} S{season}E{number}",
+                        season_number=season,
+                        episode_number=number,
+                        plex_key=show.pk * 100 + season * 10 + number,
+                        duration=(20 if number == 1 else 45) * 60 * 1000,
+                        view_count=1 if show == cls.started and season == 1 else 0,
+                    )
+
+    def setUp(self):
+        cache.clear()
+        reset_show_indexes()
+
+    def episode_ids(self, **filters):
+        index = get_episode_index()
+        return sorted(index.ids[index.mask(**filters)].tolist())
+
+    def test_show_filters(self):
+        index = get_show_index()
+        self.assertEqual(
+            sorted(index.ids[index.mask(genres=["Comedy"])].tolist()),
+            [self.fresh.pk, self.started.pk],
+        )
+        self.assertEqual(
+            index.ids[index.mask(genres=["Comedy"], unwatched=True)].tolist(),
+            [self.fresh.pk],
+        )
+        self.assertEqual(index.ids[index.mask(min_year=2010)].tolist(), [self.fresh.pk])
+
+    def test_unwatched_shows_come_from_episode_view_counts(self):
+        # Show.view_count is never synced, so it stays 0 for every show
+        self.episodes[self.drama.pk, 2, 2].view_count = 1
+        self.episodes[self.drama.pk, 2, 2].save()
+
+        index = get_show_index()
+        self.assertEqual(
+            index.ids[index.mask(unwatched=True)].tolist(), [self.fresh.pk]
+        )
+
+    def test_episodes_filter_by_show_and_episode(self):
+        self.assertEqual(
+            len(self.episode_ids(genres=["Comedy"], unwatched_show=True)), 4
+        )
+        self.assertEqual(
+            self.episode_ids(show_id=self.started.pk, unwatched=True, season=2),
+            [
+                self.episodes[self.started.pk, 2, 1].pk,
+                self.episodes[self.started.pk, 2, 2].pk,
+            ],
+        )
+        self.assertEqual(
+            self.episode_ids(genres=["Horror"], max_duration=30 * 60 * 1000), []
+        )
+        self.assertEqual(len(self.episode_ids(max_duration=30 * 60 * 1000)), 6)
+
+    def test_pick_random_episodes_fetches_only_matches(self):
+        get_episode_index()
+        # With the indexes built, a pick only fetches the sampled rows
+        with self.assertNumQueries(1):
+            episodes = pick_random_episodes(10, genres=["Comedy"], unwatched_show=True)
+            self.assertTrue(all(episode.show == self.fresh for episode in episodes))
+
+        self.assertEqual(len(episodes), 4)
+        self.assertEqual(
+            {show.pk for show in pick_random_shows(5, unwatched=True, seed=3)},
+            {self.fresh.pk, self.drama.pk},
+        )
@@ -0,0 +1,62 @@
+# tests/picker/test_suggest_index.py
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from picker.helpers.suggest_index import (
+    get_suggest_index,
+    normalize,
+    reset_suggest_index,
+)
+from sync.models import Genre, Movie, Person, Show
+
+
+class SuggestIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.matrix = Movie.objects.create(title="The Matrix", year=1999, plex_key="1")
+        Movie.objects.create(title="Matrimony", plex_key="2")
+        cls.show = Show.objects.create(title="Amélie's Diary", plex_key="3")
+        Person.objects.create(first_name="Keanu", last_name="Reeves")
+        Genre.objects.create(name="Mystery")
+
+    def setUp(self):
+        cache.clear()
+        reset_suggest_index()
+
+    def labels(self, query, limit=8):
+        return [
+            suggestion.label for suggestion in get_suggest_index().suggest(query, limit)
+        ]
+
+    def test_normalize(self):
+        self.assertEqual(normalize("  Amélie's  DIARY! "), "amelie s diary")
+        # Other scripts are kept, case folded
+        self.assertEqual(normalize("Сталкер: ΖΟΡΜΠΑΣ"), "сталкер ζορμπασ")
+
+    def test_full_name_matches_come_before_word_matches(self):
+        self.assertEqual(self.labels("matr"), ["Matrimony", "The Matrix (1999)"])
+        self.assertEqual(self.labels("matr", limit=1), ["Matrimony"])
+
+    def test_people_genres_and_accents(self):
+        self.assertEqual(self.labels("reev"), ["Keanu Reeves"])
+        self.assertEqual(self.labels("myst"), ["Mystery"])
+        self.assertEqual(self.labels("amelie"), ["Amélie's Diary"])
+        self.assertEqual(self.labels("!!"), [])
+
+    def test_suggest_endpoint(self):
+        response = self.client.get(reverse("suggest"), {"q": "the mat"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("max-age", response["Cache-Control"])
+        self.assertEqual(
+            response.json()["results"],
+            [
+                {
+                    "type": "movie",
+                    "label": "The Matrix (1999)",
+                    "url": reverse("movie_detail", args=[self.matrix.pk]),
+                }
+            ],
+        )
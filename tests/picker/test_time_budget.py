@@ -0,0 +1,115 @@
+# tests/picker/test_time_budget.py
+
+import numpy as np
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from picker.helpers.movie_index import reset_movie_index
+from picker.helpers.show_index import reset_show_indexes
+from picker.helpers.time_budget import (
+    DurationPool,
+    build_pool,
+    merge_order,
+    pick_for_time_budget,
+)
+from sync.models import Episode, Movie, Show
+
+MINUTE = 60 * 1000
+
+
+class DurationPoolTests(TestCase):
+    def setUp(self):
+        durations = np.array([30, 45, 20, 0, 120, 25, np.nan]) * MINUTE
+        self.pool = DurationPool(
+            np.zeros(len(durations), int), np.arange(len(durations)), durations
+        )
+
+    def test_unusable_durations_are_dropped(self):
+        self.assertEqual(len(self.pool), 5)
+
+    def test_fills_stay_within_budget(self):
+        rng = np.random.default_rng(0)
+        for budget in (20, 50, 75, 100, 300):
+            picked = self.pool.fill(rng, budget * MINUTE)
+            self.assertLessEqual(self.pool.durations[picked].sum(), budget * MINUTE)
+            self.assertEqual(len(set(picked)), len(picked))
+
+    def test_count_reserves_room_for_remaining_items(self):
+        rng = np.random.default_rng(0)
+        for _ in range(20):
+            picked = self.pool.fill(rng, 75 * MINUTE, count=3)
+            self.assertEqual(
+                sorted(self.pool.ids[picked].tolist()), [0, 2, 5]
+            )  # 30 + 20 + 25 is the only triple under 75 minutes
+
+    def test_merge_order_interleaves_sorted_arrays(self):
+        first = np.array([10, 20, 20, 40, np.nan])
+        second = np.array([5, 20, 30, np.nan])
+        merged = np.concatenate([first, second])[merge_order(first, second)]
+
+        np.testing.assert_array_equal(merged, np.sort(merged))
+        self.assertEqual(merge_order(first, second)[1:4].tolist(), [0, 1, 2])
+
+
+class TimeBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        show = Show.objects.create(title="Show", plex_key="1")
+        cls.episodes = [
+            Episode.objects.create(
+                show=show,
+                title=f"Episode {number}",
+                season_number=1,
+                episode_number=number,
+                plex_key=number,
+                duration=(20 + number) * MINUTE,
+                view_count=1 if number == 1 else 0,
+            )
+            for number in range(1, 6)
+        ]
+        cls.movie = Movie.objects.create(
+            title="Movie", plex_key="m1", duration=80 * MINUTE
+        )
+
+    def setUp(self):
+        cache.clear()
+        reset_movie_index()
+        reset_show_indexes()
+
+    def test_three_unwatched_episodes_under_ninety_minutes(self):
+        items = pick_for_time_budget(
+            90 * MINUTE, count=3, media=["episodes"], unwatched=True
+        )
+
+        self.assertEqual(len(items), 3)
+        self.assertLessEqual(sum(item.duration for item in items), 90 * MINUTE)
+        self.assertNotIn(self.episodes[0], items)
+
+    def test_pool_is_sorted_by_duration_across_media(self):
+        pool = build_pool(unwatched=True)
+
+        self.assertEqual(pool.durations.tolist(), sorted(pool.durations.tolist()))
+        self.assertEqual(pool.ids[-1], self.movie.pk)
+        self.assertNotIn(self.episodes[0].pk, pool.ids[:-1].tolist())
+
+    def test_unseeded_picks_are_not_cached(self):
+        url = reverse("time_budget")
+        unseeded = self.client.get(url, {"minutes": 85})
+        seeded = self.client.get(url, {"minutes": 85, "seed": 1})
+
+        self.assertIn("no-cache", unseeded["Cache-Control"])
+        self.assertNotIn("no-cache", seeded.get("Cache-Control", ""))
+
+    def test_view_mixes_movies_and_episodes(self):
+        response = self.client.get(
+            reverse("time_budget"), {"minutes": 85, "count": 1, "seed": 1}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(len(data["items"]), 1)
+        self.assertLessEqual(data["total_duration"], 85 * MINUTE)
+        self.assertEqual(
+            self.client.get(reverse("time_budget"), {"minutes": "x"}).status_code, 400
+        )
@@ -0,0 +1,61 @@
+# tests/picker/test_trigram_index.py
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from picker.helpers.search import fuzzy_search_ids
+from picker.helpers.trigram_index import (
+    get_trigram_index,
+    reset_trigram_indexes,
+    trigrams,
+)
+from picker.helpers.unified_search import reset_search_index
+from sync.models import Movie, Show
+
+
+class TrigramIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.shawshank = Movie.objects.create(
+            title="The Shawshank Redemption", plex_key="1"
+        )
+        cls.redemption = Movie.objects.create(title="Redemption", plex_key="2")
+        Movie.objects.create(title="Casablanca", plex_key="3")
+        cls.show = Show.objects.create(title="Breaking Bad", plex_key="4")
+
+    def setUp(self):
+        cache.clear()
+        reset_trigram_indexes()
+        reset_search_index()
+
+    def test_trigrams_pad_each_word(self):
+        self.assertEqual(trigrams("Up!"), {"  u", " up", "up "})
+        self.assertEqual(trigrams(""), set())
+
+    def test_misspelled_title_ranked_by_similarity(self):
+        self.assertEqual(
+            fuzzy_search_ids(Movie, "Shawshank Redemtion"),
+            [self.shawshank.pk, self.redemption.pk],
+        )
+        self.assertEqual(fuzzy_search_ids(Show, "braking bad"), [self.show.pk])
+        self.assertEqual(fuzzy_search_ids(Movie, "zzzz"), [])
+        self.assertEqual(fuzzy_search_ids(Movie, "!!"), [])
+
+    def test_reset_rebuilds_index(self):
+        index = get_trigram_index(Movie)
+        self.assertIs(get_trigram_index(Movie), index)
+        reset_trigram_indexes()
+        self.assertIsNot(get_trigram_index(Movie), index)
+
+    def test_view_falls_back_to_fuzzy_matches(self):
+        response = self.client.get(
+            reverse("plex_content"),
+            {"query": "Shawshank Redemtion"},
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest",
+        )
+        data = response.json()
+        self.assertEqual(
+            [movie["pk"] for movie in data["movies"]],
+            [self.shawshank.pk, self.redemption.pk],
+        )
@@ -0,0 +1,102 @@
+# tests/picker/test_unified_search.py
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from picker.helpers.unified_search import (
+    get_search_index,
+    reset_search_index,
+    unified_search,
+)
+from sync.models import Episode, Genre, Movie, Person, Role, Show
+
+
+class UnifiedSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.matrix = Movie.objects.create(title="The Matrix", year=1999, plex_key="1")
+        cls.speed = Movie.objects.create(
+            title="Speed", tagline="Get ready for rush hour", plex_key="2"
+        )
+        cls.show = Show.objects.create(title="Matrix Stories", plex_key="3")
+        cls.episode = Episode.objects.create(
+            show=cls.show,
+            title="Rush Hour",
+            season_number=1,
+            episode_number=2,
+            plex_key=4,
+        )
+        cls.keanu = Person.objects.create(first_name="Keanu", last_name="Reeves")
+        Role.objects.create(person=cls.keanu, role_type="ACTOR", movie=cls.matrix)
+        Role.objects.create(person=cls.keanu, role_type="ACTOR", movie=cls.speed)
+        cls.genre = Genre.objects.create(name="Rushed Drama")
+
+    def setUp(self):
+        cache.clear()
+        reset_search_index()
+
+    def pks(self, groups, kind):
+        return [hit.pk for hit in groups.get(kind, [])]
+
+    def test_groups_every_type(self):
+        groups = unified_search("rush")
+        self.assertEqual(list(groups), ["movie", "episode", "genre"])
+        self.assertEqual(self.pks(groups, "movie"), [self.speed.pk])
+        episode = groups["episode"][0]
+        self.assertEqual(episode.label, "Matrix Stories S01E02: Rush Hour")
+        self.assertEqual(episode.url, reverse("show_detail", args=[self.show.pk]))
+        # The title match outranks the tagline match
+        self.assertGreater(episode.score, groups["movie"][0].score)
+
+    def test_people_match_themselves_and_their_titles(self):
+        groups = unified_search("keanu reev")
+        self.assertEqual(self.pks(groups, "person"), [self.keanu.pk])
+        self.assertEqual(groups["person"][0].label, "Keanu Reeves (2 titles)")
+        self.assertEqual(
+            sorted(self.pks(groups, "movie")), sorted([self.matrix.pk, self.speed.pk])
+        )
+
+    def test_title_prefix_ranks_first(self):
+        groups = unified_search("matrix")
+        self.assertEqual(self.pks(groups, "movie"), [self.matrix.pk])
+        self.assertEqual(self.pks(groups, "show"), [self.show.pk])
+        self.assertGreater(groups["show"][0].score, groups["movie"][0].score)
+
+    def test_non_latin_titles_are_found(self):
+        stalker = Movie.objects.create(title="Сталкер", year=1979, plex_key="10")
+        spirited = Movie.objects.create(title="千と千尋の神隠し", plex_key="11")
+
+        self.assertEqual(self.pks(unified_search("СТАЛ"), "movie"), [stalker.pk])
+        self.assertEqual(self.pks(unified_search("千と千尋"), "movie"), [spirited.pk])
+
+    def test_every_term_must_match(self):
+        self.assertEqual(unified_search("matrix speed"), {})
+        self.assertEqual(unified_search("!!"), {})
+
+    @override_settings(SEARCH_INDEX_EPISODES=False)
+    def test_episodes_can_be_left_out(self):
+        self.assertEqual(list(unified_search("rush")), ["movie", "genre"])
+        self.assertGreater(get_search_index().nbytes(), 0)
+
+    def test_index_is_cached(self):
+        index = get_search_index()
+        with self.assertNumQueries(0):
+            self.assertIs(get_search_index(), index)
+
+    def test_view_returns_groups_in_one_response(self):
+        response = self.client.get(
+            reverse("plex_content"),
+            {"query": "rush"},
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest",
+        )
+        data = response.json()
+        self.assertEqual([movie["pk"] for movie in data["movies"]], [self.speed.pk])
+        self.assertEqual(
+            [(group["type"], group["count"]) for group in data["groups"]],
+            [("episode", 1), ("genre", 1)],
+        )
+        self.assertEqual(data["groups"][1]["results"][0]["label"], "Rushed Drama")
+
+        response = self.client.get(reverse("plex_content"), {"query": "rush"})
+        self.assertContains(response, "Matrix Stories S01E02: Rush Hour")
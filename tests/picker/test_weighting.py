@@ -0,0 +1,75 @@
+# tests/picker/test_weighting.py
+
+from datetime import timedelta
+
+import numpy as np
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from picker.helpers.movie_index import MovieIndex, reset_movie_index
+from picker.helpers.weighting import AliasTable, weighted_permutation
+from sync.models import Genre, Movie
+
+
+class AliasTableTests(TestCase):
+    def test_draws_follow_weights(self):
+        table = AliasTable(np.array([1.0, 2.0, 3.0, 4.0, 0.0]))
+        draws = table.draw(np.random.default_rng(0), 100_000)
+        frequencies = np.bincount(draws, minlength=5) / len(draws)
+
+        np.testing.assert_allclose(frequencies, [0.1, 0.2, 0.3, 0.4, 0.0], atol=0.01)
+
+    def test_zero_weights_fall_back_to_uniform(self):
+        table = AliasTable(np.zeros(3))
+        draws = table.draw(np.random.default_rng(0), 3000)
+        self.assertEqual(set(draws.tolist()), {0, 1, 2})
+
+    def test_weighted_permutation_keeps_every_position(self):
+        positions = np.array([0, 2, 3])
+        order = weighted_permutation(
+            np.random.default_rng(0), positions, np.array([1.0, 9.0, 1.0, 1.0])
+        )
+        self.assertCountEqual(order.tolist(), positions.tolist())
+
+
+class WeightedSampleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        drama = Genre.objects.create(name="Drama")
+        now = timezone.now()
+        cls.unwatched = Movie.objects.create(
+            title="Unwatched", plex_key="1", view_count=0, added_at=now
+        )
+        cls.unwatched.genres.set([drama])
+        cls.watched = [
+            Movie.objects.create(
+                title=f"Watched {i}",
+                plex_key=str(i + 2),
+                view_count=3,
+                added_at=now - timedelta(days=3650),
+            )
+            for i in range(3)
+        ]
+        cls.watched[0].genres.set([drama])
+
+    def setUp(self):
+        cache.clear()
+        reset_movie_index()
+        self.index = MovieIndex.build()
+
+    def test_weighted_sample_respects_filters(self):
+        for seed in range(20):
+            picked = self.index.sample(
+                1, seed=seed, weight="unwatched", genres=["Drama"]
+            )
+            self.assertIn(picked[0], {self.unwatched.pk, self.watched[0].pk})
+        self.assertEqual(len(self.index.sample(4, seed=1, weight="recent")), 4)
+
+    def test_weights_favor_matching_movies(self):
+        for weight in ("unwatched", "recent"):
+            picks = [
+                self.index.sample(1, seed=seed, weight=weight)[0] for seed in range(200)
+            ]
+            # Uniform would pick the unwatched, newest movie about a quarter of the time
+            self.assertGreater(picks.count(self.unwatched.pk), 80, weight)
@@ -0,0 +1,256 @@
+# tests/sync/test_bulk_loader.py
+
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+
+from sync.helpers.bulk_loader import CopyStream, LibraryLoader, copy_text
+from sync.helpers.snapshot import (
+    CatalogSnapshot,
+    SnapshotError,
+    constraint_definitions,
+    index_definitions,
+)
+from sync.models import Episode, Movie, Person, Role, Show
+
+
+def credit(name, order=0, role_type="ACTOR", tmdb_id=None):
+    return {
+        "name": name,
+        "photo_url": None,
+        "tmdb_id": tmdb_id,
+        "role_type": role_type,
+        "character_name": None,
+        "order": order,
+    }
+
+
+class LibraryLoaderTests(TestCase):
+    def setUp(self):
+        self.loader = LibraryLoader()
+        self.loader.add_movie(
+            {
+                "movie": {"plex_key": "1", "title": "The Matrix", "studio": None},
+                "studio": "Warner Bros.",
+                "genres": "Action, Sci-Fi",
+                "credits": [credit("Keanu Reeves", tmdb_id=6384)],
+            }
+        )
+        self.loader.add_show(
+            {
+                "show": {"plex_key": "2", "title": "Severance", "studio": None},
+                "studio": None,
+                "genres": "Drama",
+                "credits": [credit("Adam Scott")],
+            }
+        )
+        self.loader.add_episode(
+            {
+                "episode": {
+                    "plex_key": "3",
+                    "show_id": None,
+                    "title": "Good News About Hell",
+                    "season_number": 1,
+                    "episode_number": 1,
+                },
+                "credits": [
+                    credit("Adam Scott"),
+                    credit("Keanu Reeves", 1, tmdb_id=6384),
+                    credit("Ben Stiller", role_type="DIRECTOR"),
+                ],
+            },
+            "2",
+        )
+
+    def test_load(self):
+        counts = self.loader.load()
+
+        self.assertEqual(counts, {"movies": 1, "shows": 1, "episodes": 1, "roles": 4})
+        movie = Movie.objects.get(plex_key="1")
+        self.assertEqual(movie.studio.name, "Warner Bros.")
+        self.assertEqual(movie.formatted_genres(), "Action, Sci-Fi")
+        self.assertEqual(Episode.objects.get().show, Show.objects.get())
+        self.assertEqual(Person.objects.count(), 3)
+        # The series regular is only stored on the show
+        self.assertFalse(
+            Role.objects.filter(episode__isnull=False, person__last_name="Scott")
+        )
+
+    def test_load_is_idempotent(self):
+        self.loader.load()
+        Movie.objects.update(title="Old Title")
+        counts = self.loader.load()
+
+        self.assertEqual(counts["roles"], 0)
+        self.assertEqual(Movie.objects.get().title, "The Matrix")
+        self.assertEqual(Person.objects.count(), 3)
+
+    def test_credits_with_and_without_tmdb_id_resolve_to_one_person(self):
+        ben = Person.objects.create(first_name="Ben", last_name="Stiller")
+        self.loader.shows[0]["credits"] += [
+            credit("Patricia Arquette", 1),
+            credit("Ben Stiller", role_type="DIRECTOR", tmdb_id=7399),
+        ]
+        self.loader.episodes[0][0]["credits"] += [
+            credit("Patricia Arquette", 2, tmdb_id=4687),
+            credit("Keanu Reeves", 3),
+        ]
+        self.loader.load()
+
+        self.assertEqual(Person.objects.count(), 4)
+        self.assertEqual(Person.objects.get(last_name="Arquette").tmdb_id, 4687)
+        self.assertEqual(Person.objects.get(last_name="Reeves").tmdb_id, 6384)
+        ben.refresh_from_db()
+        self.assertEqual(ben.tmdb_id, 7399)
+
+    def test_resync_keeps_columns_left_out_of_prepared_data(self):
+        trailer = "https://www.youtube.com/embed/abc123"
+        self.loader.movies[0]["movie"]["trailer_url"] = trailer
+        self.loader.load()
+
+        # Movies with a stored trailer are prepared without one
+        loader = LibraryLoader()
+        loader.add_movie(
+            {
+                "movie": {"plex_key": "1", "title": "The Matrix", "studio": None},
+                "studio": None,
+                "genres": "Action",
+                "credits": [],
+            }
+        )
+        loader.add_movie(
+            {
+                "movie": {
+                    "plex_key": "4",
+                    "title": "Speed",
+                    "studio": None,
+                    "trailer_url": None,
+                },
+                "studio": None,
+                "genres": "Action",
+                "credits": [],
+            }
+        )
+        loader.load()
+
+        self.assertEqual(Movie.objects.get(plex_key="1").trailer_url, trailer)
+        self.assertIsNone(Movie.objects.get(plex_key="4").trailer_url)
+
+
+class CopyFormatTests(TestCase):
+    def test_copy_text(self):
+        self.assertEqual(copy_text(None), "\\N")
+        self.assertEqual(copy_text(True), "t")
+        self.assertEqual(copy_text("a\tb\\c\n"), "a\\tb\\\\c\\n")
+
+    def test_copy_stream(self):
+        stream = CopyStream([[1, "Drama"], [2, None]])
+        self.assertEqual(stream.read(4), "1\tDr")
+        self.assertEqual(stream.read(), "ama\n2\t\\N\n")
+        self.assertEqual(stream.read(), "")
+
+
+class CatalogSnapshotTests(TestCase):
+    def setUp(self):
+        self.loader = LibraryLoader()
+        self.loader.add_movie(
+            {
+                "movie": {"plex_key": "1", "title": "The Matrix", "studio": None},
+                "studio": None,
+                "genres": "",
+                "credits": [credit("Keanu Reeves")],
+            }
+        )
+
+    def test_publish_prunes_missing_titles(self):
+        gone = Movie.objects.create(title="Removed From Plex", plex_key="99")
+        Role.objects.create(
+            person=Person.objects.create(first_name="Gone", last_name="Actor"),
+            movie=gone,
+            role_type="ACTOR",
+        )
+
+        CatalogSnapshot(self.loader).publish()
+
+        self.assertEqual(list(Movie.objects.values_list("plex_key", flat=True)), ["1"])
+        self.assertEqual(Role.objects.get().person.last_name, "Reeves")
+
+    def test_invalid_snapshot_is_not_published(self):
+        Movie.objects.create(title="Kept", plex_key="99")
+
+        with self.assertRaises(SnapshotError):
+            CatalogSnapshot(LibraryLoader()).publish()
+
+        self.assertEqual(list(Movie.objects.values_list("plex_key", flat=True)), ["99"])
+
+
+@skipUnless(connection.vendor == "postgresql", "schema swap is PostgreSQL only")
+class SnapshotSchemaSwapTests(TransactionTestCase):
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            for schema in ('"Live Schema"', '"Shadow"'):
+                cursor.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+
+    def test_definitions_move_to_quoted_mixed_case_schema(self):
+        with connection.cursor() as cursor:
+            for schema in ('"Live Schema"', '"Shadow"'):
+                cursor.execute(f"CREATE SCHEMA {schema}")
+                cursor.execute(
+                    f'CREATE TABLE {schema}."Parent" (id integer PRIMARY KEY)'
+                )
+                cursor.execute(
+                    f"CREATE TABLE {schema}.child (id integer PRIMARY KEY, "
+                    f'"parentId" integer, "Title" text)'
+                )
+            cursor.execute(
+                'ALTER TABLE "Live Schema".child ADD CONSTRAINT child_parent '
+                'FOREIGN KEY ("parentId") REFERENCES "Live Schema"."Parent" (id)'
+            )
+            cursor.execute(
+                'CREATE INDEX "Child_Title" ON "Live Schema".child (lower("Title"))'
+            )
+
+            for sql in index_definitions(
+                cursor, "Live Schema", ["child", "Parent"], "Shadow"
+            ):
+                cursor.execute(sql)
+            for sql in constraint_definitions(
+                cursor, "Live Schema", "child", "f", "Shadow"
+            ):
+                cursor.execute(sql)
+
+            cursor.execute(
+                "SELECT indexname FROM pg_indexes WHERE schemaname = 'Shadow' "
+                "AND tablename = 'child' ORDER BY indexname"
+            )
+            self.assertEqual(
+                [name for (name,) in cursor.fetchall()], ["Child_Title", "child_pkey"]
+            )
+            cursor.execute(
+                "SELECT confrelid::regclass::text FROM pg_constraint "
+                "WHERE conname = 'child_parent' "
+                "AND conrelid = '\"Shadow\".child'::regclass"
+            )
+            self.assertEqual(cursor.fetchone()[0], '"Shadow"."Parent"')
+
+    def test_publish_swaps_in_snapshot_with_indexes(self):
+        Movie.objects.create(plex_key="1", title="Old Title")
+        loader = LibraryLoader()
+        loader.add_movie(
+            {
+                "movie": {"plex_key": "1", "title": "The Matrix", "studio": None},
+                "studio": None,
+                "genres": "Action",
+                "credits": [credit("Keanu Reeves")],
+            }
+        )
+        CatalogSnapshot(loader).publish()
+
+        self.assertEqual(Movie.objects.get().title, "The Matrix")
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT count(*) FROM pg_indexes WHERE schemaname = current_schema() "
+                "AND tablename = 'sync_movie'"
+            )
+            self.assertGreater(cursor.fetchone()[0], 2)
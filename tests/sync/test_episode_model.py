@@ -1,9 +1,10 @@
 # tests/sync/test_episode_model.py
 
+from django.core.management import call_command
 from django.forms import ValidationError
 from django.test import TestCase
 
-from sync.models import Episode, Show
+from sync.models import Episode, Person, Role, Show
 
 
 class EpisodeModelTests(TestCase):
@@ -63,3 +64,76 @@ class EpisodeModelTests(TestCase):
         self.episode.episode_number = 0
         with self.assertRaises(ValidationError):
             self.episode.clean()
+
+
+class EpisodeCastTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.show = Show.objects.create(title="Stranger Things", plex_key=1)
+        cls.episode = Episode.objects.create(
+            show=cls.show,
+            title="Chapter One",
+            season_number=1,
+            episode_number=1,
+            plex_key=2,
+        )
+        cls.winona = Person.objects.create(first_name="Winona", last_name="Ryder")
+        cls.david = Person.objects.create(first_name="David", last_name="Harbour")
+        cls.guest = Person.objects.create(first_name="Guest", last_name="Star")
+        Role.objects.create(
+            person=cls.winona,
+            show=cls.show,
+            role_type="ACTOR",
+            character_name="Joyce Byers",
+            order=0,
+        )
+        Role.objects.create(
+            person=cls.david,
+            show=cls.show,
+            role_type="ACTOR",
+            character_name="Jim Hopper",
+            order=1,
+        )
+        Role.objects.create(
+            person=cls.guest,
+            episode=cls.episode,
+            role_type="ACTOR",
+            character_name="Benny",
+            order=2,
+        )
+
+    def test_actors_include_series_regulars(self):
+        people = [role.person for role in self.episode.get_actors()]
+        self.assertEqual(people, [self.winona, self.david, self.guest])
+        self.assertEqual(
+            self.episode.formatted_actors(),
+            "Winona Ryder as Joyce Byers, David Harbour as Jim Hopper, "
+            "Guest Star as Benny",
+        )
+
+    def test_episode_credit_overrides_show_credit(self):
+        Role.objects.create(
+            person=self.david,
+            episode=self.episode,
+            role_type="ACTOR",
+            character_name="Chief Hopper",
+            order=1,
+        )
+        roles = self.episode.get_actors()
+        self.assertEqual(roles.count(), 3)
+        self.assertIn("David Harbour as Chief Hopper", self.episode.formatted_actors())
+
+    def test_compact_episode_roles_command(self):
+        Role.objects.create(person=self.winona, episode=self.episode, role_type="ACTOR")
+        Role.objects.create(
+            person=self.david, episode=self.episode, role_type="DIRECTOR"
+        )
+
+        call_command("compact_episode_roles")
+
+        episode_roles = Role.objects.filter(episode=self.episode)
+        self.assertEqual(episode_roles.count(), 2)
+        self.assertFalse(
+            episode_roles.filter(person=self.winona, role_type="ACTOR").exists()
+        )
+        self.assertEqual(self.episode.get_actors().count(), 3)
@@ -0,0 +1,61 @@
+# tests/sync/test_library_archive.py
+
+import os
+import tempfile
+from datetime import date, datetime, timezone
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from sync.models import Episode, Genre, Movie, Person, Role, Show
+
+
+class LibraryArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        genre = Genre.objects.create(name="Sci-Fi")
+        cls.movie = Movie.objects.create(
+            title="The Matrix\twith tabs",
+            plex_key="1",
+            year=1999,
+            audience_rating=8.7,
+            originally_available_at=date(1999, 3, 31),
+            added_at=datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+        )
+        cls.movie.genres.add(genre)
+        show = Show.objects.create(title="Severance", plex_key="2")
+        episode = Episode.objects.create(
+            show=show,
+            title="Pilot",
+            plex_key=3,
+            season_number=1,
+            episode_number=1,
+            has_intro_marker=True,
+        )
+        person = Person.objects.create(first_name="Keanu", last_name="Reeves")
+        Role.objects.create(person=person, movie=cls.movie, role_type="ACTOR")
+        Role.objects.create(person=person, episode=episode, role_type="ACTOR")
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".plexlib")
+        os.close(handle)
+        self.addCleanup(os.remove, self.path)
+
+    def test_round_trip(self):
+        call_command("export_library", self.path)
+        call_command("import_library", self.path, "--replace")
+
+        movie = Movie.objects.get()
+        self.assertEqual(movie.pk, self.movie.pk)
+        self.assertEqual(movie.title, "The Matrix\twith tabs")
+        self.assertEqual(movie.audience_rating, 8.7)
+        self.assertEqual(movie.originally_available_at, date(1999, 3, 31))
+        self.assertEqual(movie.added_at, self.movie.added_at)
+        self.assertEqual(movie.formatted_genres(), "Sci-Fi")
+        self.assertTrue(Episode.objects.get().has_intro_marker)
+        self.assertEqual(Role.objects.count(), 2)
+
+    def test_import_refuses_non_empty_catalog(self):
+        call_command("export_library", self.path)
+        with self.assertRaises(CommandError):
+            call_command("import_library", self.path)
@@ -0,0 +1,37 @@
+# tests/sync/test_library_version.py
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from sync.helpers.library_version import (
+    LIBRARY_VERSION_KEY,
+    bump_library_version,
+    get_library_version,
+)
+from sync.models import LibraryState
+
+
+class LibraryVersionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_version_starts_at_one(self):
+        self.assertEqual(get_library_version(), 1)
+
+    def test_bump_is_stored_and_mirrored_on_commit(self):
+        get_library_version()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.assertEqual(bump_library_version(), 2)
+            self.assertEqual(bump_library_version(), 3)
+
+        self.assertEqual(LibraryState.objects.get().version, 3)
+        # Until the transaction commits other requests keep the old version
+        self.assertEqual(get_library_version(), 1)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(cache.get(LIBRARY_VERSION_KEY), 3)
+        self.assertEqual(get_library_version(), 3)
+
+    def test_version_is_read_from_database_on_cache_miss(self):
+        LibraryState.objects.create(version=7)
+        self.assertEqual(get_library_version(), 7)
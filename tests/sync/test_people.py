@@ -0,0 +1,124 @@
+# tests/sync/test_people.py
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from sync.helpers.people import (
+    PersonResolver,
+    extract_credits,
+    get_tmdb_person_ids,
+    normalize_name,
+    save_credits,
+)
+from sync.models import Movie, Person, Role
+
+
+class NormalizeNameTests(TestCase):
+    def test_normalize_name(self):
+        self.assertEqual(normalize_name("  Penélope   Cruz "), "penelope cruz")
+        self.assertEqual(
+            normalize_name("Robert Downey, Jr."), normalize_name("robert downey jr")
+        )
+
+    def test_get_tmdb_person_ids(self):
+        tmdb_info = {
+            "credits": {
+                "cast": [{"id": 1, "name": "Keanu Reeves"}],
+                "guest_stars": [{"id": 2, "name": "Guest Star"}],
+                "crew": [{"id": 3, "name": "Lana Wachowski"}],
+            }
+        }
+        self.assertEqual(
+            get_tmdb_person_ids(tmdb_info),
+            {"keanu reeves": 1, "guest star": 2, "lana wachowski": 3},
+        )
+        self.assertEqual(get_tmdb_person_ids(None), {})
+
+
+class PersonResolverTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.keanu = Person.objects.create(first_name="Keanu", last_name="Reeves")
+
+    def test_resolve_by_name_fills_tmdb_id(self):
+        resolver = PersonResolver()
+        person = resolver.resolve("keanu reeves", tmdb_id=6384)
+        self.assertEqual(person.pk, self.keanu.pk)
+        self.keanu.refresh_from_db()
+        self.assertEqual(self.keanu.tmdb_id, 6384)
+
+    def test_resolve_prefers_tmdb_id(self):
+        Person.objects.filter(pk=self.keanu.pk).update(tmdb_id=6384)
+        resolver = PersonResolver()
+        person = resolver.resolve("Keanu Charles Reeves", tmdb_id=6384)
+        self.assertEqual(person.pk, self.keanu.pk)
+        self.assertEqual(Person.objects.count(), 1)
+
+    def test_same_name_different_tmdb_id_creates_person(self):
+        Person.objects.filter(pk=self.keanu.pk).update(tmdb_id=6384)
+        resolver = PersonResolver()
+        person = resolver.resolve("Keanu Reeves", tmdb_id=99999)
+        self.assertNotEqual(person.pk, self.keanu.pk)
+        self.assertEqual(person.tmdb_id, 99999)
+        self.assertEqual(Person.objects.count(), 2)
+
+    def test_resolve_creates_once(self):
+        resolver = PersonResolver()
+        first = resolver.resolve("Carrie-Anne Moss", photo_url="http://x/1.jpg")
+        second = resolver.resolve("Carrie-Anne Moss")
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(first.first_name, "Carrie-Anne")
+        self.assertEqual(first.last_name, "Moss")
+
+
+class SaveCreditsTests(TestCase):
+    def test_save_credits_updates_in_place(self):
+        movie = Movie.objects.create(title="The Matrix", plex_key="matrix")
+        tag = type("Tag", (), {"tag": "Keanu Reeves as Neo", "thumb": None})
+        credits = extract_credits([tag], "ACTOR")
+        self.assertEqual(credits[0]["character_name"], "Neo")
+
+        self.assertEqual(save_credits(PersonResolver(), credits, movie=movie), 1)
+        credits[0]["character_name"] = "Thomas Anderson"
+        self.assertEqual(save_credits(PersonResolver(), credits, movie=movie), 0)
+
+        role = Role.objects.get(movie=movie)
+        self.assertEqual(role.character_name, "Thomas Anderson")
+
+
+class MergeDuplicatePeopleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.movie = Movie.objects.create(title="The Matrix", plex_key="matrix")
+        cls.sequel = Movie.objects.create(title="Reloaded", plex_key="reloaded")
+        cls.keanu = Person.objects.create(
+            first_name="Keanu", last_name="Reeves", tmdb_id=6384
+        )
+        cls.keanu_dupe = Person.objects.create(first_name="keanu", last_name="reeves")
+        cls.john = Person.objects.create(
+            first_name="John", last_name="Smith", tmdb_id=1
+        )
+        cls.other_john = Person.objects.create(
+            first_name="John", last_name="Smith", tmdb_id=2
+        )
+        Role.objects.create(person=cls.keanu, movie=cls.movie, role_type="ACTOR")
+        Role.objects.create(person=cls.keanu_dupe, movie=cls.movie, role_type="ACTOR")
+        Role.objects.create(person=cls.keanu_dupe, movie=cls.sequel, role_type="ACTOR")
+
+    def test_merge_duplicate_people(self):
+        call_command("merge_duplicate_people")
+
+        self.assertFalse(Person.objects.filter(pk=self.keanu_dupe.pk).exists())
+        roles = Role.objects.filter(person=self.keanu)
+        self.assertEqual(roles.count(), 2)
+        self.assertEqual(
+            set(roles.values_list("movie_id", flat=True)),
+            {self.movie.pk, self.sequel.pk},
+        )
+        # Different TMDB ids mean different people, even with the same name
+        self.assertEqual(Person.objects.filter(first_name="John").count(), 2)
+
+    def test_dry_run(self):
+        call_command("merge_duplicate_people", "--dry-run")
+        self.assertEqual(Person.objects.count(), 4)
+        self.assertEqual(Role.objects.count(), 3)
@@ -0,0 +1,37 @@
+# tests/sync/test_sync_lock.py
+
+import tempfile
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from sync.helpers.sync_lock import SyncLock
+
+
+class SyncLockTests(TestCase):
+    def setUp(self):
+        lock_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(lock_dir.cleanup)
+        settings_override = override_settings(SYNC_LOCK_DIR=lock_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_lock_excludes_other_holders_until_released(self):
+        with SyncLock("lock_sync_movies") as lock:
+            self.assertTrue(lock.acquire())
+            with SyncLock("lock_sync_movies") as other:
+                self.assertFalse(other.acquire())
+            with SyncLock("lock_sync_shows") as unrelated:
+                self.assertTrue(unrelated.acquire())
+
+        with SyncLock("lock_sync_movies") as lock:
+            self.assertTrue(lock.acquire())
+
+    @mock.patch("sync.management.commands.sync_content.call_command")
+    def test_sync_content_skips_locked_task(self, mock_call_command):
+        with SyncLock("lock_sync_movies") as lock:
+            lock.acquire()
+            call_command("sync_content")
+
+        mock_call_command.assert_called_once_with("sync_shows")
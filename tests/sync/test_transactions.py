@@ -0,0 +1,95 @@
+# tests/sync/test_transactions.py
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from sync.helpers.library_version import get_library_version
+from sync.helpers.people import PersonResolver
+from sync.helpers.transactions import ChunkedWriter, RollbackJournal
+from sync.models import Genre, Person
+
+
+def create_genre(name):
+    Genre.objects.create(name=name)
+
+
+class ChunkedWriterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_flushes_on_chunk_size(self):
+        writer = ChunkedWriter(chunk_size=2, chunk_ms=0)
+        writer.add("first", create_genre, "Drama")
+        self.assertEqual(writer.written, 0)
+        writer.add("second", create_genre, "Comedy")
+        self.assertEqual(writer.written, 2)
+        self.assertEqual(Genre.objects.count(), 2)
+
+    def test_failed_write_does_not_lose_chunk(self):
+        errors = []
+
+        def fail():
+            Genre.objects.create(name="Rolled Back")
+            raise ValueError("boom")
+
+        with ChunkedWriter(
+            chunk_size=10, on_error=lambda label, e: errors.append(label)
+        ) as writer:
+            writer.add("ok", create_genre, "Drama")
+            writer.add("bad", fail)
+
+        self.assertEqual(errors, ["bad"])
+        self.assertEqual((writer.written, writer.failed), (1, 1))
+        self.assertEqual(list(Genre.objects.values_list("name", flat=True)), ["Drama"])
+
+    def test_rollback_drops_only_the_failed_writes_cache_entries(self):
+        keanu = Person.objects.create(first_name="Keanu", last_name="Reeves")
+        journal = RollbackJournal()
+        people = PersonResolver(journal)
+        cache = {"kept": 1}
+        resolved = []
+
+        def fail():
+            journal.set(cache, "kept", 2)
+            journal.set(cache, "added", 3)
+            people.resolve("Carrie-Anne Moss")
+            people.resolve("Keanu Reeves", tmdb_id=6384)
+            raise ValueError("boom")
+
+        def resolve():
+            resolved.append(people.resolve("Carrie-Anne Moss"))
+
+        with ChunkedWriter(
+            chunk_size=10, on_error=lambda *args: None, journal=journal
+        ) as writer:
+            writer.add("bad", fail)
+            writer.add("ok", resolve)
+
+        self.assertEqual((writer.written, writer.failed), (1, 1))
+        self.assertEqual(cache, {"kept": 1})
+        self.assertEqual(list(Person.objects.exclude(pk=keanu.pk)), resolved)
+        self.assertIsNone(people.match("Keanu Reeves").tmdb_id)
+        self.assertNotIn(6384, people.by_tmdb_id)
+
+    def test_bumps_library_version_once_per_run(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with ChunkedWriter(chunk_size=1, chunk_ms=0) as writer:
+                for name in ("Drama", "Comedy", "Horror"):
+                    writer.add(name, create_genre, name)
+                # Nothing is bumped until the run is over
+                self.assertEqual(get_library_version(), 1)
+
+        self.assertEqual(writer.written, 3)
+        self.assertEqual(get_library_version(), 2)
+
+    def test_run_without_committed_writes_keeps_library_version(self):
+        def fail():
+            raise ValueError("boom")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with ChunkedWriter(chunk_size=1, on_error=lambda *args: None) as writer:
+                writer.add("bad", fail)
+            with ChunkedWriter():
+                pass
+
+        self.assertEqual(get_library_version(), 1)
@@ -0,0 +1,96 @@
+# tests/utils/test_tmdb_utils.py
+
+from unittest.mock import MagicMock, patch
+
+import requests
+from django.test import TestCase
+
+from utils.tmdb_utils import (
+    TMDBClient,
+    get_character_name,
+    get_imdb_id,
+    get_trailer_url,
+)
+
+TMDB_MOVIE = {
+    "id": 603,
+    "title": "The Matrix",
+    "imdb_id": "tt0133093",
+    "credits": {
+        "cast": [
+            {"id": 6384, "name": "Keanu Reeves", "character": "Neo"},
+            {"id": 2975, "name": "Laurence Fishburne", "character": "Morpheus"},
+        ]
+    },
+    "videos": {
+        "results": [
+            {"type": "Teaser", "site": "YouTube", "key": "teaser1"},
+            {"type": "Trailer", "site": "YouTube", "key": "vKQi3bBA1y8"},
+        ]
+    },
+    "external_ids": {"imdb_id": "tt0133093"},
+}
+
+
+class TestTMDBClient(TestCase):
+    def setUp(self):
+        self.client = TMDBClient(
+            tmdb_api_url="http://test.tmdb.api", tmdb_api_key="test_tmdb_key"
+        )
+
+    @patch("utils.tmdb_utils.requests.get")
+    def test_get_movie_single_request(self, mock_get):
+        mock_response = MagicMock()
+        mock_response.json.return_value = TMDB_MOVIE
+        mock_get.return_value = mock_response
+
+        movie_info = self.client.get_movie(603)
+
+        self.assertEqual(movie_info, TMDB_MOVIE)
+        mock_get.assert_called_once_with(
+            "http://test.tmdb.api/movie/603",
+            params={
+                "api_key": "test_tmdb_key",
+                "append_to_response": "credits,videos,external_ids",
+            },
+            timeout=10,
+        )
+
+    @patch("utils.tmdb_utils.requests.get")
+    def test_get_movie_is_cached(self, mock_get):
+        mock_response = MagicMock()
+        mock_response.json.return_value = TMDB_MOVIE
+        mock_get.return_value = mock_response
+
+        self.client.get_movie(603)
+        self.client.get_movie(603)
+
+        mock_get.assert_called_once()
+
+    @patch("utils.tmdb_utils.requests.get")
+    def test_get_movie_failure_is_cached(self, mock_get):
+        mock_get.side_effect = requests.RequestException("API Error")
+
+        self.assertIsNone(self.client.get_movie(603))
+        self.assertIsNone(self.client.get_movie(603))
+        mock_get.assert_called_once()
+
+
+class TestTMDBExtractors(TestCase):
+    def test_get_character_name(self):
+        self.assertEqual(get_character_name(TMDB_MOVIE, "keanu reeves"), "Neo")
+        self.assertIsNone(get_character_name(TMDB_MOVIE, "Carrie-Anne Moss"))
+        self.assertIsNone(get_character_name(None, "Keanu Reeves"))
+
+    def test_get_trailer_url(self):
+        self.assertEqual(
+            get_trailer_url(TMDB_MOVIE), "https://www.youtube.com/embed/vKQi3bBA1y8"
+        )
+        self.assertIsNone(get_trailer_url({"videos": {"results": []}}))
+        self.assertIsNone(get_trailer_url(None))
+
+    def test_get_imdb_id(self):
+        self.assertEqual(get_imdb_id(TMDB_MOVIE), "tt0133093")
+        self.assertEqual(get_imdb_id({"imdb_id": "tt0000001"}), "tt0000001")
+        self.assertIsNone(get_imdb_id({"external_ids": {"imdb_id": None}}))
+        self.assertIsNone(get_imdb_id(None))
@@ -130,6 +130,32 @@ class TestTrailerFetcher(TestCase):
         mock_tmdb.assert_called_once_with(1)
         mock_youtube.assert_called_once_with("Movie 1")
 
+    @patch.object(TrailerFetcher, "get_tmdb_trailer_url")
+    @patch.object(TrailerFetcher, "get_youtube_trailer_url")
+    def test_fetch_trailer_url_from_tmdb_info(self, mock_youtube, mock_tmdb):
+        tmdb_info = {
+            "videos": {
+                "results": [{"type": "Trailer", "site": "YouTube", "key": "abc123"}]
+            }
+        }
+        trailer_url = self.trailer_fetcher.fetch_trailer_url(self.movie1, tmdb_info)
+        self.assertEqual(trailer_url, "https://www.youtube.com/embed/abc123")
+        mock_tmdb.assert_not_called()
+        mock_youtube.assert_not_called()
+
+    @patch.object(TrailerFetcher, "get_tmdb_trailer_url")
+    @patch.object(TrailerFetcher, "get_youtube_trailer_url")
+    def test_find_trailer_url_skips_tmdb_after_failed_details(
+        self, mock_youtube, mock_tmdb
+    ):
+        mock_youtube.return_value = "https://www.youtube.com/watch?v=xyz789"
+        trailer_url = self.trailer_fetcher.find_trailer_url(
+            "Movie 1", 1, None, details_fetched=True
+        )
+        self.assertEqual(trailer_url, "https://www.youtube.com/watch?v=xyz789")
+        mock_tmdb.assert_not_called()
+        mock_youtube.assert_called_once_with("Movie 1")
+
     def test_fetch_trailer_url_existing_url(self):
         self.movie1.trailer_url = "https://www.youtube.com/watch?v=existing123"
         self.movie1.save()
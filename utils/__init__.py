@@ -2,4 +2,5 @@
 
 from .genre_utils import *
 from .logger_utils import *
+from .tmdb_utils import *
 from .trailer_utils import *
@@ -0,0 +1,72 @@
+# utils/tmdb_utils.py
+
+from typing import Any, Dict, Optional
+
+import requests
+
+from utils.logger_utils import setup_logging
+
+logger = setup_logging(__name__)
+
+# Everything the movie sync needs from TMDB, fetched in a single request
+MOVIE_APPEND_TO_RESPONSE = "credits,videos,external_ids"
+
+
+class TMDBClient:
+    def __init__(self, tmdb_api_url, tmdb_api_key):
+        self.tmdb_api_url = tmdb_api_url
+        self.tmdb_api_key = tmdb_api_key
+        self._movie_cache: Dict[int, Optional[Dict[str, Any]]] = {}
+
+    def get_movie(self, tmdb_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Fetch a movie's details together with its credits, videos and external ids.
+
+        Results (including failures) are cached for the lifetime of the client so
+        each movie costs at most one TMDB request per sync run.
+        """
+        if tmdb_id in self._movie_cache:
+            return self._movie_cache[tmdb_id]
+
+        movie_info = None
+        try:
+            response = requests.get(
+                f"{self.tmdb_api_url}/movie/{tmdb_id}",
+                params={
+                    "api_key": self.tmdb_api_key,
+                    "append_to_response": MOVIE_APPEND_TO_RESPONSE,
+                },
+                timeout=10,
+            )
+            response.raise_for_status()
+            movie_info = response.json()
+        except requests.RequestException as e:
+            logger.error(f"TMDB API request failed for movie ID {tmdb_id}: {str(e)}")
+
+        self._movie_cache[tmdb_id] = movie_info
+        return movie_info
+
+
+def get_character_name(tmdb_info: Optional[Dict], actor_name: str) -> Optional[str]:
+    if not tmdb_info or "credits" not in tmdb_info:
+        return None
+    for cast in tmdb_info["credits"].get("cast", []):
+        if cast["name"].lower() == actor_name.lower():
+            return cast["character"]
+    return None
+
+
+def get_trailer_url(tmdb_info: Optional[Dict]) -> Optional[str]:
+    if not tmdb_info:
+        return None
+    for video in tmdb_info.get("videos", {}).get("results", []):
+        if video["type"] == "Trailer" and video["site"].lower() == "youtube":
+            return f"https://www.youtube.com/embed/{video['key']}"
+    return None
+
+
+def get_imdb_id(tmdb_info: Optional[Dict]) -> Optional[str]:
+    if not tmdb_info:
+        return None
+    external_ids = tmdb_info.get("external_ids") or {}
+    return external_ids.get("imdb_id") or tmdb_info.get("imdb_id") or None
@@ -8,6 +8,7 @@ import requests
 from googleapiclient.errors import HttpError
 
 from utils.logger_utils import setup_logging
+from utils.tmdb_utils import get_trailer_url
 
 logger = setup_logging(__name__)
 
@@ -86,15 +87,34 @@ class TrailerFetcher:
             logger.error(f"YouTube API request failed for {movie_title}: {str(e)}")
         return None
 
-    def fetch_trailer_url(self, movie) -> Optional[str]:
+    def find_trailer_url(
+        self, title, tmdb_id=None, tmdb_info=None, details_fetched=False
+    ) -> Optional[str]:
+        """
+        Look up a trailer without saving it; TMDB first, then YouTube.
+
+        Pass ``details_fetched=True`` when the caller already requested the
+        movie details (which include videos) from TMDB: if that request
+        failed, the separate videos request is skipped too.
+        """
+        trailer_url = None
+        if tmdb_info is not None:
+            # Videos were already fetched with the movie details
+            trailer_url = get_trailer_url(tmdb_info)
+        elif tmdb_id and not details_fetched:
+            trailer_url = self.get_tmdb_trailer_url(tmdb_id)
+        if not trailer_url:
+            trailer_url = self.get_youtube_trailer_url(title)
+        return trailer_url
+
+    def fetch_trailer_url(self, movie, tmdb_info=None) -> Optional[str]:
         if not movie.trailer_url:
             logger.debug(
                 f"Fetching trailer URL for {movie.title} (TMDB ID: {movie.tmdb_id})"
             )
-            if movie.tmdb_id:
-                movie.trailer_url = self.get_tmdb_trailer_url(movie.tmdb_id)
-            if not movie.trailer_url:
-                movie.trailer_url = self.get_youtube_trailer_url(movie.title)
+            movie.trailer_url = self.find_trailer_url(
+                movie.title, movie.tmdb_id, tmdb_info
+            )
             if movie.trailer_url:
                 logger.debug(f"Trailer URL found: {movie.trailer_url}")
                 movie.save(update_fields=["trailer_url"])